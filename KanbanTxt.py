@@ -17,55 +17,30 @@
 
 import os
 import pathlib
+import bisect
+import difflib
+import itertools
 import re
-from datetime import date
+import time
+from datetime import date, timedelta
 import tkinter as tk
 from tkinter import filedialog
 from tkinter import simpledialog
 from tkinter import ttk
 import tkinter.font as tkFont
 import argparse
+from idlelib.redirector import WidgetRedirector
 from idlelib.tooltip import Hovertip
 import ctypes
 import json
+import logging
+import KanbanTxtModel
+import KanbanTxtProfile
+import KanbanTxtQuery
+import KanbanTxtStorage
 
 
-def f_sort_column_by_prio(d):
-    return d['priority'] if d['priority'] is not None else 'z'
-
-
-def f_sort_column_by_order(d):
-    return d['index']
-
-
-def f_sort_column_by_txt(d):
-    return d['raw_txt']
-
-
-def f_sort_column_by_subject(d):
-    return d['subject']
-
-
-def f_sort_column_by_tag(d, tag_name, tag_indicator):
-    if len(d[tag_name]) < 1:
-        return chr(ord('z') + 1)
-
-    project_tags_copy = []
-    for p in d[tag_name]:
-        project_tags_copy.append(p[tag_name].casefold())
-    project_tags_copy.sort()
-    s = ' '.join(project_tags_copy)
-    s = s.replace(tag_indicator, '')
-    return s
-
-
-def f_sort_column_by_project(d):
-    return f_sort_column_by_tag(d, 'project', '+')
-
-
-def f_sort_column_by_context(d):
-    return f_sort_column_by_tag(d, 'context', '@')
-
+logger = logging.getLogger('KanbanTxt')
 
 SORT_METHODS = [
     {
@@ -74,7 +49,7 @@ SORT_METHODS = [
                    'tasks with priority (A) will be put first, then (B)... up to (Z).\n'
                    'Tasks without set priority will be put last.\n'
                    'Tasks within the same priority will be put in order of their definition in the txt file.',
-        'f': f_sort_column_by_prio,
+        'key': KanbanTxtModel.SORT_KEY_PRIORITY,
         'rev': False
     },
     {
@@ -83,28 +58,28 @@ SORT_METHODS = [
                    'tasks with priority (A) will be put last, before (B)... up to (Z).\n'
                    'Tasks without set priority will be put first.\n'
                    'Tasks within the same priority will be put in reversed order of their definition in the txt file.',
-        'f': f_sort_column_by_prio,
+        'key': KanbanTxtModel.SORT_KEY_PRIORITY,
         'rev': True
     },
     {
         'text': "Order in txt file",
         'tooltip': 'Tasks are ordered by their definition in the txt file:\n'
                    'if a task is defined earlier in txt than the other, it will appear higher.',
-        'f': f_sort_column_by_order,
+        'key': KanbanTxtModel.SORT_KEY_ORDER,
         'rev': False
     },
     {
         'text': "Reversed order in txt file",
         'tooltip': 'Tasks are ordered in reverse by their definition in the txt file:\n'
                    'if a task is defined later in txt than the other, it will appear higher.',
-        'f': f_sort_column_by_order,
+        'key': KanbanTxtModel.SORT_KEY_ORDER,
         'rev': True
     },
     {
         'text': "Alphabetically by subject",
         'tooltip': "Tasks are ordered lexicographically by their subject.\n"
                    "It won't include priority or other tags defined at the beginning of line in the todo.txt.",
-        'f': f_sort_column_by_subject,
+        'key': KanbanTxtModel.SORT_KEY_SUBJECT,
         'rev': False
     },
     {
@@ -112,21 +87,21 @@ SORT_METHODS = [
         'tooltip': "Tasks are ordered lexicographically by their definition in the txt file.\n"
                    "It WILL include priority or other tags defined at the beginning of line in the todo.txt.\n"
                     "This is similar to sorting by priority, but the tasks without priority will be sorted alphabetically and not by their order in txt file.",
-        'f': f_sort_column_by_txt,
+        'key': KanbanTxtModel.SORT_KEY_TEXT,
         'rev': False
     },
     {
         'text': "Alphabetically by project",
         'tooltip': "Tasks are ordered lexicographically by their project tags.\n"
                    "If task has multiple project tags, they will be first sorted alphabetically.",
-        'f': f_sort_column_by_project,
+        'key': KanbanTxtModel.SORT_KEY_PROJECT,
         'rev': False
     },
     {
         'text': "Alphabetically by context",
         'tooltip': "Tasks are ordered lexicographically by their context tags.\n"
                    "If task has multiple context tags, they will be first sorted alphabetically.",
-        'f': f_sort_column_by_context,
+        'key': KanbanTxtModel.SORT_KEY_CONTEXT,
         'rev': False
     },
 ]
@@ -154,6 +129,14 @@ class CustomizeViewDialog(simpledialog.Dialog):
                  out_hide_buttons_assign_priority,
                  out_hide_buttons_move_to_column,
                  out_hide_buttons_move_line_up_down,
+                 out_virtualized_columns,
+                 out_card_renderer,
+                 out_live_filter,
+                 out_live_filter_delay,
+                 out_background_save,
+                 out_journal_mode,
+                 out_archive_age,
+                 out_column_sort_specs,
                  ):
         self.show_project = out_show_project
         self.show_context = out_show_context
@@ -178,6 +161,14 @@ class CustomizeViewDialog(simpledialog.Dialog):
         self.hide_buttons_assign_priority = out_hide_buttons_assign_priority
         self.hide_buttons_move_to_column = out_hide_buttons_move_to_column
         self.hide_buttons_move_line_up_down = out_hide_buttons_move_line_up_down
+        self.virtualized_columns = out_virtualized_columns
+        self.card_renderer = out_card_renderer
+        self.live_filter = out_live_filter
+        self.live_filter_delay = out_live_filter_delay
+        self.background_save = out_background_save
+        self.journal_mode = out_journal_mode
+        self.archive_age = out_archive_age
+        self.column_sort_specs = out_column_sort_specs
         super().__init__(parent, title)
 
     def create_checkbox(self, text, tooltip, variable, frame):
@@ -215,6 +206,18 @@ class CustomizeViewDialog(simpledialog.Dialog):
             m = SORT_METHODS[i]
             self.create_radiobuttion(m['text'], m['tooltip'], self.sort_method, i, frame_sorting)
 
+        frame_sort_specs = tk.LabelFrame(first_column_frame, text="Sort columns by fields: ")
+        frame_sort_specs.pack(fill='x', pady=(10, 0))
+        sort_specs_tooltip = ("Comma separated fields to sort tasks of the column by, e.g. 'priority,created,project',\n"
+                              "'-' before a field sorts it in descending order, e.g. '-completed'.\n"
+                              f"Fields: {', '.join(list(KanbanTxtModel.SORT_FIELDS) + [KanbanTxtModel.SORT_FIELD_ORDER])}.\n"
+                              "Tasks of columns without fields are sorted by the order chosen above.")
+        for i, spec in enumerate(self.column_sort_specs):
+            tk.Label(frame_sort_specs, text=f"{self.col_names[i].get()}:").pack(anchor=tk.W, padx=10)
+            entry = tk.Entry(frame_sort_specs, textvariable=spec)
+            Hovertip(entry, sort_specs_tooltip)
+            entry.pack(anchor=tk.W, padx=10, pady=(0, 5), fill='x')
+
         second_column_frame = tk.Frame(grid_frame)
         second_column_frame.grid(row=row, column=1, padx=10, pady=10, sticky=tk.NW)
         frame_show_hide = tk.LabelFrame(second_column_frame, text="Show/hide task cards' elements: ")
@@ -232,6 +235,21 @@ class CustomizeViewDialog(simpledialog.Dialog):
         fontsize_spinbox = tk.Spinbox(frame_fontsize, from_=4, to=100, textvariable=self.font_size, wrap=True)
         fontsize_spinbox.pack(anchor=tk.W, padx=10, pady=10, fill='x')
 
+        frame_rendering = tk.LabelFrame(second_column_frame, text="Rendering: ")
+        frame_rendering.pack(fill='x')
+        self.create_radiobuttion('Widgets',
+                                 'Each task card is made of tkinter widgets.',
+                                 self.card_renderer, KanbanTxtViewer.CARD_RENDERER_WIDGETS, frame_rendering)
+        self.create_radiobuttion('Canvas items',
+                                 'Task cards are drawn as shapes and texts on a single canvas in each column.\n'
+                                 'Much faster for thousands of tasks.',
+                                 self.card_renderer, KanbanTxtViewer.CARD_RENDERER_CANVAS, frame_rendering)
+        self.create_checkbox('Virtualized columns',
+                             'Draw only task cards in the visible part of the kanban.\n'
+                             'Speeds up scrolling through columns with thousands of tasks.\n'
+                             'Used only with task cards made of widgets.',
+                             self.virtualized_columns, frame_rendering)
+
         third_column_frame = tk.Frame(grid_frame)
         third_column_frame.grid(row=row, column=2, padx=10, pady=10, sticky=tk.NW)
 
@@ -249,14 +267,65 @@ class CustomizeViewDialog(simpledialog.Dialog):
         self.create_checkbox("Adding new task", "", self.ask_for_add, frame_ask_for)
         self.create_checkbox("Removing a task", "", self.ask_for_delete, frame_ask_for)
 
+        frame_filter = tk.LabelFrame(third_column_frame, text="Filter tasks: ")
+        frame_filter.pack(fill='x', pady=(10, 0))
+        self.create_checkbox("Filter as you type",
+                             "Apply the filter after a short pause in typing, without pressing Enter.",
+                             self.live_filter, frame_filter)
+        tk.Label(frame_filter, text="Delay after typing [ms]:").pack(anchor=tk.W, padx=10)
+        delay_spinbox = tk.Spinbox(frame_filter, from_=0, to=5000, increment=50, textvariable=self.live_filter_delay, wrap=True)
+        delay_spinbox.pack(anchor=tk.W, padx=10, pady=(0, 10), fill='x')
+
+        frame_save = tk.LabelFrame(third_column_frame, text="Save file: ")
+        frame_save.pack(fill='x', pady=(10, 0))
+        self.create_checkbox("In background",
+                             "Write the file in a background thread, so a slow disk doesn't freeze the board.\n"
+                             "Saves done while the file is written are merged into a single write.",
+                             self.background_save, frame_save)
+        self.create_checkbox("Journal of changes",
+                             "Append changed lines to a journal next to the file, instead of writing the whole file.\n"
+                             "The file is written with all the changes from time to time and when the window is closed.",
+                             self.journal_mode, frame_save)
+        tk.Label(frame_save, text="Archive done tasks after [days]:").pack(anchor=tk.W, padx=10)
+        archive_age_spinbox = tk.Spinbox(frame_save, from_=0, to=3650, textvariable=self.archive_age, wrap=True)
+        Hovertip(archive_age_spinbox, "Move tasks completed earlier than this number of days ago to the done.txt file,\n"
+                                      "when the file is saved. 0 - don't archive tasks.")
+        archive_age_spinbox.pack(anchor=tk.W, padx=10, pady=(0, 10), fill='x')
+
     def exit(self):
         string_col_names = [x.get() for x in self.col_names]
         are_col_names_unique = len(string_col_names) == len(set(string_col_names))
         if not are_col_names_unique:
             tk.messagebox.showwarning(title="Error in column names", message=f"You can't set the same name for multiple columns.")
             return
+        if not self.is_non_negative_integer(self.live_filter_delay.get()):
+            tk.messagebox.showwarning(title="Error in filter delay",
+                                      message="The delay after typing has to be a number of milliseconds, 0 or more.")
+            return
+        if not self.is_non_negative_integer(self.archive_age.get()):
+            tk.messagebox.showwarning(title="Error in archive age",
+                                      message="The age of archived done tasks has to be a number of days, 0 or more.")
+            return
+        for spec in self.column_sort_specs:
+            if len(spec.get().strip()) > 0:
+                try:
+                    KanbanTxtModel.SortSpec(spec.get())
+                except ValueError as error:
+                    tk.messagebox.showwarning(title="Error in sort fields", message=str(error))
+                    return
         self.destroy()
 
+    @staticmethod
+    def is_non_negative_integer(text):
+        try:
+            return int(text) >= 0
+        except ValueError:
+            return False
+
+    def cancel(self, event=None):
+        # closing the window applies the settings too, so they're checked the same way
+        self.exit()
+
     def buttonbox(self):
         ok_button = tk.Button(self, text='OK', width=5, command=self.exit)
         ok_button.pack(side='right', padx=15, pady=(0, 10))
@@ -265,11 +334,30 @@ class CustomizeViewDialog(simpledialog.Dialog):
 
 
 class BrowseTagsDialog(simpledialog.Dialog):
-    def __init__(self, parent, name, tags, out_selected_tag):
+    TAG_ORDER_TEXTS = {
+        KanbanTxtModel.TAG_ORDER_NAME: 'Name',
+        KanbanTxtModel.TAG_ORDER_FREQUENCY: 'Frequency',
+        KanbanTxtModel.TAG_ORDER_RECENCY: 'Recency',
+    }
+
+    # number of tags added to the list at once, the next ones are added when it's scrolled to the end
+    PAGE_SIZE = 200
+
+    def __init__(self, parent, name, tag_usage, tag_search, out_selected_tag, out_tags_order):
         self.name = name
-        self.tags = tags
+        self.tag_usage = tag_usage
+        self.tag_counts = {tag: count for tag, count, last_added in tag_usage}
+        self.tag_search = tag_search
+        self.tags_order = out_tags_order
         self.selected_value = out_selected_tag
         self.last_entry_value = ""
+        self.values = []
+        self.tag_positions = {}
+        self.matching_values = []
+        # pattern of the search, which fuzzy matches weren't added to the matching values yet
+        self.fuzzy_pattern = None
+        self.shown_values = []
+        self.more_values_scheduled = False
         self.is_choice_confirmed = False
         super().__init__(parent, f"Pick a {name} tag to insert")
 
@@ -287,19 +375,25 @@ class BrowseTagsDialog(simpledialog.Dialog):
         self.entry_widget.bind('<Up>', self.on_key_up)
         self.entry_widget.bind('<Down>', self.on_key_down)
 
-        self.values = []
-        for tag in self.tags:
-            self.values.append(tag)
+        frame_order = tk.Frame(frame_tags)
+        frame_order.grid(row=1, column=0, padx=10, sticky=tk.W)
+        tk.Label(frame_order, text="Sort by: ").pack(side=tk.LEFT)
+        for order in KanbanTxtModel.TAG_ORDERS:
+            tk.Radiobutton(frame_order, text=self.TAG_ORDER_TEXTS[order], variable=self.tags_order, value=order,
+                           command=self.on_order_changed).pack(side=tk.LEFT)
+
+        self.sort_values()
         self.listbox_widget = tk.Listbox(frame_tags)
-        self.listbox_widget.grid(row=1, column=0, padx=10, pady=10, sticky=tk.NSEW)
+        self.listbox_widget.grid(row=2, column=0, padx=10, pady=10, sticky=tk.NSEW)
         self.listbox_widget.bind('<<ListboxSelect>>', self.on_selected)
         self.parent.after(100, self.set_focus_on_entry_widget)
 
         self.scrollbar = tk.Scrollbar(frame_tags)
-        self.scrollbar.grid(row=1, column=1, sticky=tk.NS)
-        self.listbox_widget.config(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.grid(row=2, column=1, sticky=tk.NS)
+        self.listbox_widget.config(yscrollcommand=self.on_listbox_scrolled)
         self.scrollbar.config(command=self.listbox_widget.yview)
-        self.update_data(self.values)
+        self.find_matching_values(self.last_entry_value)
+        self.update_data(self.get_values_to_show(self.PAGE_SIZE))
 
     def on_key_up(self, event):
         curselection = self.listbox_widget.curselection()
@@ -325,6 +419,9 @@ class BrowseTagsDialog(simpledialog.Dialog):
             selected_index = int(self.listbox_widget.curselection()[0])
         index = selected_index + 1
         size = self.listbox_widget.size()
+        if index >= size and self.has_more_values():
+            self.show_more_values()
+            size = self.listbox_widget.size()
         if size > 0:
             if index >= size:
                 index = 0
@@ -346,33 +443,84 @@ class BrowseTagsDialog(simpledialog.Dialog):
             self.listbox_widget.activate(index)
             self.scrollbar.update_idletasks()
 
+    def sort_values(self):
+        tag_usage = KanbanTxtModel.sort_tag_usage(self.tag_usage, self.tags_order.get())
+        self.values = [tag for tag, count, last_added in tag_usage]
+        self.tag_positions = {tag: position for position, tag in enumerate(self.values)}
+
+    def on_order_changed(self):
+        self.sort_values()
+        self.show_matching_values(self.last_entry_value)
+        self.entry_widget.focus_set()
+
     def on_selected(self, event):
         w = event.widget
-        index = int(w.curselection()[0])
-        value = w.get(index)
-        self.selected_value.set(value)
+        curselection = w.curselection()
+        if len(curselection) == 0:
+            return
+        index = int(curselection[0])
+        self.selected_value.set(self.shown_values[index])
 
     def on_key_pressed(self, event):
         value = event.widget.get()
         if value == self.last_entry_value:
             return
         self.last_entry_value = value
+        self.show_matching_values(value)
+
+    def on_listbox_scrolled(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) > 0.9 and not self.more_values_scheduled and self.has_more_values():
+            self.more_values_scheduled = True
+            self.after_idle(self.show_more_values)
+
+    def find_matching_values(self, value):
         if value == '':
-            data = self.values
+            self.matching_values = self.values
+            self.fuzzy_pattern = None
         else:
-            data = []
-            for item in self.values:
-                if value.lower() in item.lower():
-                    data.append(item)
-        self.update_data(data)
+            self.matching_values = self.tag_search.search(value, self.tag_positions)
+            self.fuzzy_pattern = value
+
+    def has_more_values(self):
+        return len(self.shown_values) < len(self.matching_values) or self.fuzzy_pattern is not None
+
+    def get_values_to_show(self, count):
+        # fuzzy matches are ranked after the other ones, so they're searched for only when they're shown
+        if len(self.matching_values) < count and self.fuzzy_pattern is not None:
+            self.matching_values = self.matching_values + self.tag_search.search_fuzzy(self.fuzzy_pattern,
+                                                                                       self.tag_positions)
+            self.fuzzy_pattern = None
+        return self.matching_values[:count]
+
+    def get_label(self, tag):
+        return f"{tag}  ({self.tag_counts[tag]})"
+
+    def show_matching_values(self, value):
+        self.find_matching_values(value)
+        self.update_data(self.get_values_to_show(self.PAGE_SIZE))
         self.set_on_zero()
         self.scrollbar.update_idletasks()
 
+    def show_more_values(self):
+        self.more_values_scheduled = False
+        shown_count = len(self.shown_values)
+        data = self.get_values_to_show(shown_count + self.PAGE_SIZE)
+        if len(data) > shown_count:
+            self.listbox_widget.insert('end', *(self.get_label(tag) for tag in data[shown_count:]))
+            self.shown_values = data
+
     def update_data(self, data):
+        """Show the tags in the listbox, inserting and deleting only rows which changed"""
         self.selected_value.set("")
-        self.listbox_widget.delete(0, 'end')
-        for item in data:
-            self.listbox_widget.insert('end', item)
+        matcher = difflib.SequenceMatcher(None, self.shown_values, data, autojunk=False)
+        # rows are changed from the end, so indexes of the previous changes stay valid
+        for operation, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+            if operation in ('replace', 'delete'):
+                self.listbox_widget.delete(i1, i2 - 1)
+            if operation in ('replace', 'insert'):
+                self.listbox_widget.insert(i1, *(self.get_label(tag) for tag in data[j1:j2]))
+        self.shown_values = data
         self.on_key_down(None)
 
     def destroy(self):
@@ -396,6 +544,524 @@ class BrowseTagsDialog(simpledialog.Dialog):
         self.bind("<Return>", lambda event: self.exit())
 
 
+class ArchiveDialog(simpledialog.Dialog):
+    """Read-only view of the archive of done tasks, read in chunks after the dialog is shown"""
+
+    def __init__(self, parent, path):
+        self.path = path
+        self.chunks = None
+        self.after_id = None
+        self.task_count = 0
+        super().__init__(parent, f"Archive of done tasks - {pathlib.Path(path).name}")
+
+    def body(self, frame):
+        self.status_label = tk.Label(frame, text="Loading...")
+        self.status_label.grid(row=0, column=0, padx=10, pady=(10, 0), sticky=tk.W)
+        self.text_widget = tk.Text(frame, width=100, height=30, wrap='none', state='disabled')
+        self.text_widget.grid(row=1, column=0, padx=(10, 0), pady=10, sticky=tk.NSEW)
+        scrollbar = tk.Scrollbar(frame, command=self.text_widget.yview)
+        scrollbar.grid(row=1, column=1, padx=(0, 10), pady=10, sticky=tk.NS)
+        self.text_widget.config(yscrollcommand=scrollbar.set)
+        if os.path.isfile(self.path):
+            self.chunks = KanbanTxtStorage.read_chunks(self.path)
+            self.after_id = self.after(1, self.load_next_chunk)
+        else:
+            self.status_label.config(text="There are no archived tasks yet.")
+        return self.text_widget
+
+    def load_next_chunk(self):
+        self.after_id = None
+        try:
+            chunk = next(self.chunks, None)
+        except (UnicodeDecodeError, OSError) as error:
+            self.chunks.close()
+            self.chunks = None
+            self.status_label.config(text=f"Loading stopped, {self.task_count} archived tasks")
+            tk.messagebox.showwarning(title="Error loading archive",
+                                      message=f"Can't read the file '{self.path}': {error}", parent=self)
+            return
+        if chunk is None:
+            self.status_label.config(text=f"{self.task_count} archived tasks")
+            return
+        text, bytes_read = chunk
+        self.task_count += sum(1 for line in text.split('\n') if len(line.strip()) > 0)
+        self.text_widget.config(state='normal')
+        self.text_widget.insert('end-1c', text)
+        self.text_widget.config(state='disabled')
+        self.status_label.config(text=f"Loading... {self.task_count} archived tasks")
+        self.after_id = self.after(1, self.load_next_chunk)
+
+    def destroy(self):
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+        if self.chunks is not None:
+            self.chunks.close()
+        super().destroy()
+
+    def buttonbox(self):
+        close_button = tk.Button(self, text='Close', width=5, command=self.destroy)
+        close_button.pack(side='right', padx=15, pady=(0, 10))
+        self.bind("<Escape>", lambda event: self.destroy())
+
+
+class CardFonts:
+    """Named fonts of task cards, by their roles, shared by all cards.
+
+    Sizes of the fonts follow the card font size. When it changes, the named fonts are reconfigured,
+    so Tk updates every widget and canvas item using them, without drawing the cards again."""
+    # role: family, difference from the card font size, weight and overstrike
+    ROLES = {
+        'subject': ('arial', 0, tkFont.NORMAL, 0),
+        'done-subject': ('arial', 0, tkFont.NORMAL, 1),
+        'small': ('arial', -2, tkFont.NORMAL, 0),
+        'priority': ('arial', 8, tkFont.BOLD, 0),
+    }
+
+    def __init__(self, size):
+        self.size = size
+        self.fonts = {}
+        for role, (family, size_difference, weight, overstrike) in self.ROLES.items():
+            self.fonts[role] = tkFont.Font(name=f"card-{role}", family=family, size=size + size_difference,
+                                           weight=weight, overstrike=overstrike)
+
+    def get(self, role):
+        return self.fonts[role]
+
+    def set_size(self, size):
+        """Resize all fonts for the new card font size, return True if it has changed"""
+        if size == self.size:
+            return False
+        self.size = size
+        for role, font in self.fonts.items():
+            font.configure(size=size + self.ROLES[role][1])
+        return True
+
+
+class TaskCard:
+    """Widgets of a single task card. The card can be reconfigured to display another task,
+    so the widgets don't have to be destroyed and created again."""
+    def __init__(self, viewer, parent, number):
+        self.viewer = viewer
+        # displayed task, None if the card has to be drawn again
+        self.task = None
+        # line of the text editor, which defines the displayed task
+        self.line = None
+        # line index displayed on the card, it differs from the line in the filter view
+        self.index = None
+
+        def bind_highlight_and_drag_n_drop(widget):
+            widget.bind('<Button-1>', viewer.on_click)
+            widget.bind('<B1-Motion>', viewer.on_drag_init)
+            widget.bind('<ButtonRelease>', viewer.on_drop)
+
+        def get_widget_name():
+            ret_name = f"{get_widget_name.counter}card{number}"
+            get_widget_name.counter += 1
+            return ret_name
+        get_widget_name.counter = 0
+
+        self.highlight_frame = tk.Frame(parent, bd=2, bg=viewer.COLORS['column1-column'], height=200, name=f"highlightFrame{number}")
+        self.highlight_frame.task_card = self
+        self.card_frame = tk.Frame(self.highlight_frame, bd=0, height=200, cursor='hand2', name=get_widget_name())
+        self.priority_border = tk.Frame(self.card_frame, width="3", name=get_widget_name())
+        self.priority_label = tk.Label(self.card_frame, anchor=tk.W, name=get_widget_name())
+        self.subject_label = tk.Label(self.card_frame, anchor=tk.W, wraplength=200, justify='left', name=get_widget_name())
+        # Adapt elide length when width change
+        self.subject_label.bind("<Configure>", viewer.on_card_width_changed)
+        self.duration_label = tk.Label(self.card_frame, anchor=tk.W, justify='left', wraplength=85, name=get_widget_name())
+        self.project_label = tk.Label(self.card_frame, anchor=tk.E, wraplength=200, justify='left', name=get_widget_name())
+        self.context_label = tk.Label(self.card_frame, anchor=tk.E, wraplength=200, justify='left', name=get_widget_name())
+        self.special_kv_data_label = tk.Label(self.card_frame, anchor=tk.E, wraplength=200, justify='left', name=get_widget_name())
+        self.index_var = tk.StringVar(self.card_frame)
+        self.index_entry = tk.Entry(self.card_frame, textvariable=self.index_var, borderwidth=0, state="readonly", name=get_widget_name())
+
+        self.card_elements = [
+            self.priority_border,
+            self.priority_label,
+            self.subject_label,
+            self.duration_label,
+            self.project_label,
+            self.context_label,
+            self.special_kv_data_label,
+            self.index_entry,
+        ]
+        for widget in [self.card_frame] + self.card_elements[:-1]:
+            bind_highlight_and_drag_n_drop(widget)
+
+        self.card_frame.pack(padx=1, pady=(0, 10), side="top", fill='x', expand=1, anchor=tk.NW)
+
+    def show_task(
+        self,
+        subject,
+        bg,
+        font='subject',
+        project=None,
+        context=None,
+        start_date=None,
+        end_date=None,
+        special_kv_data=None,
+        priority=None,
+        index=None
+    ):
+        viewer = self.viewer
+        colors = viewer.COLORS
+        small_font = viewer.card_fonts.get('small')
+
+        for widget in self.card_elements:
+            widget.pack_forget()
+
+        self.highlight_frame.configure(bg=colors['column1-column'])
+        self.card_frame.configure(bg=bg)
+
+        subject_padx = 10
+
+        # If needed, add a color border for priority marking
+        if priority is not None and viewer.show_priority:
+            prio_color = viewer.get_priority_color(priority)
+            self.priority_border.configure(bg=prio_color)
+            self.priority_border.pack(side="left", fill='y')
+            self.priority_label.configure(
+                text=priority,
+                fg=prio_color,
+                bg=bg,
+                font=viewer.card_fonts.get('priority'),
+            )
+            self.priority_label.pack(side="left", anchor=tk.NW, padx=0, pady=(5,0))
+            subject_padx = 0
+
+        if viewer.show_content:
+            self.subject_label.configure(text=subject, fg=colors['main-text'], bg=bg, font=viewer.card_fonts.get(font))
+            self.subject_label.pack(padx=subject_padx, pady=5, fill='x', side="top", anchor=tk.W)
+
+        # If needed, show the task duration
+        if start_date and viewer.show_date:
+            if not end_date:
+                end_date = viewer.current_date
+
+            duration = end_date.toordinal() - start_date.toordinal()
+            duration_string = "%d days" % (duration)
+            self.duration_label.configure(text=duration_string, fg=colors['column3'], bg=bg, font=small_font)
+            if (project or context) and (len(project) > 0 or len(context) > 0):
+                self.duration_label.pack(side="top", anchor=tk.NW, padx=10, pady=0)
+            else:
+                self.duration_label.pack(side="top", anchor=tk.NW, padx=10, pady=(0,2))
+
+        # Add project and context tags if needed
+        if project and len(project) > 0 and viewer.show_project:
+            self.project_label.configure(text=", ".join(project), fg=colors["project"], bg=bg, font=small_font)
+            self.project_label.pack(padx=10, pady=2, fill='x', side="top", anchor=tk.E)
+
+        if context and len(context) > 0 and viewer.show_context:
+            self.context_label.configure(text=", ".join(context), fg=colors['context'], bg=bg, font=small_font)
+            self.context_label.pack(padx=10, pady=2, fill='x', side="top", anchor=tk.E)
+
+        if special_kv_data is not None and len(special_kv_data) > 0 and viewer.show_special_kv_data:
+            special_kv_data_string = ", ".join([f"{key}:{val}" for key, val in special_kv_data])
+            self.special_kv_data_label.configure(text=special_kv_data_string, fg=colors['kv-data'], bg=bg, font=small_font)
+            self.special_kv_data_label.pack(padx=10, pady=2, fill='x', side="top", anchor=tk.E)
+
+        self.index = index
+        if index is not None and viewer.show_index:
+            self.index_var.set(f"#{index}")
+            self.index_entry.configure(fg=colors['kv-data'], bg=bg, readonlybackground=bg, font=small_font)
+            self.index_entry.pack(padx=0, pady=2, side="top", anchor=tk.W)
+
+    def show_index(self, index):
+        """Update only the displayed line index, when lines were inserted or removed above the task"""
+        self.index = index
+        if self.viewer.show_index:
+            self.index_var.set(f"#{index}")
+
+
+class TaskCardPool:
+    """Task cards, which aren't displayed, kept to be reused instead of creating new widgets"""
+    # number of Tk objects (widgets and variables) which make a single task card
+    TK_OBJECTS_PER_CARD = 11
+
+    def __init__(self, viewer, parent):
+        self.viewer = viewer
+        self.parent = parent
+        self.free_cards = []
+        self.created_cards = 0
+        self.reused_cards = 0
+        self.released_cards = 0
+
+    def acquire(self):
+        if len(self.free_cards) > 0:
+            self.reused_cards += 1
+            return self.free_cards.pop()
+        card = TaskCard(self.viewer, self.parent, self.created_cards)
+        self.created_cards += 1
+        return card
+
+    def release(self, card):
+        card.highlight_frame.pack_forget()
+        card.task = None
+        card.line = None
+        card.index = None
+        self.released_cards += 1
+        self.free_cards.append(card)
+
+    def get_stats(self):
+        return {
+            'created_cards': self.created_cards,
+            'reused_cards': self.reused_cards,
+            'released_cards': self.released_cards,
+            'free_cards': len(self.free_cards),
+            'created_tk_objects': self.created_cards * self.TK_OBJECTS_PER_CARD,
+        }
+
+
+class EditorChangesRedirector(WidgetRedirector):
+    """Redirects insert and delete commands of the editor, including the ones of its Tcl bindings, so the
+    changed lines are known without comparing the content. Errors of the other commands are raised,
+    as without the redirection."""
+
+    def dispatch(self, operation, *args):
+        function = self._operations.get(operation)
+        if function is not None:
+            return function(*args)
+        return self.tk.call((self.orig, operation) + args)
+
+
+class ProgressiveLoad:
+    """State of a todo.txt file being loaded in chunks, see KanbanTxtViewer.load_next_chunk"""
+
+    def __init__(self, path):
+        self.path = path
+        # taken before the file is read, the file may be changed by another program while it's loaded
+        self.stat = os.stat(path)
+        self.size = self.stat.st_size
+        self.chunks = KanbanTxtStorage.read_chunks(path)
+        self.parts = []
+        self.begin = time.perf_counter()
+        self.first_cards_time = None
+        self.after_id = None
+
+
+class CanvasCard:
+    """Task card drawn on the canvas of a column, all its items are tagged with the card tag"""
+    __slots__ = ('tag', 'index', 'y', 'height', 'highlight_item', 'index_item')
+
+    def __init__(self, tag, index, y):
+        self.tag = tag
+        self.index = index
+        self.y = y
+        self.height = 0
+        self.highlight_item = None
+        self.index_item = None
+
+
+class CanvasCardColumn:
+    """Task cards of a kanban column, drawn as items of a single canvas instead of widgets.
+
+    The canvas is as high as all cards, so the column is scrolled along with the whole kanban.
+    Tasks under the mouse cursor are found by the tags of canvas items."""
+    # width of the border of the highlighted card
+    BORDER = 2
+    # vertical space between the cards
+    CARD_SPACING = 1
+
+    def __init__(self, viewer, parent, bg):
+        self.viewer = viewer
+        self.bg = bg
+        self.canvas = tk.Canvas(parent, bg=bg, bd=0, highlightthickness=0, relief=tk.FLAT, width=1, height=0, cursor='hand2')
+        self.canvas.card_column = self
+        self.canvas.bind('<Button-1>', viewer.on_click)
+        self.canvas.bind('<B1-Motion>', viewer.on_drag_init)
+        self.canvas.bind('<ButtonRelease>', viewer.on_drop)
+        self.canvas.bind('<Configure>', self.on_width_changed)
+        self.width = 0
+        self.tasks = []
+        # cards by their tasks, and tasks by the tags of cards
+        self.cards = {}
+        self.card_tasks = {}
+        self.card_number = 0
+        self.selected_task = None
+
+    def clear(self):
+        self.canvas.delete('card')
+        self.cards.clear()
+        self.card_tasks.clear()
+        self.selected_task = None
+
+    def on_width_changed(self, event):
+        if event.width != self.width:
+            self.width = event.width
+            # text is wrapped to the width of the card, so all cards have to be drawn again
+            self.redraw()
+
+    def redraw(self):
+        """Draw all cards again, e.g. when the size of their text has changed"""
+        selected_task = self.selected_task
+        self.clear()
+        self.selected_task = selected_task
+        self.show_tasks(self.tasks)
+
+    def show_tasks(self, tasks):
+        """Display cards of the tasks in the given order, draw only new or changed ones"""
+        self.tasks = tasks
+        if self.width <= 1:
+            # the canvas isn't placed yet, cards are drawn when its width is known
+            return
+
+        shown_tasks = set(tasks)
+        for task in [task for task in self.cards if task not in shown_tasks]:
+            self.remove_card(task)
+
+        y = 0
+        for task in tasks:
+            index = self.viewer.get_displayed_index(task)
+            card = self.cards.get(task)
+            if card is None:
+                card = self.draw_card(task, index, y)
+            else:
+                if card.y != y:
+                    self.canvas.move(card.tag, 0, y - card.y)
+                    card.y = y
+                if card.index != index:
+                    card.index = index
+                    if card.index_item is not None:
+                        self.canvas.itemconfigure(card.index_item, text=f"#{index}")
+            y += card.height + self.CARD_SPACING
+        self.canvas.configure(height=y)
+
+    def remove_card(self, task):
+        card = self.cards.pop(task)
+        del self.card_tasks[card.tag]
+        self.canvas.delete(card.tag)
+        if self.selected_task is task:
+            self.selected_task = None
+
+    def get_text_bottom(self, item, default):
+        bbox = self.canvas.bbox(item)
+        if bbox is None:
+            return default
+        return bbox[3]
+
+    def draw_card(self, task, index, y):
+        """Draw the card of the task at the given height, the same way as TaskCard displays it"""
+        viewer = self.viewer
+        colors = viewer.COLORS
+        canvas = self.canvas
+        tag = f"card{self.card_number}"
+        self.card_number += 1
+        tags = ('card', tag)
+        card = CanvasCard(tag, index, y)
+
+        card_bg = colors['card-background']
+        font = viewer.card_fonts.get('subject')
+        if task.column == KanbanTxtModel.COLUMN_DONE:
+            card_bg = colors['done-card-background']
+            font = viewer.card_fonts.get('done-subject')
+        small_font = viewer.card_fonts.get('small')
+
+        left = self.BORDER + 1
+        right = self.width - self.BORDER - 1
+        top = y + self.BORDER
+        text_left = left
+        card.highlight_item = canvas.create_rectangle(0, y, self.width, y, fill=self.bg, width=0, tags=tags)
+        background = canvas.create_rectangle(left, top, right, top, fill=card_bg, width=0, tags=tags)
+
+        # If needed, add a color bar for priority marking
+        priority_bar = None
+        subject_padx = 10
+        bottom = top
+        if task.priority is not None and viewer.show_priority:
+            prio_color = viewer.get_priority_color(task.priority)
+            priority_bar = canvas.create_rectangle(left, top, left + 3, top, fill=prio_color, width=0, tags=tags)
+            priority_text = canvas.create_text(
+                left + 3, top + 5, text=task.priority, fill=prio_color, anchor=tk.NW, tags=tags,
+                font=viewer.card_fonts.get('priority'))
+            bottom = self.get_text_bottom(priority_text, top)
+            text_left = canvas.bbox(priority_text)[2]
+            subject_padx = 0
+        text_width = max(right - text_left - 20, 1)
+
+        cursor_y = top
+        if viewer.show_content:
+            subject = canvas.create_text(
+                text_left + subject_padx, cursor_y + 5, text=task.subject, fill=colors['main-text'],
+                font=font, width=text_width, anchor=tk.NW, tags=tags)
+            cursor_y = self.get_text_bottom(subject, cursor_y + 5) + 5
+
+        # If needed, show the task duration
+        if task.start_date and viewer.show_date:
+            end_date = task.end_date
+            if not end_date:
+                end_date = viewer.current_date
+            duration = end_date.toordinal() - task.start_date.toordinal()
+            duration_text = canvas.create_text(
+                text_left + 10, cursor_y, text="%d days" % (duration), fill=colors['column3'],
+                font=small_font, anchor=tk.NW, tags=tags)
+            cursor_y = self.get_text_bottom(duration_text, cursor_y)
+            if len(task.projects) == 0 and len(task.contexts) == 0:
+                cursor_y += 2
+
+        # Add project, context and special k-v data tags if needed
+        tag_texts = []
+        if len(task.projects) > 0 and viewer.show_project:
+            tag_texts.append((", ".join(task.projects), colors['project']))
+        if len(task.contexts) > 0 and viewer.show_context:
+            tag_texts.append((", ".join(task.contexts), colors['context']))
+        if len(task.special_kv_data) > 0 and viewer.show_special_kv_data:
+            tag_texts.append((", ".join([f"{key}:{val}" for key, val in task.special_kv_data]), colors['kv-data']))
+        for text, color in tag_texts:
+            tag_text = canvas.create_text(
+                right - 10, cursor_y + 2, text=text, fill=color, font=small_font, width=text_width,
+                anchor=tk.NE, justify=tk.LEFT, tags=tags)
+            cursor_y = self.get_text_bottom(tag_text, cursor_y + 2) + 2
+
+        if viewer.show_index:
+            card.index_item = canvas.create_text(
+                text_left, cursor_y + 2, text=f"#{index}", fill=colors['kv-data'], font=small_font,
+                anchor=tk.NW, tags=tags)
+            cursor_y = self.get_text_bottom(card.index_item, cursor_y + 2) + 2
+
+        # card frame has padding below its content
+        bottom = max(bottom, cursor_y) + 10
+        canvas.coords(background, left, top, right, bottom)
+        if priority_bar is not None:
+            canvas.coords(priority_bar, left, top, left + 3, bottom)
+        card.height = bottom + self.BORDER - y
+        canvas.coords(card.highlight_item, 0, y, self.width, y + card.height)
+        if self.selected_task is task:
+            canvas.itemconfigure(card.highlight_item, fill=colors['project'])
+
+        self.cards[task] = card
+        self.card_tasks[tag] = task
+        return card
+
+    def get_task_at(self, x, y):
+        """Return the task of the card at the given position of the canvas, None if there is no card"""
+        for item in reversed(self.canvas.find_overlapping(x, y, x, y)):
+            for tag in self.canvas.gettags(item):
+                task = self.card_tasks.get(tag)
+                if task is not None:
+                    return task
+        return None
+
+    def highlight(self, task):
+        """Highlight the card of the task, or remove the highlight if the task isn't in this column"""
+        if self.selected_task is task:
+            return
+        previous_card = self.cards.get(self.selected_task)
+        if previous_card is not None:
+            self.canvas.itemconfigure(previous_card.highlight_item, fill=self.bg)
+        self.selected_task = None
+        card = self.cards.get(task)
+        if card is not None:
+            self.canvas.itemconfigure(card.highlight_item, fill=self.viewer.COLORS['project'])
+            self.selected_task = task
+
+    def get_selected_card_rooty(self):
+        card = self.cards.get(self.selected_task)
+        if card is None:
+            return self.canvas.winfo_rooty()
+        return self.canvas.winfo_rooty() + card.y
+
+
 class KanbanTxtViewer:
     THEMES = {
         'LIGHT_COLORS': {
@@ -459,11 +1125,36 @@ class KanbanTxtViewer:
 
     FONTS = []
 
-    KANBAN_KEY = "knbn"
+    # height in pixels of the region above and below the visible part of the kanban,
+    # in which task cards are drawn when the columns are virtualized
+    VIRTUAL_COLUMN_OVERSCAN = 400
+
+    # delay in ms of drawing cards after scrolling virtualized columns, to draw them once for many scroll events
+    VIRTUAL_COLUMN_UPDATE_DELAY = 15
+
+    # task cards made of widgets, see TaskCard
+    CARD_RENDERER_WIDGETS = 'widgets'
+    # task cards drawn as items of a canvas in each column, see CanvasCardColumn
+    CARD_RENDERER_CANVAS = 'canvas'
+
+    # period of checking results of the background saves [ms]
+    SAVE_RESULTS_POLL_INTERVAL = 50
+    # the journal is compacted after this time without changes [ms]
+    JOURNAL_COMPACT_DELAY = 30000
+    # files bigger than this are loaded in chunks, showing the first cards before the whole file is read [bytes]
+    PROGRESSIVE_LOAD_SIZE = 1024 * 1024
+    # delay between loading chunks, for handling the user input [ms]
+    PROGRESSIVE_LOAD_DELAY = 1
+    # interval of checking, if the file was changed by another program [ms]
+    FILE_WATCH_INTERVAL = 1000
+    # interval of refreshing timings shown in the profiling mode [ms]
+    PROFILE_OVERLAY_INTERVAL = 500
 
-    KANBAN_VAL_IN_PROGRESS = "in_progress"
+    KANBAN_KEY = KanbanTxtModel.KANBAN_KEY
 
-    KANBAN_VAL_VALIDATION = "validation"
+    KANBAN_VAL_IN_PROGRESS = KanbanTxtModel.KANBAN_VAL_IN_PROGRESS
+
+    KANBAN_VAL_VALIDATION = KanbanTxtModel.KANBAN_VAL_VALIDATION
 
     CONFIG_PATH = 'config.json'
     CONFIG_KEY_FONT_SIZE = 'card_font_size'
@@ -484,6 +1175,15 @@ class KanbanTxtViewer:
     CONFIG_KEY_HIDE_BUTTON_ADD_DATE = 'hide_button_add_date'
     CONFIG_KEY_HIDE_BUTTON_DELETE = 'hide_button_delete'
     CONFIG_KEY_DARKMODE = 'darkmode'
+    CONFIG_KEY_VIRTUALIZED_COLUMNS = 'virtualized_columns'
+    CONFIG_KEY_CARD_RENDERER = 'card_renderer'
+    CONFIG_KEY_LIVE_FILTER = 'live_filter'
+    CONFIG_KEY_LIVE_FILTER_DELAY = 'live_filter_delay'
+    CONFIG_KEY_TAGS_ORDER = 'tags_order'
+    CONFIG_KEY_BACKGROUND_SAVE = 'background_save'
+    CONFIG_KEY_JOURNAL_MODE = 'journal'
+    CONFIG_KEY_ARCHIVE_AGE = 'archive_age'
+    CONFIG_KEY_COLUMN_SORT_SPECS = 'column_sort_specs'
     CONFIG_KEY_COL_0_NAME = 'column_0'
     CONFIG_KEY_COL_1_NAME = 'column_1'
     CONFIG_KEY_COL_2_NAME = 'column_2'
@@ -508,13 +1208,23 @@ class KanbanTxtViewer:
         CONFIG_KEY_HIDE_BUTTONS_MOVE_TO_COLUMN: False,
         CONFIG_KEY_HIDE_BUTTONS_MOVE_LINE_UP_DOWN: False,
         CONFIG_KEY_HIDE_MEMO: False,
+        CONFIG_KEY_VIRTUALIZED_COLUMNS: False,
+        CONFIG_KEY_CARD_RENDERER: 'widgets',
+        CONFIG_KEY_LIVE_FILTER: False,
+        CONFIG_KEY_LIVE_FILTER_DELAY: 300,
+        CONFIG_KEY_TAGS_ORDER: KanbanTxtModel.TAG_ORDER_FREQUENCY,
+        CONFIG_KEY_BACKGROUND_SAVE: False,
+        CONFIG_KEY_JOURNAL_MODE: False,
+        CONFIG_KEY_ARCHIVE_AGE: 0,
+        # SortSpec of each column, empty for columns sorted by the sort method
+        CONFIG_KEY_COLUMN_SORT_SPECS: ["", "", "", ""],
         CONFIG_KEY_COL_0_NAME: "To Do",
         CONFIG_KEY_COL_1_NAME: "In progress",
         CONFIG_KEY_COL_2_NAME: "Validation",
         CONFIG_KEY_COL_3_NAME: "Done",
     }
 
-    def __init__(self, file='', darkmode=None) -> None:
+    def __init__(self, file='', darkmode=None, profile=False) -> None:
         self.config = None
         if os.path.exists(self.CONFIG_PATH):
             with open(self.CONFIG_PATH, "r") as config_file:
@@ -554,15 +1264,34 @@ class KanbanTxtViewer:
 
         self.sort_method_idx = self.get_value_from_config_or_default(self.CONFIG_KEY_SORT_METHOD)
 
+        self.virtualized_columns = self.get_value_from_config_or_default(self.CONFIG_KEY_VIRTUALIZED_COLUMNS)
+        self.card_renderer = self.get_value_from_config_or_default(self.CONFIG_KEY_CARD_RENDERER)
+        self.live_filter = self.get_value_from_config_or_default(self.CONFIG_KEY_LIVE_FILTER)
+        self.live_filter_delay = self.get_value_from_config_or_default(self.CONFIG_KEY_LIVE_FILTER_DELAY)
+        self.tags_order = self.get_value_from_config_or_default(self.CONFIG_KEY_TAGS_ORDER)
+        self.background_save = self.get_value_from_config_or_default(self.CONFIG_KEY_BACKGROUND_SAVE)
+        self.journal_mode = self.get_value_from_config_or_default(self.CONFIG_KEY_JOURNAL_MODE)
+        self.archive_age = self.get_value_from_config_or_default(self.CONFIG_KEY_ARCHIVE_AGE)
+        self.column_sort_specs = list(self.get_value_from_config_or_default(self.CONFIG_KEY_COLUMN_SORT_SPECS))
+
         self.filter_view_message = None
         self.editor_warning_tooltip = None
         self.widgets_for_disable_in_filter_mode = []
         self.non_filtered_content_line_mapping = None
         self.non_filtered_content = None
         self.filter = None
+        self.filter_index = KanbanTxtModel.FilterIndex()
+        # tasks of the whole content, when the filter view shows only some of them
+        self.query_model = KanbanTxtModel.TaskModel()
+        # filter typed in the live filter mode, and the number of its changes, to skip outdated updates
+        self.live_filter_text = ""
+        self.live_filter_generation = 0
+        self._live_filter_after_id = None
 
         self.drag_begin_cursor_pos = (0, 0)
         self.dragged_widgets = []
+        # False after a click outside of any card, e.g. in a gap between canvas cards, so nothing is dragged
+        self.has_drag_source = False
         self.drop_areas = []
         self.drop_areas_frame = None
         self.drop_area_highlight = None
@@ -572,8 +1301,20 @@ class KanbanTxtViewer:
         self.darkmode = darkmode
 
         self.file = file
+        self.todo_file = KanbanTxtStorage.TodoFile()
+        self.save_worker = KanbanTxtStorage.SaveWorker(self.todo_file)
+        self._save_results_after_id = None
+        # SaveReport or JournalReport of the last save
+        self.last_save_report = None
+        self.journal = None
+        self._journal_compaction_after_id = None
+        self.progressive_load = None
+        self.last_load_report = None
 
         self.current_date = date.today()
+        # first and last line changed in the editor since the last update of stripes, and if lines were
+        # inserted or removed, see update_editor_stripes
+        self.editor_changes = None
 
         self.ui_columns = {}
         for col in self.COLUMNS_NAMES:
@@ -583,6 +1324,25 @@ class KanbanTxtViewer:
 
         self.selected_task_card = None
 
+        self.task_model = KanbanTxtModel.TaskModel()
+        self.sorted_columns = KanbanTxtModel.SortedColumns()
+        # task cards drawn on the kanban board, by their tasks
+        self.card_widgets = {}
+        self.card_view_settings = None
+        # sorted tasks of each column, by column names
+        self.column_tasks = {}
+        # heights of task cards measured when they were displayed, used by virtualized columns
+        self.card_heights = {}
+        # positions of cards in each virtualized column, computed from the card heights
+        self.column_card_offsets = {}
+        self._virtual_columns_after_id = None
+
+        # Profiler of phases of the work, only with the --profile switch
+        self.profiler = None
+        if profile:
+            self.profiler = KanbanTxtProfile.Profiler()
+            self.instrument_phases()
+
         self.draw_ui(1000, 700, 0, 0)
 
     def draw_ui(self, window_width, window_height, window_x, window_y):
@@ -598,6 +1358,8 @@ class KanbanTxtViewer:
 
         # Create main window
         self.main_window = tk.Tk()
+        self.main_window.protocol('WM_DELETE_WINDOW', self.on_main_window_close)
+        self.main_window.after(self.FILE_WATCH_INTERVAL, self.watch_file)
         self.main_window.bind('<Button-1>', self.clear_drop_areas_frame)
         self.main_window.bind('<Motion>', self.highlight_drop_area)
         self.main_window.bind('<Control-f>', self.activate_search_input)
@@ -619,6 +1381,7 @@ class KanbanTxtViewer:
         self.FONTS.append(tkFont.Font(name='main', family='arial', size=10, weight=tkFont.NORMAL))
         self.FONTS.append(tkFont.Font(name='h2', family='arial', size=14, weight=tkFont.NORMAL))
         self.FONTS.append(tkFont.Font(name='done-task', family='arial', size='10', overstrike=1))
+        self.card_fonts = CardFonts(self.card_font_size)
 
         # Bind shortkey to open or save a new file
         self.main_window.bind('<Control-s>', self.reload_and_create_file)
@@ -628,16 +1391,51 @@ class KanbanTxtViewer:
 
         self.draw_content_frame()
 
+        if self.profiler is not None:
+            self.draw_profile_overlay()
+
         # Load the file provided in arguments if there is one
         if os.path.isfile(self.file):
             self.load_txt_file()
 
+    def instrument_phases(self):
+        """Measure phases of reloading the board and saving the file, see KanbanTxtProfile"""
+        self.profiler.instrument(self, 'parse_todo_txt', 'reload')
+        self.profiler.instrument(self.task_model, 'update', 'parse')
+        self.profiler.instrument(self, 'sort_columns', 'sort')
+        self.profiler.instrument(self, 'draw_card', 'draw card')
+        self.profiler.instrument(self, 'update_column_layouts', 'columns layout')
+        self.profiler.instrument(self, 'update_editor_line_colors', 'editor colors')
+        # with background saves, the file is written by the SaveWorker, its writes are added by handle_save_results
+        self.profiler.instrument(self, 'save_file', 'save request')
+
+    def draw_profile_overlay(self):
+        self.profile_overlay = tk.Label(
+            self.main_window,
+            text="Profiling...",
+            justify='left',
+            bg=self.COLORS['editor-background'],
+            fg=self.COLORS['main-text'],
+            font=('courier', 8))
+        self.profile_overlay.place(relx=1.0, rely=1.0, x=-5, y=-5, anchor=tk.SE)
+        self.main_window.after(self.PROFILE_OVERLAY_INTERVAL, self.update_profile_overlay)
+
+    def update_profile_overlay(self):
+        """Show the last and the rolling mean time of each phase"""
+        summary = self.profiler.get_summary()
+        if len(summary) > 0:
+            self.profile_overlay.config(text=summary)
+        self.profile_overlay.lift()
+        self.main_window.after(self.PROFILE_OVERLAY_INTERVAL, self.update_profile_overlay)
+
     def activate_search_input(self, event):
-        if self.filter is not None:
+        if self.filter is not None and not self.live_filter:
             self.clear_filter()
         self.filter_entry_box.focus()
 
     def deactivate_search_input(self, event):
+        if self.progressive_load is not None:
+            self.cancel_progressive_load()
         if self.filter is not None:
             self.clear_filter()
         self.text_editor.focus()
@@ -656,7 +1454,7 @@ class KanbanTxtViewer:
 
     def on_drag_init(self, event):
         dragged_widget_name = event.widget.winfo_name()
-        if dragged_widget_name in self.dragged_widgets:
+        if dragged_widget_name in self.dragged_widgets or not self.has_drag_source:
             return
         self.clear_drop_areas_frame()
         self.dragged_widgets.append(dragged_widget_name)
@@ -743,10 +1541,14 @@ class KanbanTxtViewer:
                 })
                 drop_areas_pos_x += drop_area_spacing + drop_area_width
 
-        task_card_frame_widget = self.get_task_card_frame_widget(event.widget)
+        card_column = getattr(event.widget, 'card_column', None)
+        if card_column is not None:
+            task_card_pos_y = card_column.get_selected_card_rooty()
+        else:
+            task_card_pos_y = self.get_task_card_frame_widget(event.widget).winfo_rooty()
         drop_areas_frame_width = (drop_area_width + drop_area_spacing) * (len(self.drop_areas) + 1)
         drop_areas_frame_pos_x = cursor_x_pos - int(drop_areas_frame_width / 2)
-        drop_areas_frame_pos_y = task_card_frame_widget.winfo_rooty() - drop_area_height - drop_area_spacing
+        drop_areas_frame_pos_y = task_card_pos_y - drop_area_height - drop_area_spacing
 
         main_window_geometry = [int(a) for a in re.split('[+x]', self.main_window.geometry())]
         main_window_end_pos_x = main_window_geometry[0] + main_window_geometry[2]
@@ -809,29 +1611,28 @@ class KanbanTxtViewer:
         self.drop_areas.clear()
         self.clear_drop_areas_frame()
 
-    def on_browse_tags(self, tagname):
-        tags = {}
-        for task_data in self.cards_data:
-            temp_list = task_data[tagname]
-            for elem in temp_list:
-                tag = elem[tagname]
-                if tag not in tags:
-                    tags[tag] = 1
-                else:
-                    tags[tag] += 1
+    def on_browse_tags(self, tagname, index_name):
+        tag_usage = self.task_model.index.get_tag_usage(index_name)
+        tag_search = self.task_model.index.get_tag_search(index_name)
         selected_tag = tk.StringVar(value="")
-        BrowseTagsDialog(self.main_window, tagname, tags, selected_tag)
+        tags_order = tk.StringVar(value=self.tags_order)
+        BrowseTagsDialog(self.main_window, tagname, tag_usage, tag_search, selected_tag, tags_order)
+        self.tags_order = tags_order.get()
+        if self.store_in_config(self.CONFIG_KEY_TAGS_ORDER, self.tags_order):
+            self.save_config_file()
         if len(selected_tag.get()) > 0:
             index = self.text_editor.index(tk.INSERT)
             self.text_editor.insert(index, f" {selected_tag.get()} ")
 
     def on_browse_project_tags(self, event=None):
-        self.on_browse_tags("project")
+        self.on_browse_tags("project", "by_project")
 
     def on_browse_context_tags(self, event=None):
-        self.on_browse_tags("context")
+        self.on_browse_tags("context", "by_context")
 
     def on_customize_view_button(self, event=None):
+        if self.progressive_load is not None:
+            return
         show_project_var = tk.IntVar(value=self.show_project)
         show_context_var = tk.IntVar(value=self.show_context)
         show_special_kv_data_var = tk.IntVar(value=self.show_special_kv_data)
@@ -859,6 +1660,15 @@ class KanbanTxtViewer:
         hide_buttons_move_to_column = tk.IntVar(value=not self.hide_buttons_move_to_column)
         hide_buttons_move_line_up_down = tk.IntVar(value=not self.hide_buttons_move_line_up_down)
 
+        virtualized_columns_var = tk.IntVar(value=self.virtualized_columns)
+        card_renderer_var = tk.StringVar(value=self.card_renderer)
+        live_filter_var = tk.IntVar(value=self.live_filter)
+        live_filter_delay_var = tk.StringVar(value=self.live_filter_delay)
+        background_save_var = tk.IntVar(value=self.background_save)
+        journal_mode_var = tk.IntVar(value=self.journal_mode)
+        archive_age_var = tk.StringVar(value=self.archive_age)
+        column_sort_spec_vars = [tk.StringVar(value=spec) for spec in self.column_sort_specs]
+
         CustomizeViewDialog(title="Customize view",
                             parent=self.main_window,
                             out_show_date=show_date_var,
@@ -882,6 +1692,14 @@ class KanbanTxtViewer:
                             out_hide_buttons_assign_priority=hide_buttons_assign_priority,
                             out_hide_buttons_move_to_column=hide_buttons_move_to_column,
                             out_hide_buttons_move_line_up_down=hide_buttons_move_line_up_down,
+                            out_virtualized_columns=virtualized_columns_var,
+                            out_card_renderer=card_renderer_var,
+                            out_live_filter=live_filter_var,
+                            out_live_filter_delay=live_filter_delay_var,
+                            out_background_save=background_save_var,
+                            out_journal_mode=journal_mode_var,
+                            out_archive_age=archive_age_var,
+                            out_column_sort_specs=column_sort_spec_vars,
                             )
 
         self.show_date = show_date_var.get()
@@ -899,6 +1717,17 @@ class KanbanTxtViewer:
 
         self.card_font_size = int(out_fontsize.get())
 
+        self.virtualized_columns = bool(virtualized_columns_var.get())
+        self.card_renderer = card_renderer_var.get()
+        self.live_filter = bool(live_filter_var.get())
+        self.live_filter_delay = int(live_filter_delay_var.get())
+        self.background_save = bool(background_save_var.get())
+        self.journal_mode = bool(journal_mode_var.get())
+        if not self.journal_mode:
+            self.finish_journal()
+        self.archive_age = int(archive_age_var.get())
+        self.column_sort_specs = [spec.get().strip() for spec in column_sort_spec_vars]
+
         self.hide_memo = not hide_memo.get()
         self.hide_button_add_date = not hide_button_add_date.get()
         self.hide_button_delete = not hide_button_delete.get()
@@ -951,6 +1780,15 @@ class KanbanTxtViewer:
 
         self.store_in_config(self.CONFIG_KEY_FONT_SIZE, self.card_font_size)
 
+        self.store_in_config(self.CONFIG_KEY_VIRTUALIZED_COLUMNS, self.virtualized_columns)
+        self.store_in_config(self.CONFIG_KEY_CARD_RENDERER, self.card_renderer)
+        self.store_in_config(self.CONFIG_KEY_LIVE_FILTER, self.live_filter)
+        self.store_in_config(self.CONFIG_KEY_LIVE_FILTER_DELAY, self.live_filter_delay)
+        self.store_in_config(self.CONFIG_KEY_BACKGROUND_SAVE, self.background_save)
+        self.store_in_config(self.CONFIG_KEY_JOURNAL_MODE, self.journal_mode)
+        self.store_in_config(self.CONFIG_KEY_ARCHIVE_AGE, self.archive_age)
+        self.store_in_config(self.CONFIG_KEY_COLUMN_SORT_SPECS, self.column_sort_specs)
+
         editor_widget_change_state = [
             self.store_in_config(self.CONFIG_KEY_HIDE_MEMO, self.hide_memo),
             self.store_in_config(self.CONFIG_KEY_HIDE_BUTTON_ADD_DATE, self.hide_button_add_date),
@@ -1002,31 +1840,32 @@ class KanbanTxtViewer:
         self.main_window.grid_columnconfigure(0, weight=1)
 
         # HEADER
-        editor_header = tk.Frame(edition_frame, bg=self.COLORS['editor-background'])
-        editor_header.pack(side='top', fill='both', expand=0, padx=10, pady=0)
+        self.editor_header = tk.Frame(edition_frame, bg=self.COLORS['editor-background'])
+        self.editor_header.pack(side='top', fill='both', expand=0, padx=10, pady=0)
+        editor_header = self.editor_header
 
-        load_button = self.create_button(
+        self.load_button = self.create_button(
             editor_header,
             text="🗁",
             bordersize=2,
             color=self.COLORS['button'],
             activetextcolor=self.COLORS['main-background'],
             command=self.open_file_dialog,
-            tooltip="Open file",
+            tooltip=self.get_load_button_tooltip(),
             disable_in_filter_view=True
         )
-        load_button.pack(side="right", padx=(10,0), pady=10, anchor=tk.NE)
+        self.load_button.pack(side="right", padx=(10,0), pady=10, anchor=tk.NE)
 
-        save_button = self.create_button(
+        self.save_button = self.create_button(
             editor_header,
             text="⟳",
             bordersize=2,
             color=self.COLORS['button'],
             activetextcolor=self.COLORS['main-background'],
             command=self.reload_and_create_file,
-            tooltip="Reload UI and save file"
+            tooltip=self.get_save_button_tooltip()
         )
-        save_button.pack(side="right", padx=(10,0), pady=10, anchor=tk.NE)
+        self.save_button.pack(side="right", padx=(10,0), pady=10, anchor=tk.NE)
 
         # Light mode / dark mode switch
         button_color = self.COLORS['button']
@@ -1065,8 +1904,32 @@ class KanbanTxtViewer:
                                               activetextcolor=self.COLORS['main-background'],
                                               tooltip="Customize view")
         show_hide_button.pack(side="left", padx=(10,0), pady=10, anchor=tk.NE)
+
+        archive_button = self.create_button(editor_header,
+                                            "🗃",
+                                            command=self.on_show_archive_button,
+                                            bordersize=2,
+                                            color=self.COLORS['button'],
+                                            activetextcolor=self.COLORS['main-background'],
+                                            tooltip="Show archived done tasks")
+        archive_button.pack(side="left", padx=(10,0), pady=10, anchor=tk.NE)
         #END HEADER
 
+        # progress of loading a file in chunks, packed under the header while the file is loaded
+        self.load_progress_frame = tk.Frame(edition_frame, bg=self.COLORS['editor-background'])
+        self.load_progress_bar = ttk.Progressbar(self.load_progress_frame, mode='determinate', maximum=1.0)
+        self.load_progress_bar.pack(side='left', fill='x', expand=1, padx=(10, 0), pady=(0, 10))
+        cancel_load_button = self.create_button(
+            self.load_progress_frame,
+            text="✕",
+            bordersize=2,
+            color=self.COLORS['button'],
+            activetextcolor=self.COLORS['main-background'],
+            command=self.cancel_progressive_load,
+            tooltip="Cancel loading the file [Esc]"
+        )
+        cancel_load_button.pack(side='right', padx=10, pady=(0, 10))
+
         # Separator
         tk.Frame(edition_frame, height=1, bg=self.COLORS['main-text']).pack(side='top', fill='x')
 
@@ -1116,6 +1979,7 @@ class KanbanTxtViewer:
             insertbackground=self.COLORS['main-text'])
         self.filter_entry_box.pack(side="left", padx=(10,0), anchor=tk.W)
         self.filter_entry_box.bind('<Return>', self.apply_filter)
+        self.filter_entry_box.bind('<KeyRelease>', self.on_filter_entry_key_release)
         self.widgets_for_disable_in_filter_mode.append(self.filter_entry_box)
 
         self.apply_filter_button = self.create_button(
@@ -1155,6 +2019,23 @@ class KanbanTxtViewer:
         user_regex_hovertip = Hovertip(self.use_regex_checkbox, "If selected, uses a regular expression for matching each line; otherwise uses simple search, case insensitive.")
         self.widgets_for_disable_in_filter_mode.append(self.use_regex_checkbox)
 
+        self.use_query_val = tk.IntVar()
+        self.use_query_checkbox = tk.Checkbutton(self.filter_frame,
+                                                 text='use query',
+                                                 variable=self.use_query_val,
+                                                 fg=self.COLORS['button'],
+                                                 bg=self.COLORS['editor-background'],
+                                                 selectcolor=self.COLORS['done-card-background']
+                                                 )
+        self.use_query_checkbox.pack(side="left", padx=(10, 0), anchor=tk.W)
+        Hovertip(self.use_query_checkbox, "If selected, the filter is a query of task fields, e.g.:\n"
+                                          "(prio:A or prio:B) +backend not state:done\n"
+                                          "Fields: prio:A, prio:A-C, prio:none, project:name, context:name,\n"
+                                          "state:todo|in_progress|validation|done, key:value, key:*,\n"
+                                          "created:, completed: and key: with dates, e.g. due:2023-01-01..2023-01-31.\n"
+                                          "Other words are searched in the task text. Terms can be combined with and, or, not and parentheses.")
+        self.widgets_for_disable_in_filter_mode.append(self.use_query_checkbox)
+
         # Separator
         tk.Frame(edition_frame, height=1, bg=self.COLORS['main-text']).pack(side='top', fill='x')
 
@@ -1175,9 +2056,14 @@ class KanbanTxtViewer:
             insertwidth=3,
         )
         self.text_editor.pack(side="top", fill="both", expand=1, padx=10, pady=10)
+        self.editor_redirector = EditorChangesRedirector(self.text_editor)
+        self.editor_insert = self.editor_redirector.register('insert', self.on_editor_insert)
+        self.editor_delete = self.editor_redirector.register('delete', self.on_editor_delete)
         self.text_editor.tag_configure('pair', background=self.COLORS['done-card-background'])
         self.text_editor.tag_configure('current_pos', foreground='black', background=self.COLORS['project'], selectbackground=self.COLORS["column0"])
         self.text_editor.tag_configure('insert', background='red')
+        # the current line is displayed over the stripes
+        self.text_editor.tag_raise('current_pos', 'pair')
 
         # EDITOR TOOLBAR
         editor_toolbar = tk.Frame(edition_frame, bg=self.COLORS['editor-background'])
@@ -1383,18 +2269,18 @@ class KanbanTxtViewer:
         self.content_frame = tk.Frame(self.content_canvas, bg=self.COLORS['main-background'])
 
 
-        content_scrollbar = tk.Scrollbar(
+        self.content_scrollbar = tk.Scrollbar(
             self.main_window, 
             orient="vertical", 
             command=self.content_canvas.yview
         )
-        content_scrollbar.grid(row=0, column=2, sticky='ns')
+        self.content_scrollbar.grid(row=0, column=2, sticky='ns')
         
         self.canvas_frame = self.content_canvas.create_window(
             (0, 0), window=self.content_frame, anchor="nw")
 
         # Attach the scroll bar position to the visible region of the canvas
-        self.content_canvas.configure(yscrollcommand=content_scrollbar.set)
+        self.content_canvas.configure(yscrollcommand=self.on_content_scrolled)
         # END SCROLLABLE CANVAS
 
         # Prepare progress bars and kanban itself
@@ -1410,6 +2296,14 @@ class KanbanTxtViewer:
         # Frame containing the kanban
         self.kanban_frame = tk.Frame(self.content_frame, bg=self.COLORS['main-background'])
         self.kanban_frame.pack(fill='both')
+        # task cards are children of the kanban frame, so they can be moved between columns
+        self.card_widgets = {}
+        self.card_view_settings = None
+        self.card_pool = TaskCardPool(self, self.kanban_frame)
+        self.column_tasks = {}
+        self.card_heights = {}
+        self.column_card_offsets = {}
+        self._virtual_columns_after_id = None
 
         # Create each column and its associated progress bar
         for idx, (key, column) in enumerate(self.ui_columns.items()):
@@ -1447,6 +2341,13 @@ class KanbanTxtViewer:
 
             self.ui_columns[key] = ui_column
             self.ui_columns[key].content = ui_column_content
+            # spacers take place of cards, which aren't drawn in virtualized columns
+            self.ui_columns[key].top_spacer = tk.Frame(ui_column_content, bg=ui_column['bg'], height=0)
+            self.ui_columns[key].bottom_spacer = tk.Frame(ui_column_content, bg=ui_column['bg'], height=0)
+            self.ui_columns[key].card_column = CanvasCardColumn(self, ui_column_content, ui_column['bg'])
+            if self.profiler is not None:
+                # cards of the canvas renderer are drawn by their columns
+                self.profiler.instrument(self.ui_columns[key].card_column, 'draw_card', 'draw card')
 
             
             # Create the progress bar associated to the column
@@ -1521,146 +2422,82 @@ class KanbanTxtViewer:
         if disable_in_filter_view:
             self.widgets_for_disable_in_filter_mode.append(button)
         if tooltip is not None:
-            hovertip = Hovertip(button, tooltip)
+            button_frame.hovertip = Hovertip(button, tooltip)
         return button_frame
 
 
-    def fread(self, filename):
-        """Read file and close the file."""
-        with open(filename, 'r', encoding='utf8') as f:
-            return f.read()
-
-    def fwrite(self, filename, text):
-        """Write content to file and close the file."""
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(text)
+    def get_column_sort_orders(self):
+        """Return the SortSpec of each column, or the SortMethod chosen for all columns, if it has no spec"""
+        sort_method = SORT_METHODS[self.sort_method_idx]
+        orders = []
+        for spec in self.column_sort_specs:
+            order = KanbanTxtModel.SortMethod(sort_method['key'], sort_method['rev'])
+            if len(spec) > 0:
+                try:
+                    order = KanbanTxtModel.SortSpec(spec)
+                except ValueError:
+                    # invalid specs may be written in the config by hand, they're ignored
+                    pass
+            orders.append(order)
+        return orders
 
     def parse_todo_txt(self, p_todo_txt):
-        """Parse a todo txt content and return data as a dictionary"""
+        """Parse a todo txt content, draw task cards and return tasks grouped by columns"""
         tasks = {}
         for col in self.COLUMNS_NAMES:
             tasks[col] = []
 
-        # Erase the columns content
         for ui_column_name, ui_column in self.ui_columns.items():
             ui_column.content.pack_forget()
-            for widget in ui_column.content.winfo_children():
-                widget.destroy()
-
-        todo_list = p_todo_txt.split("\n")
-
-        self.cards_data = []
-        for index, task_txt in enumerate(todo_list):
-            if len(task_txt) != 0:
-                task_data = re.match(
-                    r'^(?P<isDone>x )? '
-                    r'?(?P<priority>\([A-Z]\))? '
-                    r'?(?P<dates>\d\d\d\d-\d\d-\d\d( \d\d\d\d-\d\d-\d\d)?)? '
-                    r'?(?P<subject>.+)',
-                    task_txt)
-
-                # special key-vals, context or project tags may occur basically everywhere in the line,
-                # so don't try to fit it into the structured regex above, just make a new search
-                special_kv_r = re.compile(r'(?P<key>[^:\s]+):(?P<val>[^:\s]+)')
-                special_kv_data = [m.groupdict() for m in special_kv_r.finditer(task_txt)]
-
-                project_r = re.compile(r' (?P<project>\+\S+)')
-                project_data = [m.groupdict() for m in project_r.finditer(task_txt)]
-
-                context_r = re.compile(r' (?P<context>@\S+)')
-                context_data = [m.groupdict() for m in context_r.finditer(task_txt)]
-
-                task = task_data.groupdict()
-                task['is_important'] = False
-
-                subject = task.get('subject', '???')
-
-                # remove any special key-val strings, project and context tags from the subject text for clarity
-                subject = re.sub(special_kv_r, "", subject)
-                subject = re.sub(project_r, "", subject)
-                subject = re.sub(context_r, "", subject)
-
-                category = self.COLUMN_0_NAME
-
-                category_map = {
-                    self.KANBAN_VAL_IN_PROGRESS: self.COLUMN_1_NAME,
-                    self.KANBAN_VAL_VALIDATION: self.COLUMN_2_NAME,
-                }
-
-                for i in range(0, len(special_kv_data)):
-                    kv = special_kv_data[i]
-                    if kv['key'] == self.KANBAN_KEY:
-                        v = kv['val']
-                        if v in category_map.keys():
-                            category = category_map[v]
-                            break
-
-                if task.get("isDone"):
-                    category = self.COLUMN_3_NAME
-
-                priority = None
-                if task.get("priority"):
-                    priority = task['priority'][1]  # get only letter without parenthesis
-
-                tasks[category].append(task)
-
-                start_date = None
-                end_date = None
-                if task.get('dates'):
-                    dates = []
-                    dates = task.get('dates').split(' ')
-                    if len(dates) == 1:
-                        start_date = date.fromisoformat(dates[0])
-                    elif len(dates) == 2:
-                        start_date = date.fromisoformat(dates[1])
-                        end_date = date.fromisoformat(dates[0])
-
-                card_bg = self.COLORS['card-background']
-                font = 'main'
-                if category == self.COLUMN_3_NAME:
-                    card_bg = self.COLORS['done-card-background']
-                    font = 'done-task'
-
-                card_parent = self.ui_columns[category].content
-
-                self.cards_data.append({
-                    'parent': card_parent,
-                    'subject': subject,
-                    'bg': card_bg,
-                    'font': font,
-                    'project': project_data,
-                    'context': context_data,
-                    'start_date': start_date,
-                    'end_date': end_date,
-                    'state': category,
-                    'name': "task#" + str(index + 1),
-                    'special_kv_data': special_kv_data,
-                    'priority': priority,
-                    'index': index,
-                    'raw_txt': task_txt
-                })
 
-        sort_method = SORT_METHODS[self.sort_method_idx]
-        self.cards_data.sort(key=sort_method['f'], reverse=sort_method['rev'])
-        for card in self.cards_data:
-            index = card['index']
-            if self.filter is not None:
-                index = self.non_filtered_content_line_mapping[index]
-            self.draw_card(
-                card['parent'],
-                card['subject'],
-                card['bg'],
-                card['font'],
-                project=card['project'],
-                context=card['context'],
-                start_date=card['start_date'],
-                end_date=card['end_date'],
-                state=card['state'],
-                name=card['name'],
-                special_kv_data=card['special_kv_data'],
-                priority=card['priority'],
-                index=index,
-            )
+        self.task_model.update(p_todo_txt)
+        for task in self.task_model.tasks:
+            tasks[self.COLUMNS_NAMES[task.column]].append(task)
+
+        self.apply_card_font_size()
+
+        # Cards depend on the view settings, if any of them changed, all cards have to be updated
+        card_view_settings = self.get_card_view_settings()
+        if card_view_settings != self.card_view_settings:
+            for card in self.card_widgets.values():
+                card.task = None
+            for ui_column in self.ui_columns.values():
+                ui_column.card_column.clear()
+            self.card_heights.clear()
+            self.card_view_settings = card_view_settings
+
+        for task in self.task_model.removed_tasks:
+            self.release_card(task)
+            self.card_heights.pop(task, None)
+
+        self.sort_columns()
+        self.column_card_offsets.clear()
+
+        if self.card_renderer == self.CARD_RENDERER_CANVAS:
+            for task in list(self.card_widgets):
+                self.release_card(task)
+            for col, column_tasks in self.column_tasks.items():
+                ui_column = self.ui_columns[col]
+                ui_column.top_spacer.pack_forget()
+                ui_column.bottom_spacer.pack_forget()
+                self.pack_column_cards(ui_column.content, [ui_column.card_column.canvas])
+                ui_column.card_column.show_tasks(column_tasks)
+        # Virtualized columns are drawn when the columns are already placed, so the visible region is known
+        elif not self.virtualized_columns:
+            # Keep cards of tasks, which weren't changed, update only new or changed ones
+            for col, column_tasks in self.column_tasks.items():
+                ui_column = self.ui_columns[col]
+                ui_column.top_spacer.pack_forget()
+                ui_column.bottom_spacer.pack_forget()
+                ui_column.card_column.canvas.pack_forget()
+                ui_column.card_column.clear()
+                cards = [self.get_task_card(task).highlight_frame for task in column_tasks]
+                # Pack cards into their columns, in order of sorting
+                self.pack_column_cards(ui_column.content, cards)
+        else:
+            for ui_column in self.ui_columns.values():
+                ui_column.card_column.canvas.pack_forget()
+                ui_column.card_column.clear()
 
         # Compute proportion for each column tasks and update progress bars
         tasks_number = {}
@@ -1685,12 +2522,10 @@ class KanbanTxtViewer:
                 progress_bar['label'].config(text=label_text)
                 bar_x += percentages[key]
 
-        for ui_column_name, ui_column in self.ui_columns.items():
-            tmp_frame = tk.Frame(ui_column.content, width=0, height=0)
-            tmp_frame.pack()
-            ui_column.content.update()
-            tmp_frame.destroy()
-            ui_column.content.pack(side='top', padx=10, pady=(0,10), fill='x')
+        self.update_column_layouts()
+
+        if self.are_columns_virtualized():
+            self.update_virtual_columns()
 
         self.update_editor_line_colors()
 
@@ -1699,173 +2534,224 @@ class KanbanTxtViewer:
         return tasks
 
 
-    def draw_card(
-        self,
-        parent,
-        subject,
-        bg,
-        font='main',
-        project=None,
-        context=None,
-        start_date=None,
-        end_date=None,
-        state=None,
-        name="",
-        special_kv_data=None,
-        priority=None,
-        index=None
-    ):
-        def bind_highlight_and_drag_n_drop(widget):
-            widget.bind('<Button-1>', self.on_click)
-            widget.bind('<B1-Motion>', self.on_drag_init)
-            widget.bind('<ButtonRelease>', self.on_drop)
-
-        def get_widget_name(subject_name):
-            ret_name = str(get_widget_name.counter) + subject_name
-            get_widget_name.counter += 1
-            return ret_name
-        get_widget_name.counter = 0
+    def sort_columns(self):
+        """Sort tasks of the model in their columns, to the column_tasks"""
+        # changing the sort order only reorders the sorted tasks, changed ones are inserted into their columns
+        self.sorted_columns.set_orders(self.get_column_sort_orders())
+        self.sorted_columns.sync(self.task_model)
 
-        # Create the card frame
-        ui_card_highlight = tk.Frame(parent, bd=2, bg=self.COLORS['column1-column'], height=200, name="highlightFrame"+name)
-        ui_card = tk.Frame(ui_card_highlight, bd=0, bg=bg, height=200, cursor='hand2', name=get_widget_name(name))
+        self.column_tasks = {}
+        for column, col in enumerate(self.COLUMNS_NAMES):
+            self.column_tasks[col] = self.sorted_columns.get_column_tasks(column)
 
-        subject_padx = 10
+    def update_column_layouts(self):
+        for ui_column_name, ui_column in self.ui_columns.items():
+            tmp_frame = tk.Frame(ui_column.content, width=0, height=0)
+            tmp_frame.pack()
+            ui_column.content.update()
+            tmp_frame.destroy()
+            ui_column.content.pack(side='top', padx=10, pady=(0,10), fill='x')
 
-        # If needed, add a color border for priority marking
-        if priority is not None and self.show_priority:
-            prio_color = self.get_priority_color(priority)
-            important_border = tk.Frame(ui_card, bg=prio_color, width="3", name=get_widget_name(name))
-            bind_highlight_and_drag_n_drop(important_border)
-            important_border.pack(side="left", fill='y')
-            important_label = tk.Label(
-                ui_card,
-                text=priority,
-                fg=prio_color,
-                bg=ui_card['bg'],
-                anchor=tk.W,
-                font=tkFont.Font(family='arial', size=self.card_font_size + 8, weight=tkFont.BOLD),
-                name=get_widget_name(name)
-            )
-            important_label.pack(side="left", anchor=tk.NW, padx=0, pady=(5,0))
-            bind_highlight_and_drag_n_drop(important_label)
-            subject_padx = 0
+    def get_card_view_settings(self):
+        return (
+            self.show_priority,
+            self.show_content,
+            self.show_date,
+            self.show_project,
+            self.show_context,
+            self.show_special_kv_data,
+            self.show_index,
+            self.current_date,
+        )
 
-        if self.show_content:
-            card_label = tk.Label(
-                ui_card, 
-                text=subject, 
-                fg=self.COLORS['main-text'], 
-                bg=ui_card['bg'], 
-                anchor=tk.W, 
-                wraplength=200, 
-                justify='left',
-                font=(font, self.card_font_size),
-                name=get_widget_name(name)
-            )
+    def get_displayed_index(self, task):
+        """Return the line index displayed on the card, in the filter view it's the line of the whole file"""
+        if self.filter is not None:
+            return self.non_filtered_content_line_mapping[task.index]
+        return task.index
+
+    def get_task_card(self, task):
+        """Return the card displaying the task, draw it only if it's new or the view settings have changed.
+
+        Tasks are never modified, an edited line is a new task. When lines are inserted or removed
+        above the task, only its line and displayed index are updated."""
+        index = self.get_displayed_index(task)
+        card = self.card_widgets.get(task)
+        if card is None or card.task is not task:
+            card = self.draw_card(task, card, index)
+        else:
+            card.line = task.index + 1
+            if card.index != index:
+                card.show_index(index)
+        return card
+
+    def get_task_of_line(self, line):
+        """Return the task defined in the editor line, numbered from 1, None for empty lines"""
+        if 0 < line <= len(self.task_model.line_tasks):
+            return self.task_model.line_tasks[line - 1]
+        return None
 
-            # Adapt elide length when width change
-            card_label.bind("<Configure>", self.on_card_width_changed)
-            bind_highlight_and_drag_n_drop(card_label)
-            card_label.pack(padx=subject_padx, pady=5, fill='x', side="top", anchor=tk.W)
+    def draw_card(self, task, card, index):
+        """Make the card display the task, get a card from the pool if it's None"""
+        card_bg = self.COLORS['card-background']
+        font = 'subject'
+        if task.column == KanbanTxtModel.COLUMN_DONE:
+            card_bg = self.COLORS['done-card-background']
+            font = 'done-subject'
+
+        if card is None:
+            card = self.card_pool.acquire()
+            self.card_widgets[task] = card
+        card.show_task(
+            task.subject,
+            card_bg,
+            font,
+            project=task.projects,
+            context=task.contexts,
+            start_date=task.start_date,
+            end_date=task.end_date,
+            special_kv_data=task.special_kv_data,
+            priority=task.priority,
+            index=index,
+        )
+        card.task = task
+        card.line = task.index + 1
+        return card
+
+    def release_card(self, task):
+        card = self.card_widgets.pop(task, None)
+        if card is not None:
+            self.card_pool.release(card)
+
+    def pack_column_cards(self, column_content, cards):
+        """Pack cards into the column content frame, skipping cards which are already in place"""
+        packed_cards = column_content.pack_slaves()
+        first_difference = 0
+        for packed_card, card in zip(packed_cards, cards):
+            if packed_card != card:
+                break
+            first_difference += 1
+        # packing a widget again moves it to the end of the packing order of the column
+        for card in cards[first_difference:]:
+            card.pack(in_=column_content, padx=0, pady=(0, 1), side="top", fill='x', expand=1, anchor=tk.NW)
+
+    def on_content_scrolled(self, first, last):
+        self.content_scrollbar.set(first, last)
+        if self.are_columns_virtualized():
+            self.schedule_update_of_virtual_columns()
+
+    def are_columns_virtualized(self):
+        # cards drawn on canvases are cheap enough to draw all of them
+        return self.virtualized_columns and self.card_renderer == self.CARD_RENDERER_WIDGETS
+
+    def schedule_update_of_virtual_columns(self):
+        if self._virtual_columns_after_id is None:
+            self._virtual_columns_after_id = self.main_window.after(
+                self.VIRTUAL_COLUMN_UPDATE_DELAY, self.update_virtual_columns)
+
+    def get_column_content_y(self, ui_column):
+        """Return the vertical position of the column content in the scrolled content frame"""
+        return self.kanban_frame.winfo_y() + ui_column.winfo_y() + ui_column.content.winfo_y()
+
+    def measure_card_heights(self):
+        """Store heights of the displayed cards, return True if any of them has changed"""
+        has_any_height_changed = False
+        for task, card in self.card_widgets.items():
+            if not card.highlight_frame.winfo_ismapped():
+                continue
+            # cards are packed with 1 pixel of padding below them
+            height = card.highlight_frame.winfo_height() + 1
+            if self.card_heights.get(task) != height:
+                self.card_heights[task] = height
+                self.column_card_offsets.pop(self.COLUMNS_NAMES[task.column], None)
+                has_any_height_changed = True
+        return has_any_height_changed
+
+    def get_column_card_offsets(self, col):
+        """Return positions of the cards in the column content, with the height of the whole content
+        at the end. Cards which weren't displayed yet get the average height of the measured ones."""
+        offsets = self.column_card_offsets.get(col)
+        if offsets is None:
+            if len(self.card_heights) > 0:
+                estimated_height = sum(self.card_heights.values()) // len(self.card_heights)
+            else:
+                estimated_height = 5 * self.card_font_size + 30
+            heights = [self.card_heights.get(task, estimated_height) for task in self.column_tasks[col]]
+            offsets = [0]
+            offsets.extend(itertools.accumulate(heights))
+            self.column_card_offsets[col] = offsets
+        return offsets
+
+    def update_virtual_columns(self):
+        """Draw cards of tasks in the visible region of the kanban, and in the overscan around it.
+
+        Cards of the other tasks are released to the pool, the space they would take is filled with
+        spacer frames. Heights of the spacers come from heights of cards, measured when they were
+        displayed, so the scrollbar reflects the size of the whole columns."""
+        if self._virtual_columns_after_id is not None:
+            self.main_window.after_cancel(self._virtual_columns_after_id)
+            self._virtual_columns_after_id = None
+        if not self.are_columns_virtualized():
+            return
 
-        # If needed, show the task duration
-        if start_date and self.show_date:
-            duration = 0
-            if not end_date:
-                end_date = self.current_date
+        self.measure_card_heights()
+
+        view_top = self.content_canvas.canvasy(0) - self.VIRTUAL_COLUMN_OVERSCAN
+        view_bottom = self.content_canvas.canvasy(self.content_canvas.winfo_height()) + self.VIRTUAL_COLUMN_OVERSCAN
+
+        visible_tasks = set()
+        is_any_card_drawn = False
+        for col, column_tasks in self.column_tasks.items():
+            ui_column = self.ui_columns[col]
+            offsets = self.get_column_card_offsets(col)
+            content_y = self.get_column_content_y(ui_column)
+            first = max(bisect.bisect_right(offsets, view_top - content_y) - 1, 0)
+            last = min(bisect.bisect_left(offsets, view_bottom - content_y), len(column_tasks))
+            first = min(first, last)
+
+            widgets = []
+            # spacers are packed with the same padding as cards, so their height is smaller by it
+            top_height = offsets[first]
+            if top_height > 1:
+                ui_column.top_spacer.configure(height=top_height - 1)
+                widgets.append(ui_column.top_spacer)
+            else:
+                ui_column.top_spacer.pack_forget()
 
-            duration = end_date.toordinal() - start_date.toordinal()
-            duration_string = "%d days" % (duration)
+            for task in column_tasks[first:last]:
+                is_any_card_drawn = is_any_card_drawn or task not in self.card_heights
+                widgets.append(self.get_task_card(task).highlight_frame)
+                visible_tasks.add(task)
 
-            duration_label = tk.Label(
-                ui_card, 
-                text = duration_string,
-                fg=self.COLORS['column3'], 
-                bg=ui_card['bg'], 
-                anchor=tk.W, 
-                justify='left',
-                font=("Arial", self.card_font_size - 2),
-                wraplength=85,
-                name=get_widget_name(name)
-            )
-            if (project or context) and (len(project) > 0 or len(context) > 0):
-                duration_label.pack(side="top", anchor=tk.NW, padx=10, pady=0)
+            bottom_height = offsets[-1] - offsets[last]
+            if bottom_height > 1:
+                ui_column.bottom_spacer.configure(height=bottom_height - 1)
+                widgets.append(ui_column.bottom_spacer)
             else:
-                duration_label.pack(side="top", anchor=tk.NW, padx=10, pady=(0,2))
-            bind_highlight_and_drag_n_drop(duration_label)
+                ui_column.bottom_spacer.pack_forget()
 
-        # Add project and context tags if needed
-        if project and len(project) > 0 and self.show_project:
-            project_string = ", ".join([p["project"] for p in project])
-            project_label = tk.Label(
-                ui_card, 
-                text=project_string, 
-                fg=self.COLORS["project"], 
-                bg=ui_card['bg'], 
-                anchor=tk.E,
-                name=get_widget_name(name),
-                font=("Arial", self.card_font_size - 2),
-                wraplength=200,
-                justify='left',
-            )
-            project_label.pack(padx=10, pady=2, fill='x', side="top", anchor=tk.E)
-            bind_highlight_and_drag_n_drop(project_label)
-
-        if context and len(context) > 0 and self.show_context:
-            context_string = ", ".join([c["context"] for c in context])
-            context_label = tk.Label(
-                ui_card, 
-                text=context_string, 
-                fg=self.COLORS['context'], 
-                bg=ui_card['bg'], 
-                anchor=tk.E,
-                name=get_widget_name(name),
-                font=("Arial", self.card_font_size - 2),
-                wraplength=200,
-                justify='left',
-            )
-            context_label.pack(padx=10, pady=2, fill='x', side="top", anchor=tk.E)
-            bind_highlight_and_drag_n_drop(context_label)
-
-        if special_kv_data is not None and len(special_kv_data) > 0 and self.show_special_kv_data:
-            special_kv_data_string = ", ".join([f"{special_kv_data_entry['key']}:{special_kv_data_entry['val']}" for
-                                                special_kv_data_entry in special_kv_data])
-            special_kv_entry_label = tk.Label(
-                ui_card,
-                text=special_kv_data_string,
-                fg=self.COLORS['kv-data'],
-                bg=ui_card['bg'],
-                anchor=tk.E,
-                name=get_widget_name(name),
-                font=("Arial", self.card_font_size - 2),
-                wraplength=200,
-                justify='left',
-            )
-            special_kv_entry_label.pack(padx=10, pady=2, fill='x', side="top", anchor=tk.E)
-            bind_highlight_and_drag_n_drop(special_kv_entry_label)
-
-        if index is not None and self.show_index:
-            index_string = f"#{index}"
-            index_va = tk.StringVar(value=index_string)
-            index_label = tk.Entry(
-                ui_card,
-                fg=self.COLORS['kv-data'],
-                bg=ui_card['bg'],
-                name=get_widget_name(name),
-                font=("Arial", self.card_font_size - 2),
-                textvariable=index_va,
-                borderwidth=0,
-                state="readonly",
-                readonlybackground=ui_card['bg'],
-            )
-            index_label.pack(padx=0, pady=2, side="top", anchor=tk.W)
+            self.pack_column_cards(ui_column.content, widgets)
 
-        ui_card.pack(padx=1, pady=(0, 10), side="top", fill='x', expand=1, anchor=tk.NW)
-        ui_card_highlight.pack(padx=0, pady=(0, 1), side="top", fill='x', expand=1, anchor=tk.NW)
-        bind_highlight_and_drag_n_drop(ui_card)
+        for task in [task for task in self.card_widgets if task not in visible_tasks]:
+            self.release_card(task)
 
-        return ui_card
+        self.highlight_card_of_selected_line()
+
+        # heights of new cards are known after they're displayed, so they're measured in the next update
+        if is_any_card_drawn and self.kanban_frame.winfo_ismapped():
+            self.schedule_update_of_virtual_columns()
+
+    def apply_card_font_size(self):
+        """Resize fonts of the cards, cards made of widgets are updated by Tk without drawing them again"""
+        if not self.card_fonts.set_size(self.card_font_size):
+            return
+        # layout of canvas cards and heights of virtualized cards depend on the size of text
+        self.card_heights.clear()
+        self.column_card_offsets.clear()
+        for ui_column in self.ui_columns.values():
+            ui_column.card_column.redraw()
+        if self.are_columns_virtualized():
+            self.schedule_update_of_virtual_columns()
 
     def on_control_scroll(self, event):
         delta = (event.delta/120)
@@ -1874,38 +2760,55 @@ class KanbanTxtViewer:
             new_font_size = 4
         if new_font_size != self.card_font_size:
             self.card_font_size = new_font_size
-            self.reload_ui_from_text()
+            self.apply_card_font_size()
             self.store_in_config(self.CONFIG_KEY_FONT_SIZE, new_font_size)
             self.save_config_file()
         return "break"
 
     def open_file_dialog(self, event=None):
         """Open a dialog to select a file to load"""
+        if self.progressive_load is not None:
+            return
         self.file = filedialog.askopenfilename(
             initialdir='.', 
             filetypes=[("todo list file", "*todo.txt"), ("txt file", "*.txt")],
             title='Choose a todo list to display')
         self.load_txt_file()
 
-    def apply_filter(self, event=None):
-        self.filter_frame.configure(bg=self.COLORS['project'])
-        self.clear_filter_button.configure(bg='red')
-        self.filter = self.filter_entry_box.get()
-        non_filtered_lines = self.non_filtered_content.split('\n')
-        self.non_filtered_content_line_mapping = []
-        filtered_content = []
-        if self.non_filtered_content is not None:
-            for i in range(len(non_filtered_lines)):
-                line = non_filtered_lines[i]
+    def apply_filter(self, event=None, show_errors=True):
+        if self.progressive_load is not None:
+            return
+        was_filter_active = self.filter is not None
+        if was_filter_active:
+            # the filter is changed in the live filter mode, keep changes done in the filter view
+            self.non_filtered_content = self.merge_filtered_with_original()
 
-                if self.use_regex_val.get():
-                    is_this_line_included = len(re.findall(self.filter, line)) > 0
+        new_filter = self.filter_entry_box.get()
+        non_filtered_lines = []
+        non_filtered_content_line_mapping = []
+        if self.non_filtered_content is not None:
+            try:
+                if self.use_query_val.get():
+                    # only lines changed since the last query are parsed again
+                    self.query_model.update(self.non_filtered_content)
+                    non_filtered_lines = self.query_model.lines
+                    tasks = KanbanTxtQuery.find_tasks(new_filter, self.query_model)
+                    non_filtered_content_line_mapping = [task.index for task in tasks]
                 else:
-                    is_this_line_included = self.filter.casefold() in line.casefold()
+                    # the index is built again only if the content has changed since the last filter
+                    self.filter_index.update(self.non_filtered_content)
+                    non_filtered_lines = self.filter_index.lines
+                    non_filtered_content_line_mapping = self.filter_index.search(new_filter, self.use_regex_val.get())
+            except (re.error, KanbanTxtQuery.QuerySyntaxError) as error:
+                if show_errors:
+                    self.flash_editor_warning_tooltip(f"Invalid filter: {error}")
+                return
+        filtered_content = [non_filtered_lines[i] for i in non_filtered_content_line_mapping]
 
-                if is_this_line_included:
-                    filtered_content.append(line)
-                    self.non_filtered_content_line_mapping.append(i)
+        self.filter_frame.configure(bg=self.COLORS['project'])
+        self.clear_filter_button.configure(bg='red')
+        self.filter = new_filter
+        self.non_filtered_content_line_mapping = non_filtered_content_line_mapping
 
         filtered_text = '\n'.join(filtered_content)
         self.reload_ui_from_text(filtered_text, f"KanbanTxt - {pathlib.Path(self.file).name} !! FILTER VIEW ACTIVE !!")
@@ -1916,11 +2819,44 @@ class KanbanTxtViewer:
         if self.filter_view_message is not None:
             self.remove_custom_tooltip(self.filter_view_message)
         self.filter_view_message = self.add_custom_tooltip(self.filter_frame, f" Filter view: showing {len(filtered_content)} of {len(non_filtered_lines)} tasks ")
+        if not was_filter_active:
+            self.switch_widgets_for_filter_mode()
+
+    def switch_widgets_for_filter_mode(self):
         for widget in self.widgets_for_disable_in_filter_mode:
             if widget['state'] == 'disabled':
                 widget.config(state='normal')
             else:
                 widget.config(state='disabled')
+        # in the live filter mode, the filter can be changed when the filter view is active
+        if self.live_filter or self.filter is None:
+            self.filter_entry_box.config(state='normal')
+
+    def on_filter_entry_key_release(self, event=None):
+        """Schedule the filter update after the delay, cancel the update scheduled by the previous key"""
+        if not self.live_filter:
+            return
+        filter_text = self.filter_entry_box.get()
+        if filter_text == self.live_filter_text:
+            return
+        self.live_filter_text = filter_text
+        self.live_filter_generation += 1
+        if self._live_filter_after_id is not None:
+            self.main_window.after_cancel(self._live_filter_after_id)
+        self._live_filter_after_id = self.main_window.after(
+            self.live_filter_delay, self.apply_live_filter, self.live_filter_generation)
+
+    def apply_live_filter(self, generation):
+        self._live_filter_after_id = None
+        if generation != self.live_filter_generation:
+            # the filter was changed again, this update is outdated
+            return
+        if len(self.live_filter_text) > 0:
+            # the filter may be incomplete while it's typed, so errors aren't reported
+            self.apply_filter(show_errors=False)
+        elif self.filter is not None:
+            self.clear_filter()
+        self.filter_entry_box.focus()
 
     def clear_filter(self):
         self.non_filtered_content = self.merge_filtered_with_original()
@@ -1928,11 +2864,7 @@ class KanbanTxtViewer:
         if self.filter_view_message is not None:
             self.remove_custom_tooltip(self.filter_view_message)
         self.filter_view_message = None
-        for widgets in self.widgets_for_disable_in_filter_mode:
-            if widgets['state'] == 'disabled':
-                widgets.config(state='normal')
-            else:
-                widgets.config(state='disabled')
+        self.switch_widgets_for_filter_mode()
 
         self.filter_frame.configure(bg=self.COLORS['editor-background'])
         self.clear_filter_button.configure(bg=self.COLORS['main-text'])
@@ -1965,11 +2897,148 @@ class KanbanTxtViewer:
 
     def load_txt_file(self):
         if os.path.isfile(self.file):
-            content = self.fread(self.file)
-            title = f"KanbanTxt - {pathlib.Path(self.file).name}"
-            self.non_filtered_content = content
+            self.flush_saves()
+            self.finish_journal()
+            if os.path.getsize(self.file) >= self.PROGRESSIVE_LOAD_SIZE:
+                self.start_progressive_load()
+                return
+            begin = time.perf_counter()
+            try:
+                content = self.todo_file.read(self.file)
+            except (UnicodeDecodeError, OSError) as error:
+                path = self.file
+                # content of the previous file mustn't be saved over the file, which can't be read
+                self.file = ''
+                self.non_filtered_content = None
+                self.filter_index.update('')
+                self.reload_ui_from_text('', "KanbanTxt")
+                self.show_load_error(path, error)
+                return
+            replayed_count = self.show_loaded_content(content)
+            elapsed = time.perf_counter() - begin
+            self.set_load_report(KanbanTxtStorage.LoadReport(
+                self.file, os.path.getsize(self.file), self.task_model.line_count, elapsed, elapsed))
+            self.show_recovered_changes(replayed_count)
+
+    def show_loaded_content(self, content, is_in_editor=False):
+        """Show content of the loaded file, with changes recovered from its journal,
+        return the number of recovered changes"""
+        content, replayed_count = KanbanTxtStorage.replay_journals(self.file, content)
+        if replayed_count > 0:
+            # changes recovered from the journal, left after a crash, are written to the file
+            self.todo_file.save(self.file, content)
+            KanbanTxtStorage.remove_journals(self.file)
+        title = f"KanbanTxt - {pathlib.Path(self.file).name}"
+        self.non_filtered_content = content
+        self.filter_index.update(content)
+        if is_in_editor and replayed_count == 0:
+            self.parse_todo_txt(content)
+            self.main_window.title(title)
+        else:
             self.reload_ui_from_text(content, title)
-    
+        return replayed_count
+
+    def show_load_error(self, path, error):
+        tk.messagebox.showwarning(title="Error loading file",
+                                  message=f"Can't read the file '{path}': {error}")
+
+    def show_recovered_changes(self, replayed_count):
+        if replayed_count > 0:
+            tk.messagebox.showinfo(title="Changes recovered",
+                                   message=f"{replayed_count} change(s) not written to the file were "
+                                           f"recovered from its journal.")
+
+    def start_progressive_load(self):
+        """Load the file in chunks, each one in a separate callback, drawing the cards of the first chunk
+        before reading the next ones"""
+        self.progressive_load = ProgressiveLoad(self.file)
+        # content of the previous file mustn't be shown again, e.g. by clearing the filter
+        self.non_filtered_content = None
+        self.text_editor.delete('1.0', 'end')
+        self.parse_todo_txt('')
+        # the content can't be edited, until it's loaded
+        self.text_editor.config(state='disabled')
+        self.load_progress_bar['value'] = 0
+        self.load_progress_frame.pack(side='top', fill='x', after=self.editor_header)
+        self.main_window.title(f"KanbanTxt - {pathlib.Path(self.file).name} (loading...)")
+        self.progressive_load.after_id = self.main_window.after(self.PROGRESSIVE_LOAD_DELAY, self.load_next_chunk)
+
+    def load_next_chunk(self):
+        load = self.progressive_load
+        load.after_id = None
+        try:
+            chunk = next(load.chunks, None)
+        except (UnicodeDecodeError, OSError) as error:
+            # closes the chunks generator and unlocks the editor
+            self.cancel_progressive_load()
+            self.show_load_error(load.path, error)
+            return
+        if chunk is None:
+            self.finish_progressive_load()
+            return
+        text, bytes_read = chunk
+        load.parts.append(text)
+        self.text_editor.config(state='normal')
+        self.text_editor.insert('end-1c', text)
+        self.text_editor.config(state='disabled')
+        # the cards are drawn for the first chunk and then for the whole file, for the other chunks
+        # only the new lines are parsed
+        if load.first_cards_time is None:
+            self.parse_todo_txt(text)
+            load.first_cards_time = time.perf_counter() - load.begin
+        else:
+            self.task_model.extend(text)
+            # the last line of the first chunk may have its card drawn, before it's continued by the next one
+            for task in self.task_model.removed_tasks:
+                self.release_card(task)
+                self.card_heights.pop(task, None)
+        self.load_progress_bar['value'] = bytes_read / load.size
+        load.after_id = self.main_window.after(self.PROGRESSIVE_LOAD_DELAY, self.load_next_chunk)
+
+    def finish_progressive_load(self):
+        load = self.progressive_load
+        self.progressive_load = None
+        self.load_progress_frame.pack_forget()
+        self.text_editor.config(state='normal')
+        content = ''.join(load.parts)
+        self.todo_file.remember_read(self.file, content, load.stat)
+        replayed_count = self.show_loaded_content(content, is_in_editor=True)
+        self.text_editor.mark_set('insert', '1.0')
+        self.text_editor.focus()
+        first_cards_time = load.first_cards_time
+        total_time = time.perf_counter() - load.begin
+        self.set_load_report(KanbanTxtStorage.LoadReport(
+            self.file, load.size, self.task_model.line_count,
+            total_time if first_cards_time is None else first_cards_time, total_time))
+        self.show_recovered_changes(replayed_count)
+
+    def cancel_progressive_load(self, event=None):
+        load = self.progressive_load
+        if load is None:
+            return
+        self.progressive_load = None
+        if load.after_id is not None:
+            self.main_window.after_cancel(load.after_id)
+        load.chunks.close()
+        self.load_progress_frame.pack_forget()
+        self.text_editor.config(state='normal')
+        # the partially loaded content mustn't be saved over the file
+        self.file = ''
+        self.filter_index.update('')
+        self.reload_ui_from_text('', "KanbanTxt")
+
+    def set_load_report(self, report):
+        self.last_load_report = report
+        self.load_button.hovertip.text = self.get_load_button_tooltip()
+
+    def get_load_button_tooltip(self):
+        tooltip = "Open file"
+        report = self.last_load_report
+        if report is None:
+            return tooltip
+        return (f"{tooltip}\nLast load: {report.line_count} lines, {report.bytes_read} bytes "
+                f"in {report.total_time * 1000:.0f} ms, first cards after {report.first_cards_time * 1000:.0f} ms")
+
     def reload_ui_from_text(self, text=None, title=None):
         if text is None:
             text = self.text_editor.get("1.0", "end-1c")
@@ -1985,16 +3054,24 @@ class KanbanTxtViewer:
     def reload_and_save(self, event=None):
         """Reload the kanban and save the editor content in the current todo.txt
             file """
+        if self.progressive_load is not None:
+            # the content isn't loaded yet, it can't be saved
+            return
         was_filter_active = self.filter is not None
         editor_insert_address = self.text_editor.index(tk.INSERT)
         selected_line = int(editor_insert_address.split('.')[0])
         if was_filter_active:
             self.clear_filter()
 
+        # changes made by another program since the last save aren't overwritten
+        self.merge_external_changes()
+        if self.file:
+            archived_indexes = self.archive_done_tasks()
+            selected_line -= sum(1 for index in archived_indexes if index < selected_line - 1)
         self.non_filtered_content = self.text_editor.get("1.0", "end-1c")
 
         if self.file:
-            self.fwrite(self.file, self.non_filtered_content)
+            self.save_file(self.non_filtered_content)
 
         if was_filter_active:
             self.apply_filter()
@@ -2005,9 +3082,268 @@ class KanbanTxtViewer:
         self.text_editor.see('insert')
 
 
+    def save_file(self, text):
+        if self.journal_mode:
+            self.append_to_journal(text)
+            return
+        if self.background_save:
+            self.save_worker.submit(self.file, text)
+            self.schedule_save_results_poll()
+            return
+        # the file is written in this thread, it can't be written by the worker at the same time
+        self.flush_saves()
+        self.last_save_report = self.todo_file.save(self.file, text)
+        self.save_button.hovertip.text = self.get_save_button_tooltip()
+
+    def append_to_journal(self, text):
+        if self.journal is None or self.journal.path != self.file:
+            self.finish_journal()
+            # the journal starts with the content of the file, without the changes being saved
+            self.flush_saves()
+            self.journal = KanbanTxtStorage.TodoJournal(self.file)
+            self.journal.start(self.todo_file.read(self.file))
+        self.last_save_report = self.journal.append(text)
+        self.save_button.hovertip.text = self.get_save_button_tooltip()
+
+        if self._journal_compaction_after_id is not None:
+            self.main_window.after_cancel(self._journal_compaction_after_id)
+            self._journal_compaction_after_id = None
+        if self.journal.needs_compaction():
+            self.compact_journal()
+        elif self.last_save_report.bytes_appended > 0:
+            self._journal_compaction_after_id = self.main_window.after(self.JOURNAL_COMPACT_DELAY,
+                                                                       self.compact_journal)
+
+    def compact_journal(self):
+        """Write content of the journal to the file, in the background if background saves are enabled"""
+        self._journal_compaction_after_id = None
+        self.merge_external_changes()
+        if self.journal is None:
+            return
+        text = self.journal.begin_compaction()
+        if text is None:
+            # the previous compaction failed or isn't finished yet
+            return
+        if self.background_save:
+            # the compacted journal is removed, when the worker reports the write, see handle_save_results
+            self.save_worker.submit(self.journal.path, text)
+            self.schedule_save_results_poll()
+            return
+        try:
+            self.todo_file.save(self.journal.path, text)
+        except OSError as error:
+            tk.messagebox.showwarning(title="Error saving file",
+                                      message=f"Can't save the file '{self.journal.path}': {error}")
+            return
+        self.journal.end_compaction()
+
+    def finish_journal(self):
+        """Write content of the journal to the file and remove the journal, return False if it failed"""
+        if self.journal is None:
+            return True
+        if self._journal_compaction_after_id is not None:
+            self.main_window.after_cancel(self._journal_compaction_after_id)
+            self._journal_compaction_after_id = None
+        self.flush_saves()
+        try:
+            self.last_save_report = self.todo_file.save(self.journal.path, self.journal.get_text())
+        except OSError as error:
+            tk.messagebox.showwarning(title="Error saving file",
+                                      message=f"Can't save the file '{self.journal.path}': {error}")
+            return False
+        self.journal.remove()
+        self.journal = None
+        return True
+
+    def schedule_save_results_poll(self):
+        if self._save_results_after_id is None:
+            self._save_results_after_id = self.main_window.after(self.SAVE_RESULTS_POLL_INTERVAL,
+                                                                 self.poll_save_results)
+
+    def poll_save_results(self):
+        self._save_results_after_id = None
+        self.handle_save_results()
+        if self.save_worker.has_pending_saves():
+            self.schedule_save_results_poll()
+
+    def handle_save_results(self):
+        """Show results of the background saves, return False if any of them failed"""
+        failures = []
+        for result in self.save_worker.get_results():
+            if isinstance(result, KanbanTxtStorage.SaveFailure):
+                failures.append(result)
+                continue
+            self.last_save_report = result
+            if self.profiler is not None:
+                self.profiler.add('background write', result.elapsed)
+            if self.journal is not None and result.path == self.journal.path:
+                self.journal.end_compaction()
+        self.save_button.hovertip.text = self.get_save_button_tooltip()
+        for failure in failures:
+            tk.messagebox.showwarning(title="Error saving file",
+                                      message=f"Can't save the file '{failure.path}': {failure.error}")
+        return len(failures) == 0
+
+    def flush_saves(self):
+        """Wait until the background saves are done, return False if any of them failed"""
+        if not self.save_worker.has_pending_saves():
+            return True
+        self.save_worker.flush()
+        return self.handle_save_results()
+
+    def on_main_window_close(self):
+        self.cancel_progressive_load()
+        is_saved = self.flush_saves()
+        self.merge_external_changes()
+        if not is_saved or not self.finish_journal():
+            should_close = tk.messagebox.askyesno(title="Error saving file",
+                                                  message="The last changes weren't saved. Close anyway?")
+            if not should_close:
+                return
+        if self.profiler is not None:
+            # the report can't keep the window open, its path is only logged
+            try:
+                logger.info("Profile report written to %s", self.profiler.write_report())
+            except OSError as error:
+                tk.messagebox.showwarning(title="Error writing profile report",
+                                          message=f"Can't write the profile report: {error}")
+        self.main_window.destroy()
+
+    def archive_done_tasks(self):
+        """Move tasks completed before the archive age from the editor to the archive next to the file,
+        return indexes of the archived lines"""
+        if self.archive_age <= 0:
+            return []
+        tasks = KanbanTxtModel.find_tasks_completed_before(
+            self.task_model.index.by_column[KanbanTxtModel.COLUMN_DONE],
+            date.today() - timedelta(days=self.archive_age))
+        if len(tasks) == 0:
+            return []
+        # tasks are from the last reload of the board, lines edited since then are archived by the next save
+        lines = self.text_editor.get("1.0", "end-1c").split('\n')
+        tasks = [task for task in tasks if task.index < len(lines) and lines[task.index] == task.raw_txt]
+        if len(tasks) == 0:
+            return []
+        archive_path = KanbanTxtStorage.get_archive_path(self.file)
+        try:
+            # the archive is written first, a failed save of the file can't lose the archived tasks
+            KanbanTxtStorage.append_to_archive(archive_path, [task.raw_txt for task in tasks])
+        except OSError as error:
+            tk.messagebox.showwarning(title="Error archiving tasks",
+                                      message=f"Can't write the archive '{archive_path}': {error}")
+            return []
+        archived_indexes = [task.index for task in tasks]
+        archived_index_set = set(archived_indexes)
+        self.replace_editor_lines('\n'.join(line for index, line in enumerate(lines) if index not in archived_index_set))
+        return archived_indexes
+
+    def on_show_archive_button(self, event=None):
+        if not self.file:
+            return
+        ArchiveDialog(self.main_window, KanbanTxtStorage.get_archive_path(self.file))
+
+    def watch_file(self):
+        """Check periodically, if the file was changed by another program"""
+        self.merge_external_changes()
+        self.main_window.after(self.FILE_WATCH_INTERVAL, self.watch_file)
+
+    def merge_external_changes(self):
+        """Merge changes of the file made by another program into the editor and the board
+
+        Lines changed by another program are merged with the changes made in the editor since
+        the file was read or saved, the user chooses which version to keep, if both changed the same lines."""
+        if not self.file or self.filter is not None or self.progressive_load is not None:
+            return
+        if self.save_worker.has_pending_saves():
+            # the file is being written, it's checked again when the write is done
+            return
+        remote = self.todo_file.get_external_change(self.file)
+        if remote is None:
+            return
+        local = self.text_editor.get("1.0", "end-1c")
+        merge = KanbanTxtStorage.ThreeWayMerge(self.todo_file.text, local, remote)
+        prefer_local = True
+        if len(merge.conflicts) > 0:
+            conflict_lines = ', '.join(str(conflict.line) for conflict in merge.conflicts)
+            prefer_local = tk.messagebox.askyesno(
+                title="File changed by another program",
+                message=f"The file '{pathlib.Path(self.file).name}' was changed by another program "
+                        f"and the changes conflict with your changes in lines: {conflict_lines}.\n\n"
+                        f"Keep your version of these lines? Otherwise they are replaced with the version "
+                        f"from the file.")
+        text = merge.get_text(prefer_local)
+        self.todo_file.remember_read(self.file, remote)
+
+        if self.journal is not None:
+            # the journal holds changes of the previous content of the file, they're part of the local text
+            if self._journal_compaction_after_id is not None:
+                self.main_window.after_cancel(self._journal_compaction_after_id)
+                self._journal_compaction_after_id = None
+            # the journal is removed only once the merged text is written, so local changes aren't lost
+            # if the write fails
+            is_saved = text == remote
+            if not is_saved:
+                self.flush_saves()
+                try:
+                    self.last_save_report = self.todo_file.save(self.file, text)
+                    self.save_button.hovertip.text = self.get_save_button_tooltip()
+                    is_saved = True
+                except OSError as error:
+                    tk.messagebox.showwarning(title="Error saving file",
+                                              message=f"Can't save the file '{self.file}': {error}")
+            if is_saved:
+                self.journal.remove()
+                self.journal = None
+
+        self.replace_editor_lines(text)
+        self.non_filtered_content = text
+        self.filter_index.update(text)
+        self.parse_todo_txt(text)
+        self.schedule_update_of_editor_line_colors(None)
+
+    def replace_editor_lines(self, text):
+        """Replace only the lines of the editor, which are different in the text, so the cursor stays
+        in its line"""
+        old_lines = self.text_editor.get("1.0", "end-1c").split('\n')
+        lines = text.split('\n')
+        if lines == old_lines:
+            return
+        prefix = KanbanTxtModel.common_prefix_length(old_lines, lines)
+        suffix = KanbanTxtModel.common_suffix_length(old_lines, lines, min(len(old_lines), len(lines)) - prefix)
+        if suffix > 0:
+            # lines of the Text widget are counted from 1
+            self.text_editor.delete(f"{prefix + 1}.0", f"{len(old_lines) - suffix + 1}.0")
+            self.text_editor.insert(f"{prefix + 1}.0", ''.join(line + '\n' for line in lines[prefix:len(lines) - suffix]))
+        elif prefix > 0:
+            # the last line has no line break, the changed lines start after the last common one
+            self.text_editor.delete(f"{prefix}.end", "end-1c")
+            self.text_editor.insert(f"{prefix}.end", ''.join('\n' + line for line in lines[prefix:]))
+        else:
+            self.text_editor.delete("1.0", "end-1c")
+            self.text_editor.insert("1.0", text)
+
+    def get_save_button_tooltip(self):
+        tooltip = "Reload UI and save file"
+        last_save = self.last_save_report
+        if last_save is None:
+            return tooltip
+        elapsed_ms = last_save.elapsed * 1000
+        if isinstance(last_save, KanbanTxtStorage.JournalReport):
+            return (f"{tooltip}\nLast save: {last_save.bytes_appended} bytes appended to the journal "
+                    f"in {elapsed_ms:.1f} ms, the journal has {last_save.journal_size} bytes")
+        if last_save.is_written:
+            tooltip += f"\nLast save: {last_save.bytes_written} bytes written in {elapsed_ms:.1f} ms"
+        else:
+            tooltip += f"\nLast save: skipped, the file is up to date ({elapsed_ms:.1f} ms)"
+        if last_save.coalesced_saves > 1:
+            tooltip += f", {last_save.coalesced_saves} saves merged"
+        return tooltip
+
     def reload_and_create_file(self, event=None):
         """In case no file were open, open a dialog to choose where to save the 
             current data"""
+        if self.progressive_load is not None:
+            return
         if not os.path.isfile(self.file):
             new_file = filedialog.asksaveasfile(
                 initialdir='.',
@@ -2079,7 +3415,7 @@ class KanbanTxtViewer:
     def on_switch_darkmode(self, event):
         """Switch from light and dark mode, destroy the UI and recreate it to
             apply the modification"""
-        if self.filter is not None:
+        if self.filter is not None or self.progressive_load is not None:
             return
         self.darkmode = not self.darkmode
         self.recreate_main_window()
@@ -2091,6 +3427,11 @@ class KanbanTxtViewer:
 
         self.main_window.destroy()
         self.draw_ui(int(width), int(height), int(x), int(y))
+        # callbacks scheduled in the destroyed window won't be called, the journal is compacted after the next change
+        self._save_results_after_id = None
+        self._journal_compaction_after_id = None
+        if self.save_worker.has_pending_saves():
+            self.schedule_save_results_poll()
         self.main_window.state(window_state)
         self.store_in_config(self.CONFIG_KEY_DARKMODE, self.darkmode)
         self.save_config_file()
@@ -2127,14 +3468,7 @@ class KanbanTxtViewer:
         self.text_editor.delete("insert linestart", "insert lineend + 1c")
 
     def set_state(self, task, newState):
-        task = re.sub(rf'\s{self.KANBAN_KEY}:[^\s^:]+', '', task)
-        task = re.sub(r'^x ', '', task)
-        task = re.sub(r'^ ', '', task)
-        if newState == 'x':
-            task = newState + ' ' + task
-        else:
-            task = task + newState
-        return task
+        return KanbanTxtModel.set_task_state(task, newState, date.today())
 
     def set_priority(self, task, new_priority):
         priority_done_r = re.compile(r'^x \([A-Z]\) ')
@@ -2265,6 +3599,9 @@ class KanbanTxtViewer:
 
     def update_canvas(self, event):
         self.content_canvas.itemconfig(self.canvas_frame, width = event.width)
+        # text in cards is wrapped to their width, so their heights have to be measured again
+        self.card_heights.clear()
+        self.column_card_offsets.clear()
 
         if event.width < 700:
             index = 1
@@ -2281,7 +3618,8 @@ class KanbanTxtViewer:
                 index += 1
 
         self.display_content()
-        pass
+        if self.are_columns_virtualized():
+            self.schedule_update_of_virtual_columns()
 
     def is_deletion_forbidden(self, is_removing_rhs=False):
         allow_delete = True
@@ -2395,47 +3733,109 @@ class KanbanTxtViewer:
         self.main_window.after(100, self.update_editor_line_colors)
 
     def update_editor_line_colors(self, event=None):
+        selected_line = self.highlight_card_of_selected_line()
+        self.update_editor_stripes()
+        self.update_editor_current_line(selected_line)
+
+    def get_editor_line(self, index):
+        return int(self.text_editor.index(index).split('.')[0])
+
+    def add_editor_change(self, first_line, last_line, shifts_lines):
+        changes = self.editor_changes
+        if changes is None:
+            self.editor_changes = [first_line, last_line, shifts_lines]
+        else:
+            changes[0] = min(changes[0], first_line)
+            changes[1] = max(changes[1], last_line)
+            changes[2] = changes[2] or shifts_lines
+
+    def on_editor_insert(self, index, chars, *args):
+        line = self.get_editor_line(index)
+        # args are optional tags followed by more chars and tags
+        new_lines = chars.count('\n') + sum(str(text).count('\n') for text in args[1::2])
+        self.add_editor_change(line, line + new_lines, new_lines > 0)
+        return self.editor_insert(index, chars, *args)
+
+    def on_editor_delete(self, index1, index2=None, *args):
+        # args are optional more ranges of deleted characters
+        ranges = [(index1, index2)] + list(zip(args[::2], args[1::2] + (None,)))
+        for first_index, last_index in ranges:
+            first_line = self.get_editor_line(first_index)
+            last_line = self.get_editor_line(last_index if last_index is not None else f"{first_index} +1c")
+            self.add_editor_change(first_line, last_line, last_line != first_line)
+        if index2 is None:
+            return self.editor_delete(index1)
+        return self.editor_delete(index1, index2, *args)
+
+    def update_editor_stripes(self):
+        """Tag every second line of the editor, from the first line changed since the last time
+
+        Lines after a change, which inserted or removed lines, are tagged again, as they moved. Otherwise,
+        only the changed lines are tagged again."""
+        changes = self.editor_changes
+        if changes is None:
+            if not self.text_editor.edit_modified():
+                return
+            # changed without the redirected commands, all lines are tagged again
+            changes = [1, 1, True]
+        self.editor_changes = None
+        first_line, last_line, shifts_lines = changes
         nb_line = int(self.text_editor.index('end-1c').split('.')[0])
+        if shifts_lines or last_line > nb_line:
+            last_line = nb_line
+        first_line = max(1, min(first_line, nb_line))
+        # all stripes are added by a single call, with the ranges of lines as its arguments
+        stripe_ranges = []
+        for line_idx in range(first_line + first_line % 2, last_line + 1, 2):
+            stripe_ranges.append(f"{line_idx}.0")
+            stripe_ranges.append(f"{line_idx + 1}.0")
+        self.text_editor.tag_remove('pair', f"{first_line}.0", f"{last_line + 1}.0")
+        if len(stripe_ranges) > 0:
+            self.text_editor.tag_add('pair', *stripe_ranges)
+        self.text_editor.edit_modified(False)
+
+    def update_editor_current_line(self, selected_line):
+        """Move the current line tag from the previous line to the selected one"""
+        line_start = f"{selected_line}.0"
+        line_end = f"{selected_line + 1}.0"
+        previous_ranges = self.text_editor.tag_ranges('current_pos')
+        if len(previous_ranges) == 2 and self.text_editor.compare(previous_ranges[0], '==', line_start) \
+                and self.text_editor.compare(previous_ranges[1], '==', line_end):
+            return
+        for i in range(0, len(previous_ranges), 2):
+            self.text_editor.tag_remove('current_pos', previous_ranges[i], previous_ranges[i + 1])
+        self.text_editor.tag_add('current_pos', line_start, line_end)
 
+    def highlight_card_of_selected_line(self):
+        """Highlight the card of the task in the editor line with the cursor, return number of the line"""
         selected_line = int(self.text_editor.index(tk.INSERT).split('.')[0])
-        task_card_found = False
-        columns = self.kanban_frame.winfo_children()
-        for column in columns:
-            if task_card_found:
-                break
-            task_cards = column.winfo_children()[2].winfo_children()
-            for task_card in task_cards:
-                if task_card.winfo_name().endswith(f"task#{selected_line}"):
-                    self.highlight_selected_task_card(task_card)
-                    task_card_found = True
-                    break
-        if not task_card_found:
-            self.highlight_selected_task_card(None)
-
-        for line_idx in range(nb_line + 1):
-            self.text_editor.tag_remove('pair', str(line_idx) + '.0', str(line_idx) + '.0 lineend +1c')
-            self.text_editor.tag_remove('current_pos', str(line_idx) + '.0', str(line_idx) + '.0 lineend +1c')
-            if line_idx == selected_line:
-                self.text_editor.tag_add('current_pos', str(line_idx) + '.0', str(line_idx) + '.0 lineend +1c')
-            elif line_idx % 2 == 0:
-                self.text_editor.tag_add('pair', str(line_idx) + '.0', str(line_idx) + '.0 lineend +1c')
+        # lines are mapped to tasks by the model, and tasks to their cards, when cards are drawn
+        task = self.get_task_of_line(selected_line)
+        if self.card_renderer == self.CARD_RENDERER_CANVAS:
+            for ui_column in self.ui_columns.values():
+                ui_column.card_column.highlight(task)
+            return selected_line
+
+        card = self.card_widgets.get(task)
+        self.highlight_selected_task_card(card.highlight_frame if card is not None else None)
+        return selected_line
 
     def get_task_card_frame_widget(self, any_subwidget):
-        # get first parent which starts with "highlightFrame" in its name
+        # get first parent which is the highlight frame of a task card
         selected_task_card_frame = None
         parent = any_subwidget
         max_depth = 5
         for i in range(0, max_depth):
             if parent is None:
                 break
-            if parent.winfo_name().startswith("highlightFrame"):
+            if hasattr(parent, 'task_card'):
                 selected_task_card_frame = parent
                 break
             parent = parent.master
         return selected_task_card_frame
 
     def highlight_selected_task_card(self, selected_widget):
-        # get first parent which starts with "highlightFrame" in its name
+        # get first parent which is the highlight frame of a task card
         selected_highlight_frame = self.get_task_card_frame_widget(selected_widget)
 
         if self.selected_task_card is not None:
@@ -2451,9 +3851,22 @@ class KanbanTxtViewer:
     def highlight_task(self, event):
         self.clear_drop_areas_frame()
         selected_widget = event.widget
-        self.highlight_selected_task_card(selected_widget)
-        searched_task_line = selected_widget.winfo_name()[1:].replace("task#", "")
-        self.text_editor.mark_set('insert', searched_task_line + ".end")
+        card_column = getattr(selected_widget, 'card_column', None)
+        if card_column is not None:
+            task = card_column.get_task_at(event.x, event.y)
+            self.has_drag_source = task is not None
+            if task is None:
+                # the previously selected card mustn't be dragged from an empty place
+                for ui_column in self.ui_columns.values():
+                    ui_column.card_column.highlight(None)
+                return
+            card_column.highlight(task)
+            searched_task_line = task.index + 1
+        else:
+            self.highlight_selected_task_card(selected_widget)
+            self.has_drag_source = True
+            searched_task_line = self.get_task_card_frame_widget(selected_widget).task_card.line
+        self.text_editor.mark_set('insert', f"{searched_task_line}.end")
         self.text_editor.see('insert')
         self.schedule_update_of_editor_line_colors()
 
@@ -2493,7 +3906,7 @@ class KanbanTxtViewer:
 
 def main(args):
     
-    app = KanbanTxtViewer(args.file, args.darkmode)
+    app = KanbanTxtViewer(args.file, args.darkmode, args.profile)
     if os.name == 'nt':
         app.main_window.state('zoomed')
     app.main_window.mainloop()
@@ -2505,5 +3918,9 @@ if __name__ == '__main__':
     arg_parser = argparse.ArgumentParser(description='Display a todo.txt file as a kanban and allow to edit it')
     arg_parser.add_argument('--file', help='Path to a todo.txt file', required=False, default='', type=str)
     arg_parser.add_argument('--darkmode', help='Is the UI should use dark theme', required=False, default=None, action='store_true')
+    arg_parser.add_argument('--profile', help='Show timings of reloading the board and saving the file, '
+                                              'and write them to a report when the window is closed',
+                            required=False, default=False, action='store_true')
     args = arg_parser.parse_args()
+    logging.basicConfig(format='%(message)s', level=logging.INFO if args.profile else logging.WARNING)
     main(args)
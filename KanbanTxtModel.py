@@ -0,0 +1,908 @@
+# KanbanTxt - A light todo.txt editor that display the to do list as a kanban board.
+# Copyright (C) 2022  KrisNumber24
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.
+# If not, see https://github.com/KrisNumber24/KanbanTxt/blob/main/LICENSE.
+
+"""GUI-free model of a todo.txt file, as displayed by the kanban board.
+
+This module doesn't depend on tkinter, so it can be imported and used to parse
+todo.txt files on machines without a display.
+"""
+
+import re
+from collections import defaultdict
+from datetime import date
+from functools import lru_cache
+
+
+KANBAN_KEY = "knbn"
+
+KANBAN_VAL_IN_PROGRESS = "in_progress"
+
+KANBAN_VAL_VALIDATION = "validation"
+
+# Indexes of the kanban columns, the names of the columns are configurable in the UI
+COLUMN_TODO = 0
+COLUMN_IN_PROGRESS = 1
+COLUMN_VALIDATION = 2
+COLUMN_DONE = 3
+COLUMNS_COUNT = 4
+
+KANBAN_VAL_TO_COLUMN = {
+    KANBAN_VAL_IN_PROGRESS: COLUMN_IN_PROGRESS,
+    KANBAN_VAL_VALIDATION: COLUMN_VALIDATION,
+}
+
+# Structured beginning of a task: done marking, priority and dates. Lookahead at the end ensures
+# that at least one character of the subject is left, so it backtracks the same way as matching
+# the whole line with the subject group would.
+TASK_HEAD_R = re.compile(
+    r'(?P<isDone>x )? '
+    r'?(?P<priority>\([A-Z]\))? '
+    r'?(?P<dates>\d\d\d\d-\d\d-\d\d( \d\d\d\d-\d\d-\d\d)?)? '
+    r'?(?=.)')
+
+# Whitespace separated tokens, which may be tags: containing a colon (special key-val data) or
+# starting with "+" or "@" (project or context tag). Other tokens are a part of the subject only.
+TAG_TOKEN_R = re.compile(r'(?<!\S)(?=\S*:|[+@]\S)\S+')
+
+
+def parse_date(text):
+    """Convert an ISO formatted date to the date object, None if it's not a valid date"""
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+class Task:
+    """Single task, parsed from a non-empty line of a todo.txt file"""
+    __slots__ = (
+        'index',
+        'raw_txt',
+        'is_done',
+        'priority',
+        'start_date',
+        'end_date',
+        'subject',
+        'projects',
+        'contexts',
+        'special_kv_data',
+        'column',
+        'sort_keys',
+    )
+
+    def __init__(self, index, raw_txt):
+        self.index = index
+        self.raw_txt = raw_txt
+        self.is_done = False
+        self.priority = None
+        self.start_date = None
+        self.end_date = None
+        self.subject = ''
+        self.projects = ()
+        self.contexts = ()
+        self.special_kv_data = ()
+        self.column = COLUMN_TODO
+        # sort keys by their names, computed when the task is sorted by them for the first time
+        self.sort_keys = {}
+
+    def __repr__(self):
+        return f"Task({self.index}, {self.raw_txt!r})"
+
+
+def split_special_kv(token):
+    """Find special key-val pairs in a single whitespace-free token.
+
+    Return the list of (key, val) pairs and the token with the pairs removed. Pairs are matched
+    like the `key:val` regex would do it: the earliest non-empty `key` followed by a colon and
+    non-empty `val`, none of them containing a colon, without overlapping."""
+    segments = token.split(':')
+    pairs = []
+    remainder = []
+    i = 0
+    last = len(segments) - 1
+    while i < last:
+        if segments[i] and segments[i + 1]:
+            pairs.append((segments[i], segments[i + 1]))
+            remainder.append('')
+            i += 2
+        else:
+            remainder.append(segments[i])
+            i += 1
+    if i == last:
+        remainder.append(segments[last])
+    return pairs, ':'.join(remainder)
+
+
+def parse_task(task_txt, index):
+    """Parse a single line of todo.txt, return None for empty lines
+
+    The line is scanned once for the tokens, which may be a special key-val data, a project or a
+    context tag. The subject is built from the text between these tokens, without the tags, so it's
+    the same as removing the tags from the subject with regexes."""
+    if len(task_txt) == 0:
+        return None
+
+    task = Task(index, task_txt)
+    head = TASK_HEAD_R.match(task_txt)
+    subject_start = head.end()
+
+    special_kv_data = []
+    projects = []
+    contexts = []
+    subject = []
+    # beginning of the part of the line, which wasn't yet copied to the subject
+    copy_start = subject_start
+
+    for m in TAG_TOKEN_R.finditer(task_txt):
+        token = m.group()
+        token_start = m.start()
+
+        remainder = token
+        if ':' in token:
+            pairs, remainder = split_special_kv(token)
+            special_kv_data.extend(pairs)
+
+        # project and context tags must be preceded by a space
+        is_after_space = token_start > 0 and task_txt[token_start - 1] == ' '
+        if is_after_space and len(token) > 1:
+            if token[0] == '+':
+                projects.append(token)
+            elif token[0] == '@':
+                contexts.append(token)
+
+        if m.end() <= subject_start:
+            continue
+
+        if token_start < subject_start:
+            # the subject begins inside this token, e.g. "(A)key:val"
+            subject_token = token[subject_start - token_start:]
+            subject.append(split_special_kv(subject_token)[1] if ':' in subject_token else subject_token)
+        elif is_after_space and token_start > subject_start and len(remainder) > 1 and remainder[0] in '+@':
+            # the tag is removed from the subject along with the preceding space
+            subject.append(task_txt[copy_start:token_start - 1])
+        else:
+            subject.append(task_txt[copy_start:token_start])
+            subject.append(remainder)
+        copy_start = m.end()
+
+    subject.append(task_txt[copy_start:])
+
+    task.special_kv_data = tuple(special_kv_data)
+    task.projects = tuple(projects)
+    task.contexts = tuple(contexts)
+    task.subject = ''.join(subject)
+
+    for key, val in special_kv_data:
+        if key == KANBAN_KEY and val in KANBAN_VAL_TO_COLUMN:
+            task.column = KANBAN_VAL_TO_COLUMN[val]
+            break
+
+    if head['isDone']:
+        task.is_done = True
+        task.column = COLUMN_DONE
+
+    if head['priority']:
+        task.priority = head['priority'][1]  # get only letter without parenthesis
+
+    if head['dates']:
+        dates = head['dates'].split(' ')
+        if len(dates) == 1:
+            task.start_date = parse_date(dates[0])
+        elif len(dates) == 2:
+            task.start_date = parse_date(dates[1])
+            task.end_date = parse_date(dates[0])
+
+    return task
+
+
+def common_prefix_length(a, b):
+    """Return the number of equal items at the beginning of both lists"""
+    lo, hi = 0, min(len(a), len(b))
+    # compare growing slices, so most of the work is done by the list comparison
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def common_suffix_length(a, b, limit):
+    """Return the number of equal items at the end of both lists, not greater than limit"""
+    len_a, len_b = len(a), len(b)
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len_a - mid:len_a - lo] == b[len_b - mid:len_b - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+# characters before a word in a tag, words of tags are ranked before other matches
+TAG_WORD_SEPARATORS = '-_./'
+
+# length of n-grams of tags kept in the TagSearchIndex, shorter patterns are checked with each tag
+TAG_GRAM_LENGTH = 3
+
+
+def get_grams(text, length=TAG_GRAM_LENGTH):
+    return {text[i:i + length] for i in range(len(text) - length + 1)}
+
+
+class TagSearchIndex:
+    """Case folded names of tags, and sets of tags by trigrams of their names
+
+    The trigrams are collected when a pattern long enough to use them is searched for the first time,
+    and then updated along with the tags."""
+
+    def __init__(self, tags=()):
+        self.folded_tags = {tag: tag.casefold() for tag in tags}
+        self.grams = None
+
+    def add(self, tag):
+        folded_tag = tag.casefold()
+        self.folded_tags[tag] = folded_tag
+        if self.grams is not None:
+            for gram in get_grams(folded_tag):
+                self.grams[gram].add(tag)
+
+    def remove(self, tag):
+        folded_tag = self.folded_tags.pop(tag, None)
+        if folded_tag is None or self.grams is None:
+            return
+        for gram in get_grams(folded_tag):
+            tags = self.grams[gram]
+            tags.discard(tag)
+            if len(tags) == 0:
+                del self.grams[gram]
+
+    def get_candidates(self, folded_pattern):
+        """Return tags which may contain the pattern, those containing all of its trigrams,
+        None if the pattern is too short to tell"""
+        if len(folded_pattern) < TAG_GRAM_LENGTH:
+            return None
+        if self.grams is None:
+            self.grams = defaultdict(set)
+            for tag, folded_tag in self.folded_tags.items():
+                for gram in get_grams(folded_tag):
+                    self.grams[gram].add(tag)
+        # intersection starts from the rarest trigram
+        postings = sorted((self.grams.get(gram, set()) for gram in get_grams(folded_pattern)), key=len)
+        if len(postings[0]) == 0:
+            return set()
+        return postings[0].intersection(*postings[1:])
+
+    def search(self, pattern, tag_positions=None):
+        """Return tags containing the pattern, case insensitive, ranked by the class of the match
+        (prefix of the name, beginning of a word, any other substring) and then by their order
+        in the `tag_positions` dict, of tags and their positions in a sorted list"""
+        folded_pattern = pattern.casefold()
+        folded_tags = self.folded_tags
+        if tag_positions is None:
+            tag_positions = folded_tags
+        candidates = self.get_candidates(folded_pattern)
+        if candidates is None:
+            ordered_candidates = tag_positions
+        elif len(candidates) * 8 < len(tag_positions):
+            ordered_candidates = sorted(candidates, key=tag_positions.get)
+        else:
+            ordered_candidates = (tag for tag in tag_positions if tag in candidates)
+        prefix_matches = []
+        word_matches = []
+        substring_matches = []
+        for tag in ordered_candidates:
+            folded_tag = folded_tags[tag]
+            position = folded_tag.find(folded_pattern)
+            if position < 0:
+                continue
+            if position == 0 or (position == 1 and folded_tag[0] in '+@'):
+                prefix_matches.append(tag)
+            elif folded_tag[position - 1] in TAG_WORD_SEPARATORS:
+                word_matches.append(tag)
+            else:
+                substring_matches.append(tag)
+        return prefix_matches + word_matches + substring_matches
+
+    def search_fuzzy(self, pattern, tag_positions=None):
+        """Return tags containing characters of the pattern in the same order, but not the whole pattern,
+        in their order in the `tag_positions` dict"""
+        folded_pattern = pattern.casefold()
+        if len(folded_pattern) < 2:
+            return []
+        fuzzy_r = re.compile('.*?'.join(re.escape(character) for character in folded_pattern))
+        folded_tags = self.folded_tags
+        matches = []
+        for tag in folded_tags if tag_positions is None else tag_positions:
+            folded_tag = folded_tags[tag]
+            if folded_pattern not in folded_tag and fuzzy_r.search(folded_tag):
+                matches.append(tag)
+        return matches
+
+
+KANBAN_STATE_R = re.compile(rf'\s{KANBAN_KEY}:[^\s^:]+')
+
+# completion date of a done task, followed by its creation date, after the done mark is removed
+COMPLETION_DATE_R = re.compile(r'^(\([A-Z]\) )?\d\d\d\d-\d\d-\d\d (?=\d\d\d\d-\d\d-\d\d )')
+
+PRIORITY_PREFIX_R = re.compile(r'^(\([A-Z]\) )?')
+CREATION_DATE_R = re.compile(r'\d\d\d\d-\d\d-\d\d ')
+
+
+def set_task_state(task_txt, new_state, day):
+    """Return the todo.txt line moved to another kanban column
+
+    The new state is "x" for the done column, or the knbn:value tag appended for the other columns.
+    Tasks marked as done get the day as their completion date, before the creation date, as in
+    `x (A) 2023-01-31 2023-01-01 task`, or as both dates, if they have no creation date. Tasks moved out of the done column lose their completion date."""
+    was_done = task_txt.startswith('x ')
+    task_txt = KANBAN_STATE_R.sub('', task_txt)
+    if was_done:
+        task_txt = task_txt[2:]
+    if task_txt.startswith(' '):
+        task_txt = task_txt[1:]
+    if was_done:
+        if new_state == 'x':
+            return 'x ' + task_txt
+        task_txt = COMPLETION_DATE_R.sub(r'\1', task_txt)
+    if new_state == 'x':
+        # todo.txt allows the completion date only with the creation date, a task without one gets the day as both
+        priority = PRIORITY_PREFIX_R.match(task_txt).group()
+        has_creation_date = CREATION_DATE_R.match(task_txt, len(priority)) is not None
+        dates = f"{day} " if has_creation_date else f"{day} {day} "
+        return f"x {priority}{dates}{task_txt[len(priority):]}"
+    return task_txt + new_state
+
+
+def find_tasks_completed_before(tasks, day):
+    """Return the tasks with the completion date before the day, in order of their lines
+
+    The tasks are expected to be done, e.g. from the `by_column` set of the done column of the TaskIndex."""
+    return sorted((task for task in tasks if task.end_date is not None and task.end_date < day),
+                  key=lambda task: task.index)
+
+
+class TaskIndex:
+    """Sets of tasks by their column, priority, tags and special key-val data"""
+
+    def __init__(self, tasks=()):
+        self.by_column = [set() for _ in range(COLUMNS_COUNT)]
+        # by priority letter, None for tasks without priority
+        self.by_priority = defaultdict(set)
+        # by tags as they are written, e.g. "+project"
+        self.by_project = defaultdict(set)
+        self.by_context = defaultdict(set)
+        # by key of special key-val data, and by (key, val) pairs
+        self.by_special_key = defaultdict(set)
+        self.by_special_kv = defaultdict(set)
+        # number of tasks added so far, and its value when each tag was added with a task for the last time
+        self.added_count = 0
+        self.tag_last_added = {}
+        # TagSearchIndex of `by_project` and `by_context` tags, created when it's used for the first time
+        self.tag_searches = {}
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task):
+        self.added_count += 1
+        self.by_column[task.column].add(task)
+        self.by_priority[task.priority].add(task)
+        for project in task.projects:
+            self._add_tag('by_project', project, task)
+        for context in task.contexts:
+            self._add_tag('by_context', context, task)
+        for key, val in task.special_kv_data:
+            self.by_special_key[key].add(task)
+            self.by_special_kv[(key, val)].add(task)
+
+    def remove(self, task):
+        self.by_column[task.column].discard(task)
+        self._discard(self.by_priority, task.priority, task)
+        for project in task.projects:
+            self._remove_tag('by_project', project, task)
+        for context in task.contexts:
+            self._remove_tag('by_context', context, task)
+        for key, val in task.special_kv_data:
+            self._discard(self.by_special_key, key, task)
+            self._discard(self.by_special_kv, (key, val), task)
+
+    def _add_tag(self, index_name, tag, task):
+        tasks_by_tag = getattr(self, index_name)
+        if tag not in tasks_by_tag and index_name in self.tag_searches:
+            self.tag_searches[index_name].add(tag)
+        tasks_by_tag[tag].add(task)
+        self.tag_last_added[tag] = self.added_count
+
+    def _remove_tag(self, index_name, tag, task):
+        tasks_by_tag = getattr(self, index_name)
+        self._discard(tasks_by_tag, tag, task)
+        if tag not in tasks_by_tag:
+            self.tag_last_added.pop(tag, None)
+            if index_name in self.tag_searches:
+                self.tag_searches[index_name].remove(tag)
+
+    def get_tag_search(self, index_name):
+        """Return TagSearchIndex of tags from `by_project` or `by_context`"""
+        tag_search = self.tag_searches.get(index_name)
+        if tag_search is None:
+            tag_search = TagSearchIndex(getattr(self, index_name))
+            self.tag_searches[index_name] = tag_search
+        return tag_search
+
+    def get_tag_usage(self, index_name):
+        """Return (tag, number of tasks, last addition) of tags from `by_project` or `by_context`"""
+        return [(tag, len(tasks), self.tag_last_added[tag]) for tag, tasks in getattr(self, index_name).items()]
+
+    @staticmethod
+    def _discard(tasks_by_key, key, task):
+        # keys without tasks are removed, so only keys of the existing tasks are listed
+        tasks = tasks_by_key.get(key)
+        if tasks is not None:
+            tasks.discard(task)
+            if len(tasks) == 0:
+                del tasks_by_key[key]
+
+
+class TaskModel:
+    """Tasks of a todo.txt content, in order of their definition in the txt"""
+
+    def __init__(self, text=None):
+        self.tasks = []
+        self.lines = []
+        # task defined in each line, None for empty lines
+        self.line_tasks = []
+        # tasks added and removed by the last parse or update
+        self.added_tasks = []
+        self.removed_tasks = []
+        # tasks of lines moved by the last update, which got their index changed
+        self.moved_tasks = []
+        # incremented by each change of the tasks, see SortedColumns.sync
+        self.version = 0
+        # number of lines parsed by the last parse or update
+        self.reparsed_lines = 0
+        self._index = None
+        if text is not None:
+            self.parse(text)
+
+    @property
+    def line_count(self):
+        return len(self.lines)
+
+    @property
+    def index(self):
+        """Index of the tasks, built when it's used for the first time and then updated along with the tasks"""
+        if self._index is None:
+            self._index = TaskIndex(self.tasks)
+        return self._index
+
+    def parse(self, text):
+        """Parse the whole todo.txt content, replacing the current tasks"""
+        self.lines = text.split('\n')
+        self.line_tasks = [parse_task(task_txt, index) for index, task_txt in enumerate(self.lines)]
+        self.removed_tasks = self.tasks
+        self.tasks = list(filter(None, self.line_tasks))
+        self.added_tasks = list(self.tasks)
+        self.moved_tasks = []
+        self.reparsed_lines = len(self.tasks)
+        self.version += 1
+        # once the index is used, it's kept along with the tasks
+        self._index = TaskIndex(self.tasks) if self._index is not None else None
+        return self.tasks
+
+    def update(self, text):
+        """Parse the todo.txt content, reusing tasks of lines which didn't change since the last parse
+
+        Unchanged lines at the beginning and at the end are skipped. In the changed region, lines
+        are looked up by their content, so only inserted or edited lines are parsed again, and
+        lines moved within the region are reused too. Reused tasks get their line index updated,
+        when lines were inserted or removed before them."""
+        lines = text.split('\n')
+        old_lines = self.lines
+        self.added_tasks = []
+        self.removed_tasks = []
+        self.moved_tasks = []
+        self.reparsed_lines = 0
+        if lines == old_lines:
+            return self.tasks
+        self.version += 1
+
+        prefix = common_prefix_length(old_lines, lines)
+        suffix = common_suffix_length(old_lines, lines, min(len(old_lines), len(lines)) - prefix)
+        old_end = len(old_lines) - suffix
+        new_end = len(lines) - suffix
+
+        previous_tasks = {}
+        for task in self.line_tasks[prefix:old_end]:
+            if task is None:
+                continue
+            same_line_tasks = previous_tasks.get(task.raw_txt)
+            if same_line_tasks is None:
+                previous_tasks[task.raw_txt] = [task]
+            else:
+                same_line_tasks.append(task)
+
+        changed_line_tasks = []
+        for index in range(prefix, new_end):
+            task_txt = lines[index]
+            task = None
+            if len(task_txt) != 0:
+                same_line_tasks = previous_tasks.get(task_txt)
+                if same_line_tasks:
+                    task = same_line_tasks.pop(0)
+                    if task.index != index:
+                        task.index = index
+                        self.moved_tasks.append(task)
+                else:
+                    task = parse_task(task_txt, index)
+                    self.added_tasks.append(task)
+            changed_line_tasks.append(task)
+
+        suffix_tasks = self.line_tasks[old_end:]
+        shift = new_end - old_end
+        if shift != 0:
+            for task in suffix_tasks:
+                if task is not None:
+                    task.index += shift
+
+        self.lines = lines
+        self.line_tasks[prefix:] = changed_line_tasks + suffix_tasks
+        self.tasks = list(filter(None, self.line_tasks))
+        self.removed_tasks = [task for same_line_tasks in previous_tasks.values() for task in same_line_tasks]
+        self.reparsed_lines = len(self.added_tasks)
+        if self._index is not None:
+            for task in self.removed_tasks:
+                self._index.remove(task)
+            for task in self.added_tasks:
+                self._index.add(task)
+        return self.tasks
+
+    def extend(self, text):
+        """Parse text appended at the end of the content, without comparing the other lines
+
+        The text continues the last line of the content, so it's parsed again too."""
+        new_lines = text.split('\n')
+        self.added_tasks = []
+        self.removed_tasks = []
+        self.moved_tasks = []
+        self.version += 1
+        start = 0
+        if len(self.lines) > 0:
+            start = len(self.lines) - 1
+            new_lines[0] = self.lines.pop() + new_lines[0]
+            last_task = self.line_tasks.pop()
+            if last_task is not None:
+                self.tasks.pop()
+                self.removed_tasks.append(last_task)
+        for index, task_txt in enumerate(new_lines, start):
+            task = parse_task(task_txt, index)
+            self.line_tasks.append(task)
+            if task is not None:
+                self.tasks.append(task)
+                self.added_tasks.append(task)
+        self.lines.extend(new_lines)
+        self.reparsed_lines = len(self.added_tasks)
+        if self._index is not None:
+            for task in self.removed_tasks:
+                self._index.remove(task)
+            for task in self.added_tasks:
+                self._index.add(task)
+        return self.tasks
+
+    def get_column_tasks(self, column):
+        return [task for task in self.tasks if task.column == column]
+
+    def count_by_column(self):
+        return [len(tasks) for tasks in self.index.by_column]
+
+
+SORT_KEY_PRIORITY = 'priority'
+SORT_KEY_ORDER = 'order'
+SORT_KEY_SUBJECT = 'subject'
+SORT_KEY_TEXT = 'text'
+SORT_KEY_PROJECT = 'project'
+SORT_KEY_CONTEXT = 'context'
+
+# sorts after any tag, for tasks without tags
+NO_TAGS_SORT_KEY = chr(ord('z') + 1)
+
+
+def get_tags_sort_key(tags, tag_indicator):
+    if len(tags) < 1:
+        return NO_TAGS_SORT_KEY
+    return ' '.join(sorted(tag.casefold() for tag in tags)).replace(tag_indicator, '')
+
+
+SORT_KEY_FUNCTIONS = {
+    SORT_KEY_PRIORITY: lambda task: task.priority if task.priority is not None else 'z',
+    # ties of sort keys are ordered by line indexes, which change when lines are inserted, so they aren't cached
+    SORT_KEY_ORDER: lambda task: 0,
+    SORT_KEY_SUBJECT: lambda task: task.subject,
+    SORT_KEY_TEXT: lambda task: task.raw_txt,
+    SORT_KEY_PROJECT: lambda task: get_tags_sort_key(task.projects, '+'),
+    SORT_KEY_CONTEXT: lambda task: get_tags_sort_key(task.contexts, '@'),
+}
+
+
+def get_sort_key(task, key_name):
+    """Return the sort key of the task, computed once for each task"""
+    key = task.sort_keys.get(key_name)
+    if key is None:
+        key = SORT_KEY_FUNCTIONS[key_name](task)
+        task.sort_keys[key_name] = key
+    return key
+
+
+class SortMethod:
+    """Order of tasks by a single sort key, ties in order of their lines
+
+    Reversed order is kept as the ascending order of the key, with reversed line order of ties,
+    and read from the end."""
+
+    def __init__(self, key_name=SORT_KEY_ORDER, is_reversed=False):
+        self.key_name = key_name
+        self.is_reversed = is_reversed
+
+    def __eq__(self, other):
+        return (isinstance(other, SortMethod) and
+                (self.key_name, self.is_reversed) == (other.key_name, other.is_reversed))
+
+    def get_order_key(self, task):
+        # ties keep order of lines in reversed columns too, unless the lines order is the sort key itself
+        index = -task.index if self.is_reversed and self.key_name != SORT_KEY_ORDER else task.index
+        return get_sort_key(task, self.key_name), index
+
+
+# fields of composite sort specs, values are None for tasks without the field, e.g. without priority
+SORT_FIELD_ORDER = 'order'
+SORT_FIELDS = {
+    'priority': lambda task: ord(task.priority) if task.priority is not None else None,
+    'created': lambda task: task.start_date.toordinal() if task.start_date is not None else None,
+    'completed': lambda task: task.end_date.toordinal() if task.end_date is not None else None,
+    'subject': lambda task: task.subject,
+    'text': lambda task: task.raw_txt,
+    'project': lambda task: get_tags_sort_key(task.projects, '+') if len(task.projects) > 0 else None,
+    'context': lambda task: get_tags_sort_key(task.contexts, '@') if len(task.contexts) > 0 else None,
+}
+SORT_SPEC_SEPARATOR = ','
+DESCENDING_SORT_FIELD_MARK = '-'
+
+# code point of the last character, texts sorted in descending order have their characters complemented to it
+MAX_CODE_POINT = 0x10FFFF
+
+
+def get_descending_sort_value(value):
+    """Return the sort value of the field reversing its order"""
+    if isinstance(value, str):
+        # the end mark puts longer texts first, before their prefixes
+        return ''.join(chr(MAX_CODE_POINT - ord(c)) for c in value) + chr(MAX_CODE_POINT)
+    return -value
+
+
+class SortSpec:
+    """Composite order of tasks by a list of fields, e.g. `priority,created,-project`
+
+    Fields are separated with commas, `-` before a field sorts it in descending order. Tasks without
+    the field, e.g. without priority, are put after the other ones in both orders. Ties are put
+    in order of their lines, `order` or `-order` as the last field sets the order of lines.
+    Keys of the fields are computed once for each task as a flat tuple of pairs: 0 and the value,
+    or 1 and None for a missing field, so sorting compares numbers and texts only."""
+
+    def __init__(self, text):
+        self.text = text
+        # name of the key in sort keys of tasks, different from names of the SortMethod keys
+        self.key_name = f"spec:{text}"
+        self.fields = []
+        self.is_order_descending = False
+        names = [name.strip() for name in text.split(SORT_SPEC_SEPARATOR)]
+        for position, name in enumerate(names):
+            is_descending = name.startswith(DESCENDING_SORT_FIELD_MARK)
+            name = name[len(DESCENDING_SORT_FIELD_MARK):].strip() if is_descending else name
+            if name == SORT_FIELD_ORDER:
+                if position != len(names) - 1:
+                    raise ValueError(f"'{SORT_FIELD_ORDER}' has to be the last field of the sort spec: {text}")
+                self.is_order_descending = is_descending
+            elif name in SORT_FIELDS:
+                self.fields.append((SORT_FIELDS[name], is_descending))
+            else:
+                raise ValueError(f"Unknown field '{name}' of the sort spec, use any of: "
+                                 f"{', '.join(list(SORT_FIELDS) + [SORT_FIELD_ORDER])}")
+        self.is_reversed = False
+
+    def __eq__(self, other):
+        return isinstance(other, SortSpec) and self.text == other.text
+
+    def get_key(self, task):
+        key = task.sort_keys.get(self.key_name)
+        if key is None:
+            values = []
+            for field, is_descending in self.fields:
+                value = field(task)
+                if value is None:
+                    values += (1, None)
+                else:
+                    values += (0, get_descending_sort_value(value) if is_descending else value)
+            key = tuple(values)
+            task.sort_keys[self.key_name] = key
+        return key
+
+    def get_order_key(self, task):
+        return self.get_key(task) + (-task.index if self.is_order_descending else task.index,)
+
+
+class SortedColumns:
+    """Tasks of each column sorted by its SortMethod or SortSpec
+
+    The columns are kept sorted along with changes of the TaskModel: removed and moved tasks are
+    taken out and added and moved ones are inserted at positions found with binary search, so after
+    editing a few lines the columns aren't sorted again."""
+
+    def __init__(self):
+        self.orders = [SortMethod() for _ in range(COLUMNS_COUNT)]
+        self.columns = [[] for _ in range(COLUMNS_COUNT)]
+        # version of the TaskModel, which tasks are sorted
+        self.version = None
+
+    def set_orders(self, orders):
+        """Set SortMethod or SortSpec of each column, columns with a changed order are sorted again,
+        reusing keys of the tasks which were already sorted by it"""
+        for column, order in enumerate(orders):
+            if order == self.orders[column]:
+                continue
+            self.orders[column] = order
+            self.columns[column].sort(key=order.get_order_key)
+
+    def sort(self, tasks):
+        self.columns = [[] for _ in range(COLUMNS_COUNT)]
+        for task in tasks:
+            self.columns[task.column].append(task)
+        for column, column_tasks in enumerate(self.columns):
+            column_tasks.sort(key=self.orders[column].get_order_key)
+
+    def insert(self, task):
+        column_tasks = self.columns[task.column]
+        get_order_key = self.orders[task.column].get_order_key
+        key = get_order_key(task)
+        lo, hi = 0, len(column_tasks)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if get_order_key(column_tasks[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        column_tasks.insert(lo, task)
+
+    def sync(self, model):
+        """Update the columns with the last change of the model, or sort them again,
+        if they missed more changes"""
+        if self.version == model.version:
+            return
+        if self.version != model.version - 1:
+            self.sort(model.tasks)
+            self.version = model.version
+            return
+        self.version = model.version
+        # tasks of lines shifted by inserted or removed lines keep their order, only moved ones are placed again
+        taken_tasks = set(model.removed_tasks)
+        taken_tasks.update(model.moved_tasks)
+        for column in {task.column for task in taken_tasks}:
+            self.columns[column] = [task for task in self.columns[column] if task not in taken_tasks]
+        for task in model.moved_tasks:
+            self.insert(task)
+        for task in model.added_tasks:
+            self.insert(task)
+
+    def get_column_tasks(self, column):
+        """Return sorted tasks of the column"""
+        column_tasks = self.columns[column]
+        return column_tasks[::-1] if self.orders[column].is_reversed else list(column_tasks)
+
+
+TAG_ORDER_NAME = 'name'
+TAG_ORDER_FREQUENCY = 'frequency'
+TAG_ORDER_RECENCY = 'recency'
+TAG_ORDERS = (TAG_ORDER_NAME, TAG_ORDER_FREQUENCY, TAG_ORDER_RECENCY)
+
+
+def sort_tag_usage(tag_usage, order):
+    """Sort (tag, number of tasks, last addition) by name, by number of tasks or by the last addition,
+    the most frequent and the most recent tags first"""
+    if order == TAG_ORDER_FREQUENCY:
+        return sorted(tag_usage, key=lambda usage: (-usage[1], usage[0].casefold()))
+    if order == TAG_ORDER_RECENCY:
+        return sorted(tag_usage, key=lambda usage: -usage[2])
+    return sorted(tag_usage, key=lambda usage: usage[0].casefold())
+
+
+# characters of tags, tokens containing them are indexed separately, so tag filters check only them
+TAG_CHARACTERS = '+@:'
+
+
+@lru_cache(maxsize=32)
+def compile_filter_regex(pattern):
+    return re.compile(pattern)
+
+
+class FilterIndex:
+    """Index of todo.txt lines for finding lines matching a filter.
+
+    Lines are case-folded once, when the content is indexed. Every whitespace separated token of the
+    folded lines is mapped to the list of lines containing it. A filter without whitespace is found
+    in a line only inside one of its tokens, so matching lines are taken from the lists of the tokens
+    containing the filter, instead of checking every line."""
+
+    def __init__(self, text=None):
+        self.text = None
+        self.lines = []
+        self.folded_lines = []
+        # sorted indexes of lines by tokens, and tokens which may be tags
+        self.postings = {}
+        self.tag_tokens = []
+        # folded pattern and the result of the last substring search, reused when the pattern is narrowed
+        self.last_search = None
+        if text is not None:
+            self.update(text)
+
+    @property
+    def line_count(self):
+        return len(self.lines)
+
+    def update(self, text):
+        """Index the content, if it has changed since the last update"""
+        if text == self.text:
+            return
+        self.text = text
+        self.lines = text.split('\n')
+        self.folded_lines = [line.casefold() for line in self.lines]
+        postings = defaultdict(list)
+        for index, line in enumerate(self.folded_lines):
+            # the same token may be used multiple times in a line
+            for token in set(line.split()):
+                postings[token].append(index)
+        self.postings = dict(postings)
+        self.tag_tokens = [token for token in postings if any(c in token for c in TAG_CHARACTERS)]
+        self.last_search = None
+
+    def search(self, pattern, use_regex=False):
+        """Return sorted indexes of lines matching the filter.
+
+        The filter is a case insensitive substring, or a regex searched in each line. When the
+        substring contains the substring of the last search, e.g. when it's typed letter by letter,
+        only lines found by the last search are checked."""
+        if use_regex:
+            search = compile_filter_regex(pattern).search
+            return [index for index, line in enumerate(self.lines) if search(line)]
+
+        folded_pattern = pattern.casefold()
+        folded_lines = self.folded_lines
+        if self.last_search is not None and self.last_search[0] in folded_pattern:
+            result = [index for index in self.last_search[1] if folded_pattern in folded_lines[index]]
+        elif len(folded_pattern) == 0 or any(c.isspace() for c in folded_pattern):
+            result = [index for index, line in enumerate(folded_lines) if folded_pattern in line]
+        else:
+            if any(c in folded_pattern for c in TAG_CHARACTERS):
+                tokens = self.tag_tokens
+            else:
+                tokens = self.postings
+            matching_lines = set()
+            for token in tokens:
+                if folded_pattern in token:
+                    matching_lines.update(self.postings[token])
+            result = sorted(matching_lines)
+        self.last_search = (folded_pattern, result)
+        return result
@@ -0,0 +1,116 @@
+# KanbanTxt - A light todo.txt editor that display the to do list as a kanban board.
+# Copyright (C) 2022  KrisNumber24
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.
+# If not, see https://github.com/KrisNumber24/KanbanTxt/blob/main/LICENSE.
+
+"""GUI-free timing of phases of the KanbanTxt work, used with the `--profile` switch.
+
+Phases are measured by replacing methods of objects with timed wrappers, see `Profiler.instrument`,
+so without the switch nothing is wrapped and the methods run without any overhead.
+"""
+
+import datetime
+import functools
+import json
+import time
+from collections import deque
+
+
+# number of the last calls of a phase, which mean is shown as the rolling time
+ROLLING_WINDOW = 20
+
+REPORT_NAME_FORMAT = 'kanbantxt-profile-%Y%m%d-%H%M%S.json'
+
+
+class PhaseTimes:
+    """Times of calls of a single phase, in seconds"""
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.last = elapsed
+        self.recent.append(elapsed)
+
+    def get_rolling_mean(self):
+        return sum(self.recent) / len(self.recent) if len(self.recent) > 0 else 0.0
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total * 1000 / self.count if self.count > 0 else 0.0,
+            'max_ms': self.max * 1000,
+            'last_ms': self.last * 1000,
+            'rolling_mean_ms': self.get_rolling_mean() * 1000,
+        }
+
+
+class Profiler:
+    """Times of phases of a session, by phase names, in order of their first calls"""
+
+    def __init__(self):
+        self.phases = {}
+        self.start_time = datetime.datetime.now()
+
+    def add(self, phase, elapsed):
+        times = self.phases.get(phase)
+        if times is None:
+            times = self.phases[phase] = PhaseTimes()
+        times.add(elapsed)
+
+    def instrument(self, owner, method_name, phase):
+        """Replace the method of the owner object with a wrapper, which measures its calls as the phase"""
+        method = getattr(owner, method_name)
+
+        @functools.wraps(method)
+        def timed_method(*args, **kwargs):
+            begin = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.add(phase, time.perf_counter() - begin)
+        setattr(owner, method_name, timed_method)
+
+    def get_summary(self):
+        """Return lines with the last and the rolling mean time of each phase"""
+        return '\n'.join(f"{phase}: {times.last * 1000:.1f} ms, avg {times.get_rolling_mean() * 1000:.1f} ms"
+                         for phase, times in self.phases.items())
+
+    def get_report(self):
+        return {
+            'start': self.start_time.isoformat(timespec='seconds'),
+            'end': datetime.datetime.now().isoformat(timespec='seconds'),
+            'rolling_window': ROLLING_WINDOW,
+            'phases': {phase: times.to_dict() for phase, times in self.phases.items()},
+        }
+
+    def get_report_path(self):
+        return self.start_time.strftime(REPORT_NAME_FORMAT)
+
+    def write_report(self, path=None):
+        """Write the report of the session as a JSON file, return its path"""
+        if path is None:
+            path = self.get_report_path()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.get_report(), f, indent=4)
+        return path
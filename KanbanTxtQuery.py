@@ -0,0 +1,352 @@
+# KanbanTxt - A light todo.txt editor that display the to do list as a kanban board.
+# Copyright (C) 2022  KrisNumber24
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.
+# If not, see https://github.com/KrisNumber24/KanbanTxt/blob/main/LICENSE.
+
+"""Query language for filtering tasks of the KanbanTxtModel.
+
+A query is a list of terms, combined with `and` (also implicit, between adjacent terms), `or`,
+`not` and parentheses, e.g. `(prio:A or prio:B) +backend not state:done`. Terms:
+
+- `prio:A`, `prio:A-C`, `prio:none` - priority, range of priorities or no priority,
+- `project:name`, `+name` - project tag, `context:name`, `@name` - context tag,
+- `state:todo`, `state:in_progress`, `state:validation`, `state:done` - kanban column,
+- `created:`, `completed:` and `key:` of special key-val data, with a date, a range of dates
+  `2023-01-01..2023-01-31` (any end may be omitted) or, for special key-val data, any value,
+- any other word or "quoted text" - case insensitive text of the task line.
+
+Names of tags and values can end with `*`, matching any suffix. Terms selecting tasks by column,
+priority, tags and special key-val data are looked up in the TaskIndex of the model, the other
+ones are checked for each task.
+"""
+
+import fnmatch
+import re
+
+import KanbanTxtModel
+
+
+QUERY_TOKEN_R = re.compile(r'\(|\)|"[^"]*"?|[^\s()]+')
+
+STATES = {
+    'todo': KanbanTxtModel.COLUMN_TODO,
+    'in_progress': KanbanTxtModel.COLUMN_IN_PROGRESS,
+    'progress': KanbanTxtModel.COLUMN_IN_PROGRESS,
+    'validation': KanbanTxtModel.COLUMN_VALIDATION,
+    'done': KanbanTxtModel.COLUMN_DONE,
+}
+
+PRIORITY_RANGE_R = re.compile(r'(?P<first>[A-Z])(-(?P<last>[A-Z]))?$')
+
+DATE_RANGE_SEPARATOR = '..'
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class QueryNode:
+    """Compiled part of a query. Indexed nodes select their tasks from the TaskIndex,
+    the other ones check each task with the predicate."""
+    is_indexed = False
+
+    def matches(self, task):
+        raise NotImplementedError
+
+    def select(self, index, tasks):
+        """Return the set of tasks matching the node"""
+        return {task for task in tasks if self.matches(task)}
+
+
+class IndexedNode(QueryNode):
+    """Union of the sets of tasks from one of the TaskIndex dicts, for keys accepted by the key predicate"""
+    is_indexed = True
+
+    def __init__(self, index_name, key_matches, task_matches):
+        self.index_name = index_name
+        self.key_matches = key_matches
+        self.task_matches = task_matches
+
+    def matches(self, task):
+        return self.task_matches(task)
+
+    def select(self, index, tasks):
+        selected = set()
+        for key, key_tasks in getattr(index, self.index_name).items():
+            if self.key_matches(key):
+                selected.update(key_tasks)
+        return selected
+
+
+class ColumnNode(QueryNode):
+    is_indexed = True
+
+    def __init__(self, column):
+        self.column = column
+
+    def matches(self, task):
+        return task.column == self.column
+
+    def select(self, index, tasks):
+        return set(index.by_column[self.column])
+
+
+class PredicateNode(QueryNode):
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def matches(self, task):
+        return self.predicate(task)
+
+
+class AndNode(QueryNode):
+    def __init__(self, children):
+        self.children = children
+        self.is_indexed = any(child.is_indexed for child in children)
+
+    def matches(self, task):
+        return all(child.matches(task) for child in self.children)
+
+    def select(self, index, tasks):
+        # negations select most of the tasks, so they're checked like predicates, if there is anything else
+        indexed = [child for child in self.children if child.is_indexed and not isinstance(child, NotNode)]
+        if len(indexed) == 0:
+            indexed = [child for child in self.children if child.is_indexed][:1]
+        others = [child for child in self.children if child not in indexed]
+        if len(indexed) == 0:
+            return {task for task in tasks if self.matches(task)}
+        selected = None
+        for child in indexed:
+            child_selected = child.select(index, tasks)
+            selected = child_selected if selected is None else selected & child_selected
+            if len(selected) == 0:
+                return selected
+        # the other children are checked only for tasks selected by the indexed ones
+        return {task for task in selected if all(child.matches(task) for child in others)}
+
+
+class OrNode(QueryNode):
+    def __init__(self, children):
+        self.children = children
+        self.is_indexed = all(child.is_indexed for child in children)
+
+    def matches(self, task):
+        return any(child.matches(task) for child in self.children)
+
+    def select(self, index, tasks):
+        if not self.is_indexed:
+            return {task for task in tasks if self.matches(task)}
+        selected = set()
+        for child in self.children:
+            selected |= child.select(index, tasks)
+        return selected
+
+
+class NotNode(QueryNode):
+    def __init__(self, child):
+        self.child = child
+        self.is_indexed = child.is_indexed
+
+    def matches(self, task):
+        return not self.child.matches(task)
+
+    def select(self, index, tasks):
+        if not self.is_indexed:
+            return {task for task in tasks if self.matches(task)}
+        return set(tasks) - self.child.select(index, tasks)
+
+
+def make_name_matcher(pattern):
+    """Return a case insensitive predicate of names, the pattern may contain `*` wildcards"""
+    folded_pattern = pattern.casefold()
+    if '*' in folded_pattern:
+        return lambda name: fnmatch.fnmatchcase(name.casefold(), folded_pattern)
+    return lambda name: name.casefold() == folded_pattern
+
+
+def parse_date_range(text):
+    """Return the first and last date of the range, None for an omitted end"""
+    if DATE_RANGE_SEPARATOR in text:
+        first_text, last_text = text.split(DATE_RANGE_SEPARATOR, 1)
+    else:
+        first_text = last_text = text
+    first = KanbanTxtModel.parse_date(first_text) if first_text else None
+    last = KanbanTxtModel.parse_date(last_text) if last_text else None
+    if (first_text and first is None) or (last_text and last is None):
+        raise QuerySyntaxError(f"Invalid date range: {text}")
+    return first, last
+
+
+def is_date_in_range(value, first, last):
+    return value is not None and (first is None or value >= first) and (last is None or value <= last)
+
+
+def make_tag_node(index_name, task_attribute, indicator, name):
+    name_matches = make_name_matcher(indicator + name)
+    return IndexedNode(
+        index_name,
+        name_matches,
+        lambda task: any(name_matches(tag) for tag in getattr(task, task_attribute)))
+
+
+def make_priority_node(value):
+    if value.casefold() == 'none':
+        return IndexedNode('by_priority', lambda priority: priority is None, lambda task: task.priority is None)
+    match = PRIORITY_RANGE_R.match(value.upper())
+    if match is None:
+        raise QuerySyntaxError(f"Invalid priority: {value}")
+    first = match['first']
+    last = match['last'] or first
+
+    def priority_matches(priority):
+        return priority is not None and first <= priority <= last
+    return IndexedNode('by_priority', priority_matches, lambda task: priority_matches(task.priority))
+
+
+def make_special_kv_node(key, value):
+    if value == '*':
+        return IndexedNode('by_special_key', lambda k: k == key,
+                           lambda task: any(k == key for k, v in task.special_kv_data))
+    if value[:1].isdigit() or value.startswith(DATE_RANGE_SEPARATOR):
+        try:
+            first, last = parse_date_range(value)
+        except QuerySyntaxError:
+            pass
+        else:
+            def kv_matches(kv):
+                return kv[0] == key and is_date_in_range(KanbanTxtModel.parse_date(kv[1]), first, last)
+            return IndexedNode('by_special_kv', kv_matches,
+                               lambda task: any(kv_matches(kv) for kv in task.special_kv_data))
+    value_matches = make_name_matcher(value)
+
+    def kv_matches(kv):
+        return kv[0] == key and value_matches(kv[1])
+    return IndexedNode('by_special_kv', kv_matches, lambda task: any(kv_matches(kv) for kv in task.special_kv_data))
+
+
+def make_text_node(text):
+    folded_text = text.casefold()
+    return PredicateNode(lambda task: folded_text in task.raw_txt.casefold())
+
+
+def make_term_node(token):
+    """Compile a single term of the query"""
+    if token.startswith('"'):
+        if len(token) < 2 or not token.endswith('"'):
+            raise QuerySyntaxError(f"Unterminated quoted text: {token}")
+        if len(token) == 2:
+            raise QuerySyntaxError("Empty quoted text")
+        return make_text_node(token[1:-1])
+    if len(token) > 1 and token[0] == '+':
+        return make_tag_node('by_project', 'projects', '+', token[1:])
+    if len(token) > 1 and token[0] == '@':
+        return make_tag_node('by_context', 'contexts', '@', token[1:])
+
+    key, separator, value = token.partition(':')
+    if not separator or not key or not value:
+        return make_text_node(token)
+    field = key.casefold()
+    if field == 'prio':
+        return make_priority_node(value)
+    if field == 'project':
+        return make_tag_node('by_project', 'projects', '+', value.lstrip('+'))
+    if field == 'context':
+        return make_tag_node('by_context', 'contexts', '@', value.lstrip('@'))
+    if field == 'state':
+        column = STATES.get(value.casefold())
+        if column is None:
+            raise QuerySyntaxError(f"Unknown state: {value}, use one of: {', '.join(STATES)}")
+        return ColumnNode(column)
+    if field in ('created', 'completed'):
+        first, last = parse_date_range(value)
+        attribute = 'start_date' if field == 'created' else 'end_date'
+        return PredicateNode(lambda task: is_date_in_range(getattr(task, attribute), first, last))
+    return make_special_kv_node(key, value)
+
+
+class QueryParser:
+    """Recursive descent parser of the query, `or` binds weaker than `and`, which binds weaker than `not`"""
+
+    def __init__(self, text):
+        self.tokens = QUERY_TOKEN_R.findall(text)
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def peek_keyword(self):
+        token = self.peek()
+        return token.casefold() if token is not None else None
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        if len(self.tokens) == 0:
+            raise QuerySyntaxError("Empty query")
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"Unexpected '{self.peek()}'")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek_keyword() == 'or':
+            self.next()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else OrNode(children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() is not None and self.peek() != ')' and self.peek_keyword() != 'or':
+            if self.peek_keyword() == 'and':
+                self.next()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else AndNode(children)
+
+    def parse_not(self):
+        if self.peek_keyword() == 'not':
+            self.next()
+            return NotNode(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        token = self.next()
+        if token is None:
+            raise QuerySyntaxError("Unexpected end of the query")
+        if token == '(':
+            node = self.parse_or()
+            if self.next() != ')':
+                raise QuerySyntaxError("Missing ')'")
+            return node
+        if token == ')' or token.casefold() in ('and', 'or'):
+            raise QuerySyntaxError(f"Unexpected '{token}'")
+        return make_term_node(token)
+
+
+def compile_query(text):
+    """Compile the query to a tree of QueryNode, raise QuerySyntaxError if it's invalid"""
+    return QueryParser(text).parse()
+
+
+def find_tasks(query, model):
+    """Return tasks of the model matching the query, in order of their lines"""
+    node = compile_query(query) if isinstance(query, str) else query
+    selected = node.select(model.index, model.tasks)
+    return sorted(selected, key=lambda task: task.index)
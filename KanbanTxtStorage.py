@@ -0,0 +1,591 @@
+# KanbanTxt - A light todo.txt editor that display the to do list as a kanban board.
+# Copyright (C) 2022  KrisNumber24
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.
+# If not, see https://github.com/KrisNumber24/KanbanTxt/blob/main/LICENSE.
+
+"""GUI-free reading and writing of todo.txt files.
+
+Files are written atomically: the content goes to a temporary file in the same directory, which
+is flushed to the disk and then renamed over the todo.txt file, so it's never left half written.
+Writes of the content, which is already in the file, are skipped.
+
+Optionally, files are written by the SaveWorker in a background thread, so a slow disk doesn't
+block the caller. Snapshots of the content submitted while the worker is busy are written at once.
+
+In the journal mode, changes aren't written to the todo.txt file, but appended to its TodoJournal,
+a sidecar file of line changes. The todo.txt file is written with all the changes only when the
+journal is compacted. Journals left by a crash are replayed by `replay_journals`.
+"""
+
+import difflib
+import hashlib
+import json
+import mmap
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+import KanbanTxtModel
+
+
+ENCODING = 'utf-8'
+
+# state of the file when it was read or written for the last time
+FileState = namedtuple('FileState', ['path', 'content_hash', 'size', 'mtime_ns'])
+
+# coalesced_saves is the number of snapshots of the content, which were submitted to the SaveWorker
+# before it wrote the last one
+SaveReport = namedtuple('SaveReport', ['path', 'is_written', 'bytes_written', 'elapsed', 'coalesced_saves'],
+                        defaults=(1,))
+
+SaveFailure = namedtuple('SaveFailure', ['path', 'error'])
+
+# seconds the SaveWorker waits for more snapshots, before it writes the last one
+SAVE_COALESCE_DELAY = 0.1
+
+# sidecar files of the todo.txt file: its journal, and the previous journal, while it's being compacted
+JOURNAL_SUFFIX = '.journal'
+COMPACTED_JOURNAL_SUFFIX = '.journal.old'
+
+# size of the journal in bytes, after which it should be compacted
+JOURNAL_COMPACT_SIZE = 256 * 1024
+
+# files are read in chunks of this size, extended to the end of a line, and mapped to memory when they're bigger
+LOAD_CHUNK_SIZE = 256 * 1024
+MMAP_SIZE = 16 * 1024 * 1024
+
+# done tasks are archived in the file with this name, next to the todo.txt file
+TODO_NAME = 'todo.txt'
+ARCHIVE_NAME = 'done.txt'
+
+# times are in seconds since the beginning of the load
+LoadReport = namedtuple('LoadReport', ['path', 'bytes_read', 'line_count', 'first_cards_time', 'total_time'])
+
+JournalReport = namedtuple('JournalReport', ['path', 'bytes_appended', 'elapsed', 'journal_size'])
+
+# line is the number of the first line of the conflict in the merged text, with local lines, counted from 1
+MergeConflict = namedtuple('MergeConflict', ['line', 'local_lines', 'remote_lines'])
+
+
+def get_content_hash(text):
+    return hashlib.sha256(text.encode(ENCODING)).hexdigest()
+
+
+def get_file_state(path, content_hash, stat=None):
+    if stat is None:
+        stat = os.stat(path)
+    return FileState(path, content_hash, stat.st_size, stat.st_mtime_ns)
+
+
+def read_chunks(path, chunk_size=LOAD_CHUNK_SIZE):
+    """Yield chunks of whole lines of the file and the number of bytes read so far,
+    decoded with universal newlines, like files opened in the text mode"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size >= MMAP_SIZE else f.read()
+        try:
+            position = 0
+            while position < size:
+                end = min(position + chunk_size, size)
+                if end < size:
+                    # chunks end after a newline, so neither a multibyte character nor \r\n is split
+                    newline = data.find(b'\n', end - 1)
+                    end = size if newline < 0 else newline + 1
+                chunk = data[position:end].decode(ENCODING)
+                position = end
+                yield chunk.replace('\r\n', '\n').replace('\r', '\n'), position
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+
+def fsync_directory(directory):
+    """Flush the directory entry of a renamed file, where the system allows it"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def get_new_file_mode():
+    """Return the mode of files created by open(), read once at the import, because setting the umask
+    to read it affects all threads"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+NEW_FILE_MODE = get_new_file_mode()
+
+
+def copy_file_attributes(source_path, destination_path):
+    """Copy the mode, and where the system and permissions allow it, the owner and extended attributes
+    holding e.g. ACLs, of the source file to the destination file"""
+    shutil.copymode(source_path, destination_path)
+    stat = os.stat(source_path)
+    if hasattr(os, 'chown'):
+        try:
+            os.chown(destination_path, stat.st_uid, stat.st_gid)
+        except OSError:
+            pass
+    if hasattr(os, 'listxattr'):
+        try:
+            for name in os.listxattr(source_path):
+                os.setxattr(destination_path, name, os.getxattr(source_path, name))
+        except OSError:
+            pass
+
+
+def write_atomically(path, text):
+    """Write the text to a temporary file, flush it to the disk and rename it over the file at the path,
+    return the number of bytes written
+
+    A symlink at the path is kept and the file it points to is replaced. The new file gets attributes
+    of the replaced one, or the default mode of new files, if there wasn't any."""
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding=ENCODING) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+            bytes_written = os.fstat(f.fileno()).st_size
+        # mkstemp creates files readable only by the owner
+        if os.path.exists(path):
+            copy_file_attributes(path, temp_path)
+        else:
+            os.chmod(temp_path, NEW_FILE_MODE)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    fsync_directory(directory)
+    return bytes_written
+
+
+class TodoFile:
+    """Reads and writes todo.txt files, remembering the state and the content of the last one read or written
+
+    It's used by the UI thread and the SaveWorker thread, the remembered state is read and changed
+    only with the lock held."""
+
+    def __init__(self):
+        self.state = None
+        self.text = None
+        self.last_save = None
+        # reentrant, since save checks is_saved
+        self.lock = threading.RLock()
+
+    def read(self, path):
+        with open(path, 'r', encoding=ENCODING) as f:
+            text = f.read()
+        self.remember_read(path, text)
+        return text
+
+    def remember_read(self, path, text, stat=None):
+        """Remember the text as the content of the file, when it was read without the `read` method
+
+        The stat of the file should be taken before reading it, if it's read over time, so a change made
+        while it was being read is still found by `get_external_change`."""
+        state = get_file_state(path, get_content_hash(text), stat)
+        with self.lock:
+            self.state = state
+            self.text = text
+
+    def is_saved(self, path, text, content_hash=None):
+        """Return True if the text is the content of the file, as it was read or written for the last time,
+        and the file wasn't changed since then"""
+        if content_hash is None:
+            content_hash = get_content_hash(text)
+        with self.lock:
+            if self.state is None or self.state.path != path or content_hash != self.state.content_hash:
+                return False
+            try:
+                return get_file_state(path, content_hash) == self.state
+            except OSError:
+                return False
+
+    def save(self, path, text):
+        """Write the text to the file, unless it's already there, and return the SaveReport"""
+        begin = time.perf_counter()
+        content_hash = get_content_hash(text)
+        # the lock is held while writing, so the state always describes the last write
+        with self.lock:
+            if self.is_saved(path, text, content_hash):
+                self.last_save = SaveReport(path, False, 0, time.perf_counter() - begin)
+                return self.last_save
+            bytes_written = write_atomically(path, text)
+            self.state = get_file_state(path, content_hash)
+            self.text = text
+            self.last_save = SaveReport(path, True, bytes_written, time.perf_counter() - begin)
+            return self.last_save
+
+    def get_external_change(self, path):
+        """Return the content of the file, if it was changed by another program since it was read or written
+        for the last time, None otherwise
+
+        The file is read only if its size or modification time changed, and it's reported as changed only
+        if its content is different, so e.g. touching the file isn't a change."""
+        with self.lock:
+            if self.state is None or self.state.path != path:
+                return None
+            try:
+                stat = os.stat(path)
+                if stat.st_size == self.state.size and stat.st_mtime_ns == self.state.mtime_ns:
+                    return None
+                with open(path, 'r', encoding=ENCODING) as f:
+                    text = f.read()
+            except (OSError, ValueError):
+                # the file was removed or it's being written, it's checked again later
+                return None
+            content_hash = get_content_hash(text)
+            if content_hash == self.state.content_hash:
+                self.state = get_file_state(path, content_hash, stat)
+                return None
+            return text
+
+
+class SaveWorker:
+    """Saves snapshots of the content with the TodoFile in a background thread
+
+    Snapshots are submitted from the UI thread through a queue. The worker waits a moment for more
+    of them and saves only the last snapshot for each path. SaveReport or SaveFailure of each write
+    are put in the `results` queue, to be handled in the UI thread."""
+
+    def __init__(self, todo_file, coalesce_delay=SAVE_COALESCE_DELAY):
+        self.todo_file = todo_file
+        self.coalesce_delay = coalesce_delay
+        self.snapshots = queue.Queue()
+        self.results = queue.Queue()
+        # number of submitted snapshots, which weren't saved yet
+        self.pending_count = 0
+        self.condition = threading.Condition()
+        self.flush_requested = threading.Event()
+        self.thread = None
+
+    def submit(self, path, text):
+        with self.condition:
+            self.pending_count += 1
+        self.snapshots.put((path, text))
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='KanbanTxt save worker', daemon=True)
+            self.thread.start()
+
+    def has_pending_saves(self):
+        """Return True if there are snapshots not saved yet, or results not handled yet"""
+        with self.condition:
+            return self.pending_count > 0 or not self.results.empty()
+
+    def get_results(self):
+        results = []
+        while True:
+            try:
+                results.append(self.results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def flush(self, timeout=None):
+        """Wait until all submitted snapshots are saved, return False if the timeout passed before"""
+        self.flush_requested.set()
+        try:
+            with self.condition:
+                return self.condition.wait_for(lambda: self.pending_count == 0, timeout)
+        finally:
+            self.flush_requested.clear()
+
+    def run(self):
+        while True:
+            snapshots = [self.snapshots.get()]
+            self.flush_requested.wait(self.coalesce_delay)
+            while True:
+                try:
+                    snapshots.append(self.snapshots.get_nowait())
+                except queue.Empty:
+                    break
+
+            # the last snapshot of each path, and the number of snapshots it replaces
+            last_snapshots = {}
+            for path, text in snapshots:
+                previous_snapshot = last_snapshots.get(path)
+                last_snapshots[path] = (text, 1 if previous_snapshot is None else previous_snapshot[1] + 1)
+
+            for path, (text, count) in last_snapshots.items():
+                try:
+                    with self.todo_file.lock:
+                        report = self.todo_file.save(path, text)._replace(coalesced_saves=count)
+                        self.todo_file.last_save = report
+                    self.results.put(report)
+                except Exception as error:
+                    # any error is reported, the thread has to go on, or flush would wait forever
+                    self.results.put(SaveFailure(path, error))
+
+            with self.condition:
+                self.pending_count -= len(snapshots)
+                self.condition.notify_all()
+
+
+def get_archive_path(path):
+    """Return path of the archive of done tasks of the todo.txt file, e.g. `work.done.txt` for `work.todo.txt`"""
+    directory, name = os.path.split(path)
+    if name.lower().endswith(TODO_NAME):
+        return os.path.join(directory, name[:-len(TODO_NAME)] + ARCHIVE_NAME)
+    root, extension = os.path.splitext(name)
+    return os.path.join(directory, f"{root}.done{extension}")
+
+
+def append_to_archive(path, lines):
+    """Append the lines to the archive in a single write, return the number of bytes written"""
+    data = ''.join(line + '\n' for line in lines).encode(ENCODING)
+    with open(path, 'ab+') as f:
+        # the archive might have been edited by hand, without the line break at the end
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                data = b'\n' + data
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    return len(data)
+
+
+def read_journal(journal_path):
+    """Return the header and the line changes of the journal, None if there is no journal
+
+    A change torn by a crash, at the end of the journal, is skipped."""
+    try:
+        with open(journal_path, 'r', encoding=ENCODING) as f:
+            records = []
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break
+    except FileNotFoundError:
+        return None
+    if len(records) == 0:
+        return None
+    return records[0], records[1:]
+
+
+def apply_line_changes(lines, changes):
+    for change in changes:
+        lines[change['start']:change['end']] = change['lines']
+    return lines
+
+
+def replay_journals(path, text):
+    """Replay journals of the todo.txt file on its content, return the content and the number of replayed changes
+
+    Journals are replayed only on the content they were started with, so a journal, which was already
+    compacted into the file, is skipped."""
+    replayed_count = 0
+    for suffix in (COMPACTED_JOURNAL_SUFFIX, JOURNAL_SUFFIX):
+        journal = read_journal(path + suffix)
+        if journal is None:
+            continue
+        header, changes = journal
+        if header.get('base') != get_content_hash(text):
+            continue
+        text = '\n'.join(apply_line_changes(text.split('\n'), changes))
+        replayed_count += len(changes)
+    return text, replayed_count
+
+
+def remove_journals(path):
+    for suffix in (COMPACTED_JOURNAL_SUFFIX, JOURNAL_SUFFIX):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+class TodoJournal:
+    """Append-only journal of line changes of a todo.txt file
+
+    The journal starts with a header holding the hash of the content of the file, followed by changes,
+    each replacing a range of lines. A change is computed from the content, as lines which changed
+    between the first and the last changed one, so e.g. changing the state or the priority of a task
+    appends only its line."""
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.text = ''
+        self.size = 0
+
+    def start(self, base_text):
+        """Start a new journal of changes of the base text, which has to be the content of the todo.txt file"""
+        self.text = base_text
+        header = json.dumps({'base': get_content_hash(base_text)}) + '\n'
+        write_atomically(self.journal_path, header)
+        self.size = len(header.encode(ENCODING))
+
+    def get_text(self):
+        return self.text
+
+    def get_line_change(self, text):
+        """Return the change of lines between the journal content and the text"""
+        old_text = self.text
+        # the changed range is found in the whole content and then extended to whole lines,
+        # so only the changed lines are split
+        prefix = KanbanTxtModel.common_prefix_length(old_text, text)
+        begin = old_text.rfind('\n', 0, prefix) + 1
+        suffix = KanbanTxtModel.common_suffix_length(old_text, text, min(len(old_text), len(text)) - begin)
+        old_end = old_text.find('\n', len(old_text) - suffix)
+        if old_end < 0:
+            old_end = len(old_text)
+        new_end = old_end + len(text) - len(old_text)
+        start = old_text.count('\n', 0, begin)
+        return {
+            'start': start,
+            'end': start + old_text.count('\n', begin, old_end) + 1,
+            'lines': text[begin:new_end].split('\n'),
+        }
+
+    def append(self, text):
+        """Append change of the content to the journal and return the JournalReport"""
+        begin = time.perf_counter()
+        if text == self.text:
+            return JournalReport(self.path, 0, time.perf_counter() - begin, self.size)
+        record = (json.dumps(self.get_line_change(text)) + '\n').encode(ENCODING)
+        with open(self.journal_path, 'ab') as f:
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        self.text = text
+        self.size += len(record)
+        return JournalReport(self.path, len(record), time.perf_counter() - begin, self.size)
+
+    def needs_compaction(self):
+        return self.size > JOURNAL_COMPACT_SIZE
+
+    def begin_compaction(self):
+        """Move the journal aside and start a new one, return the content to write to the todo.txt file,
+        None if the previous compaction isn't finished
+
+        The moved journal is removed by `end_compaction`, after the content was written. Until then,
+        it's replayed with the new one, if the content wasn't written."""
+        compacted_journal_path = self.path + COMPACTED_JOURNAL_SUFFIX
+        if os.path.exists(compacted_journal_path):
+            return None
+        text = self.get_text()
+        os.replace(self.journal_path, compacted_journal_path)
+        self.start(text)
+        return text
+
+    def end_compaction(self):
+        compacted_journal_path = self.path + COMPACTED_JOURNAL_SUFFIX
+        if os.path.exists(compacted_journal_path):
+            os.remove(compacted_journal_path)
+
+    def remove(self):
+        """Remove the journal, once its content is written to the todo.txt file"""
+        remove_journals(self.path)
+
+
+def get_line_changes(base_lines, lines):
+    """Return changes of the lines compared with the base lines, as (base_begin, base_end, lines) tuples"""
+    # only the region between the common beginning and end is compared line by line
+    prefix = KanbanTxtModel.common_prefix_length(base_lines, lines)
+    suffix = KanbanTxtModel.common_suffix_length(base_lines, lines, min(len(base_lines), len(lines)) - prefix)
+    matcher = difflib.SequenceMatcher(None, base_lines[prefix:len(base_lines) - suffix],
+                                      lines[prefix:len(lines) - suffix], autojunk=False)
+    return [(prefix + i1, prefix + i2, lines[prefix + j1:prefix + j2])
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+
+def apply_changes(base_lines, begin, end, changes):
+    """Return the lines between begin and end of the base lines, with the changes applied"""
+    lines = []
+    position = begin
+    for change_begin, change_end, change_lines in changes:
+        lines.extend(base_lines[position:change_begin])
+        lines.extend(change_lines)
+        position = change_end
+    lines.extend(base_lines[position:end])
+    return lines
+
+
+class ThreeWayMerge:
+    """Merge of lines changed locally and by another program, since both versions had the base content
+
+    Changes of separate lines are merged, different changes of the same lines, or lines inserted
+    by both versions at the same place, are conflicts. `parts` holds lists of merged lines and MergeConflict."""
+
+    def __init__(self, base, local, remote):
+        self.parts = []
+        self.conflicts = []
+        if local == base or local == remote:
+            self.parts.append(remote.split('\n'))
+            return
+        if remote == base:
+            self.parts.append(local.split('\n'))
+            return
+        base_lines = base.split('\n')
+        changes = [(change, True) for change in get_line_changes(base_lines, local.split('\n'))]
+        changes += [(change, False) for change in get_line_changes(base_lines, remote.split('\n'))]
+        changes.sort(key=lambda item: (item[0][0], item[0][1]))
+
+        position = 0
+        line = 1
+        i = 0
+        while i < len(changes):
+            # overlapping changes are merged as one group
+            group_begin, group_end = changes[i][0][0], changes[i][0][1]
+            local_changes, remote_changes = [], []
+            while i < len(changes) and (changes[i][0][0] < group_end or
+                                        changes[i][0][0] == changes[i][0][1] == group_begin == group_end):
+                change, is_local = changes[i]
+                (local_changes if is_local else remote_changes).append(change)
+                group_end = max(group_end, change[1])
+                i += 1
+            if position < group_begin:
+                self.parts.append(base_lines[position:group_begin])
+                line += group_begin - position
+            local_lines = apply_changes(base_lines, group_begin, group_end, local_changes)
+            remote_lines = apply_changes(base_lines, group_begin, group_end, remote_changes)
+            if len(remote_changes) == 0 or local_lines == remote_lines:
+                self.parts.append(local_lines)
+            elif len(local_changes) == 0:
+                self.parts.append(remote_lines)
+                local_lines = remote_lines
+            else:
+                conflict = MergeConflict(line, local_lines, remote_lines)
+                self.parts.append(conflict)
+                self.conflicts.append(conflict)
+            line += len(local_lines)
+            position = group_end
+        self.parts.append(base_lines[position:])
+
+    def get_text(self, prefer_local=True):
+        """Return the merged text, with local or remote lines of the conflicts"""
+        lines = []
+        for part in self.parts:
+            if isinstance(part, MergeConflict):
+                lines.extend(part.local_lines if prefer_local else part.remote_lines)
+            else:
+                lines.extend(part)
+        return '\n'.join(lines)
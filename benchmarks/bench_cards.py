@@ -0,0 +1,77 @@
+"""Benchmark of drawing task cards on the kanban board, reporting the allocation of card widgets.
+
+Needs a display (e.g. Xvfb on CI machines), run it from the repository root:
+
+    python benchmarks/bench_cards.py --lines 1000 --reloads 10
+"""
+
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import KanbanTxt
+from todo_generator import generate_lines
+
+
+def create_viewer():
+    """Return the KanbanTxt viewer, or None if there is no display available"""
+    try:
+        return KanbanTxt.KanbanTxtViewer()
+    except tk.TclError as error:
+        print(f"Can't create the KanbanTxt window: {error}")
+        return None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark drawing of task cards')
+    arg_parser.add_argument('--lines', help='Number of lines in generated todo.txt', type=int, default=1000)
+    arg_parser.add_argument('--reloads', help='Number of reloads after editing a line', type=int, default=10)
+    arg_parser.add_argument('--seed', help='Seed of the todo.txt generator', type=int, default=0)
+    arg_parser.add_argument('--virtualized', help='Draw only cards in the visible part of columns', action='store_true')
+    args = arg_parser.parse_args()
+
+    viewer = create_viewer()
+    if viewer is None:
+        sys.exit(0)
+    viewer.virtualized_columns = args.virtualized
+
+    lines = generate_lines(args.lines, args.seed)
+    begin = time.perf_counter()
+    viewer.reload_ui_from_text('\n'.join(lines))
+    print(f"first draw of {args.lines} lines: {(time.perf_counter() - begin) * 1000:10.2f} ms")
+    print(f"  {viewer.card_pool.get_stats()}")
+
+    begin = time.perf_counter()
+    for i in range(args.reloads):
+        edited_line = (i * 7919) % len(lines)
+        lines[edited_line] = "x " + lines[edited_line]
+        viewer.reload_ui_from_text('\n'.join(lines))
+    elapsed = time.perf_counter() - begin
+    print(f"reload after editing a line: {elapsed * 1000 / args.reloads:10.2f} ms")
+    print(f"  {viewer.card_pool.get_stats()}")
+
+    begin = time.perf_counter()
+    viewer.show_index = not viewer.show_index
+    viewer.reload_ui_from_text()
+    print(f"reload after changing view settings: {(time.perf_counter() - begin) * 1000:10.2f} ms")
+    print(f"  {viewer.card_pool.get_stats()}")
+
+    if args.virtualized:
+        begin = time.perf_counter()
+        for i in range(args.reloads):
+            viewer.content_canvas.yview_moveto(i / args.reloads)
+            viewer.update_virtual_columns()
+            viewer.main_window.update()
+        elapsed = time.perf_counter() - begin
+        print(f"scroll through virtualized columns: {elapsed * 1000 / args.reloads:10.2f} ms")
+        print(f"  {viewer.card_pool.get_stats()}")
+
+    viewer.main_window.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark of the editor line colors update, done after every cursor move and edit in the editor.
+
+The current implementation is compared with tagging each line separately, as it was done before.
+Typing a character and inserting a line are measured too, they tag again only the changed lines,
+or the lines after the inserted one.
+Needs a display (e.g. Xvfb on CI machines), run it from the repository root:
+
+    python benchmarks/bench_editor.py --lines 20000 --moves 100
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_cards import create_viewer
+from todo_generator import generate_lines
+
+
+def tag_each_line(viewer):
+    """Update line colors the way KanbanTxt did before the stripes were tagged by ranges"""
+    text_editor = viewer.text_editor
+    nb_line = int(text_editor.index('end-1c').split('.')[0])
+    selected_line = int(text_editor.index('insert').split('.')[0])
+    for line_idx in range(nb_line + 1):
+        text_editor.tag_remove('pair', str(line_idx) + '.0', str(line_idx) + '.0 lineend +1c')
+        text_editor.tag_remove('current_pos', str(line_idx) + '.0', str(line_idx) + '.0 lineend +1c')
+        if line_idx == selected_line:
+            text_editor.tag_add('current_pos', str(line_idx) + '.0', str(line_idx) + '.0 lineend +1c')
+        elif line_idx % 2 == 0:
+            text_editor.tag_add('pair', str(line_idx) + '.0', str(line_idx) + '.0 lineend +1c')
+
+
+def bench_cursor_moves(viewer, update, line_count, moves, seed):
+    """Return the average time of moving the cursor to a random line and updating line colors, in seconds"""
+    rng = random.Random(seed)
+    begin = time.perf_counter()
+    for _ in range(moves):
+        viewer.text_editor.mark_set('insert', f"{rng.randint(1, line_count)}.0")
+        update()
+    return (time.perf_counter() - begin) / moves
+
+
+def bench_typing(viewer, update, line_count, edits, seed):
+    """Return the average time of typing a character in a random line and updating line colors, in seconds"""
+    rng = random.Random(seed)
+    begin = time.perf_counter()
+    for _ in range(edits):
+        viewer.text_editor.mark_set('insert', f"{rng.randint(1, line_count)}.0 lineend")
+        viewer.text_editor.insert('insert', "a")
+        update()
+    return (time.perf_counter() - begin) / edits
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark update of the editor line colors')
+    arg_parser.add_argument('--lines', help='Number of lines in generated todo.txt', type=int, default=20000)
+    arg_parser.add_argument('--moves', help='Number of cursor moves', type=int, default=100)
+    arg_parser.add_argument('--seed', help='Seed of the todo.txt generator', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    viewer = create_viewer()
+    if viewer is None:
+        sys.exit(0)
+    viewer.card_renderer = viewer.CARD_RENDERER_CANVAS
+    viewer.reload_ui_from_text('\n'.join(generate_lines(args.lines, args.seed)))
+
+    elapsed = bench_cursor_moves(viewer, lambda: tag_each_line(viewer), args.lines, args.moves, args.seed)
+    print(f"tagging each line:         {elapsed * 1000:10.2f} ms per cursor move")
+
+    # content was modified by the previous run, so the first update tags the stripes again
+    viewer.text_editor.edit_modified(True)
+    elapsed = bench_cursor_moves(viewer, viewer.update_editor_line_colors, args.lines, args.moves, args.seed)
+    print(f"update_editor_line_colors: {elapsed * 1000:10.2f} ms per cursor move")
+
+    elapsed = bench_typing(viewer, lambda: tag_each_line(viewer), args.lines, args.moves, args.seed)
+    print(f"tagging each line:         {elapsed * 1000:10.2f} ms per typed character")
+    elapsed = bench_typing(viewer, viewer.update_editor_line_colors, args.lines, args.moves, args.seed)
+    print(f"update_editor_line_colors: {elapsed * 1000:10.2f} ms per typed character")
+
+    for line in (1, args.lines // 2, args.lines):
+        begin = time.perf_counter()
+        viewer.text_editor.insert(f"{line}.0", "new task\n")
+        viewer.update_editor_line_colors()
+        print(f"update after inserting line {line}: {(time.perf_counter() - begin) * 1000:10.2f} ms")
+
+    viewer.main_window.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark of filtering todo.txt lines with the filter index, compared with checking every line,
+of filtering tasks with queries, and of listing and searching their tags.
+
+Doesn't need a display, run it from the repository root:
+
+    python benchmarks/bench_filter.py --lines 100000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import KanbanTxtModel
+import KanbanTxtQuery
+from todo_generator import generate_tags, generate_text
+
+FILTERS = [
+    ("+project17", False),
+    ("@context3", False),
+    ("knbn:in_progress", False),
+    ("review", False),
+    ("fix parser", False),
+    (r"\(A\).*\+project1\b", True),
+]
+
+TAG_PATTERNS = ["r", "re", "rel", "release-b", "rlsbg"]
+
+QUERIES = [
+    "prio:A",
+    "+project17",
+    "(prio:A or prio:B) +project12 not state:done",
+    "state:in_progress @context3",
+    "due:2021-01-01..2021-06-30",
+    "fix and review",
+]
+
+
+def scan_lines(text, pattern, use_regex):
+    """Filter lines the way KanbanTxt did before the filter index"""
+    matching_lines = []
+    for i, line in enumerate(text.split('\n')):
+        if use_regex:
+            is_this_line_included = len(re.findall(pattern, line)) > 0
+        else:
+            is_this_line_included = pattern.casefold() in line.casefold()
+        if is_this_line_included:
+            matching_lines.append(i)
+    return matching_lines
+
+
+def scan_tags(tags, pattern):
+    """Filter tags the way the tags browser did before the tag search index"""
+    return [tag for tag in tags if pattern.lower() in tag.lower()]
+
+
+def measure(function, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - begin
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark filtering of todo.txt lines')
+    arg_parser.add_argument('--lines', help='Number of lines in generated todo.txt', type=int, default=100000)
+    arg_parser.add_argument('--repeat', help='Number of runs, the best one is reported', type=int, default=3)
+    arg_parser.add_argument('--tags', help='Number of generated tags to search', type=int, default=50000)
+    arg_parser.add_argument('--seed', help='Seed of the todo.txt generator', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    text = generate_text(args.lines, args.seed)
+    elapsed, index = measure(lambda: KanbanTxtModel.FilterIndex(text), args.repeat)
+    print(f"indexing {args.lines} lines: {elapsed * 1000:10.2f} ms")
+
+    for pattern, use_regex in FILTERS:
+        scan_time, expected = measure(lambda: scan_lines(text, pattern, use_regex), args.repeat)
+        index_time, result = measure(lambda: index.search(pattern, use_regex), args.repeat)
+        if result != expected:
+            print(f"MISMATCH for filter {pattern!r}")
+            sys.exit(1)
+        print(f"{pattern!r:>26}: {len(result):>7} lines, scan {scan_time * 1000:10.2f} ms, "
+              f"index {index_time * 1000:10.2f} ms")
+
+    model = KanbanTxtModel.TaskModel(text)
+    elapsed, _ = measure(lambda: KanbanTxtModel.TaskIndex(model.tasks), args.repeat)
+    print(f"indexing {len(model.tasks)} tasks: {elapsed * 1000:10.2f} ms")
+    # the model builds its index on first use
+    model.index
+    for query in QUERIES:
+        node = KanbanTxtQuery.compile_query(query)
+        elapsed, result = measure(lambda: KanbanTxtQuery.find_tasks(node, model), args.repeat)
+        print(f"{query!r:>48}: {len(result):>7} tasks, {elapsed * 1000:10.2f} ms")
+
+    for index_name in ('by_project', 'by_context'):
+        elapsed, result = measure(lambda: KanbanTxtModel.sort_tag_usage(model.index.get_tag_usage(index_name),
+                                                                         KanbanTxtModel.TAG_ORDER_FREQUENCY),
+                                  args.repeat)
+        print(f"tags {index_name}: {len(result):>7} tags, {elapsed * 1000:10.2f} ms")
+
+    tags = generate_tags(args.tags, args.seed)
+    tag_positions = {tag: position for position, tag in enumerate(tags)}
+    tag_search = KanbanTxtModel.TagSearchIndex(tags)
+    elapsed, _ = measure(lambda: tag_search.get_candidates("rel"), 1)
+    print(f"indexing trigrams of {len(tags)} tags: {elapsed * 1000:10.2f} ms")
+    for pattern in TAG_PATTERNS:
+        scan_time, scan_result = measure(lambda: scan_tags(tags, pattern), args.repeat)
+        search_time, result = measure(lambda: tag_search.search(pattern, tag_positions), args.repeat)
+        fuzzy_time, fuzzy_result = measure(lambda: tag_search.search_fuzzy(pattern, tag_positions), args.repeat)
+        if sorted(scan_result) != sorted(result):
+            print(f"MISMATCH for tag pattern {pattern!r}")
+        print(f"{pattern!r:>12}: {len(result):>7} tags, scan {scan_time * 1000:10.2f} ms, "
+              f"index {search_time * 1000:10.2f} ms, {len(fuzzy_result):>7} fuzzy {fuzzy_time * 1000:10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
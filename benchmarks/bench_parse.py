@@ -0,0 +1,151 @@
+"""Benchmark of parsing todo.txt content with the GUI-free task model.
+
+Doesn't need a display, run it from the repository root:
+
+    python benchmarks/bench_parse.py --lines 1000 10000 200000
+
+Loading the file in chunks, the way KanbanTxt loads big files, is measured with --load, sorting
+of the columns with --sort.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import KanbanTxtModel
+import KanbanTxtStorage
+from todo_generator import generate_text
+
+
+# composite sort specs measured with --sort, along with the sort methods
+SORT_SPECS = ['priority,created,project', '-completed', '-subject,order']
+
+
+def bench_parse(text, repeat):
+    """Return the best time of parsing the whole text, in seconds"""
+    model = KanbanTxtModel.TaskModel()
+    best = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        model.parse(text)
+        elapsed = time.perf_counter() - begin
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_update_one_line(text, repeat):
+    """Return the best time of updating the model after a single line was edited, in seconds,
+    and the number of lines parsed again"""
+    lines = text.split('\n')
+    middle = len(lines) // 2
+    edited_lines = list(lines)
+    edited_lines[middle] = "x " + edited_lines[middle]
+    edited_text = '\n'.join(edited_lines)
+
+    model = KanbanTxtModel.TaskModel(text)
+    best = None
+    for i in range(repeat):
+        begin = time.perf_counter()
+        model.update(edited_text if i % 2 == 0 else text)
+        elapsed = time.perf_counter() - begin
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, model.reparsed_lines
+
+
+def bench_sort(text, repeat, order):
+    """Return times of sorting all tasks by the SortMethod or SortSpec: the first sort computing their keys,
+    the best of sorting them again with the computed keys, and of keeping the columns sorted after a single
+    line was edited, in seconds"""
+    model = KanbanTxtModel.TaskModel(text)
+    begin = time.perf_counter()
+    sorted(model.tasks, key=order.get_order_key)
+    first_time = time.perf_counter() - begin
+    best_full = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        sorted(model.tasks, key=order.get_order_key)
+        elapsed = time.perf_counter() - begin
+        if best_full is None or elapsed < best_full:
+            best_full = elapsed
+
+    lines = text.split('\n')
+    middle = len(lines) // 2
+    edited_lines = list(lines)
+    edited_lines[middle] = "x " + edited_lines[middle]
+    edited_text = '\n'.join(edited_lines)
+    sorted_columns = KanbanTxtModel.SortedColumns()
+    sorted_columns.set_orders([order] * KanbanTxtModel.COLUMNS_COUNT)
+    sorted_columns.sync(model)
+    best_incremental = None
+    for i in range(repeat):
+        model.update(edited_text if i % 2 == 0 else text)
+        begin = time.perf_counter()
+        sorted_columns.sync(model)
+        elapsed = time.perf_counter() - begin
+        if best_incremental is None or elapsed < best_incremental:
+            best_incremental = elapsed
+    return first_time, best_full, best_incremental
+
+
+def bench_load(text):
+    """Return times of reading and parsing the whole file, of the first chunk and of all the chunks,
+    in seconds"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.todo.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+        begin = time.perf_counter()
+        KanbanTxtModel.TaskModel(KanbanTxtStorage.TodoFile().read(path))
+        whole_time = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        model = KanbanTxtModel.TaskModel()
+        first_chunk_time = None
+        for chunk, bytes_read in KanbanTxtStorage.read_chunks(path):
+            model.extend(chunk)
+            if first_chunk_time is None:
+                first_chunk_time = time.perf_counter() - begin
+        chunks_time = time.perf_counter() - begin
+    return whole_time, first_chunk_time, chunks_time
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark parsing of todo.txt content')
+    arg_parser.add_argument('--lines', help='Number of lines in generated todo.txt', nargs='+', type=int,
+                            default=[1000, 10000, 100000])
+    arg_parser.add_argument('--repeat', help='Number of runs, the best one is reported', type=int, default=3)
+    arg_parser.add_argument('--seed', help='Seed of the todo.txt generator', type=int, default=0)
+    arg_parser.add_argument('--load', help='Measure loading the file in chunks', action='store_true')
+    arg_parser.add_argument('--sort', help='Measure sorting of the columns', action='store_true')
+    args = arg_parser.parse_args()
+
+    for line_count in args.lines:
+        text = generate_text(line_count, args.seed)
+        elapsed = bench_parse(text, args.repeat)
+        print(f"parse {line_count:>8} lines: {elapsed * 1000:10.2f} ms  {line_count / elapsed:12.0f} lines/s")
+        elapsed, reparsed_lines = bench_update_one_line(text, args.repeat)
+        print(f"update after editing 1 of {line_count:>8} lines: {elapsed * 1000:10.2f} ms  "
+              f"{reparsed_lines} line(s) parsed again")
+        if args.sort:
+            orders = [KanbanTxtModel.SortMethod(key_name) for key_name in KanbanTxtModel.SORT_KEY_FUNCTIONS]
+            orders += [KanbanTxtModel.SortSpec(spec) for spec in SORT_SPECS]
+            for order in orders:
+                first_time, full_time, incremental_time = bench_sort(text, args.repeat, order)
+                name = order.text if isinstance(order, KanbanTxtModel.SortSpec) else order.key_name
+                print(f"sort {line_count:>8} lines by {name:>24}: computing keys {first_time * 1000:10.2f} ms, "
+                      f"sorting again {full_time * 1000:10.2f} ms, after editing a line {incremental_time * 1000:10.2f} ms")
+        if args.load:
+            whole_time, first_chunk_time, chunks_time = bench_load(text)
+            print(f"load {line_count:>8} lines: whole file {whole_time * 1000:10.2f} ms, "
+                  f"first chunk {first_chunk_time * 1000:10.2f} ms, all chunks {chunks_time * 1000:10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
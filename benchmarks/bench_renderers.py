@@ -0,0 +1,64 @@
+"""Benchmark comparing task cards made of widgets with task cards drawn as canvas items.
+
+Needs a display (e.g. Xvfb on CI machines), run it from the repository root:
+
+    python benchmarks/bench_renderers.py --cards 1000 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import KanbanTxt
+from bench_cards import create_viewer
+from todo_generator import generate_lines
+
+
+def bench_renderer(renderer, lines):
+    """Return times of the first draw of all cards and of a reload after editing a line, in seconds"""
+    viewer = create_viewer()
+    if viewer is None:
+        return None
+    viewer.card_renderer = renderer
+    viewer.virtualized_columns = False
+
+    begin = time.perf_counter()
+    viewer.reload_ui_from_text('\n'.join(lines))
+    first_draw = time.perf_counter() - begin
+
+    edited_lines = list(lines)
+    edited_lines[-1] = "x " + edited_lines[-1]
+    begin = time.perf_counter()
+    viewer.reload_ui_from_text('\n'.join(edited_lines))
+    reload = time.perf_counter() - begin
+
+    viewer.main_window.destroy()
+    return first_draw, reload
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Compare renderers of task cards')
+    arg_parser.add_argument('--cards', help='Numbers of task cards to draw', nargs='+', type=int,
+                            default=[1000, 10000, 100000])
+    arg_parser.add_argument('--renderers', help='Renderers to compare', nargs='+',
+                            default=[KanbanTxt.KanbanTxtViewer.CARD_RENDERER_WIDGETS,
+                                     KanbanTxt.KanbanTxtViewer.CARD_RENDERER_CANVAS])
+    arg_parser.add_argument('--seed', help='Seed of the todo.txt generator', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    for card_count in args.cards:
+        lines = generate_lines(card_count, args.seed)
+        for renderer in args.renderers:
+            result = bench_renderer(renderer, lines)
+            if result is None:
+                sys.exit(0)
+            first_draw, reload = result
+            print(f"{renderer:>8} {card_count:>8} cards: first draw {first_draw * 1000:10.2f} ms, "
+                  f"reload after editing a line {reload * 1000:10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
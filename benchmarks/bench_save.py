@@ -0,0 +1,81 @@
+"""Benchmark of saving todo.txt content: plain rewrite of the file, compared with the atomic save,
+which skips writes of unchanged content, and with appending changed lines to the journal.
+
+Doesn't need a display, run it from the repository root:
+
+    python benchmarks/bench_save.py --lines 1000 10000 100000
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import KanbanTxtStorage
+from todo_generator import generate_text
+
+
+def rewrite(path, text):
+    """Write the file the way KanbanTxt did before the atomic save"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def measure(function, repeat):
+    best = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - begin
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark saving of todo.txt content')
+    arg_parser.add_argument('--lines', help='Number of lines in generated todo.txt', nargs='+', type=int,
+                            default=[1000, 10000, 100000])
+    arg_parser.add_argument('--repeat', help='Number of runs, the best one is reported', type=int, default=5)
+    arg_parser.add_argument('--seed', help='Seed of the todo.txt generator', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.todo.txt')
+        for line_count in args.lines:
+            text = generate_text(line_count, args.seed)
+            edited_text = text + "\nx new task"
+            todo_file = KanbanTxtStorage.TodoFile()
+            rewrite(path, text)
+            todo_file.read(path)
+
+            rewrite_time = measure(lambda: rewrite(path, text), args.repeat)
+            todo_file.save(path, text)
+            unchanged_time = measure(lambda: todo_file.save(path, text), args.repeat)
+            # each save changes the content
+            texts = itertools.cycle([edited_text, text])
+            changed_time = measure(lambda: todo_file.save(path, next(texts)), args.repeat)
+            print(f"{line_count:>8} lines: rewrite {rewrite_time * 1000:8.2f} ms, "
+                  f"unchanged save {unchanged_time * 1000:8.2f} ms, "
+                  f"atomic save {changed_time * 1000:8.2f} ms  {todo_file.last_save.bytes_written} bytes")
+
+            todo_file.save(path, text)
+            journal = KanbanTxtStorage.TodoJournal(path)
+            journal.start(text)
+            lines = text.split('\n')
+            middle = len(lines) // 2
+            # each change marks a task done, or undoes it
+            texts = itertools.cycle(['\n'.join(lines[:middle] + ["x " + lines[middle]] + lines[middle + 1:]), text])
+            reports = []
+            journal_time = measure(lambda: reports.append(journal.append(next(texts))), args.repeat)
+            print(f"{line_count:>8} lines: journal append {journal_time * 1000:8.2f} ms  "
+                  f"{reports[-1].bytes_appended} bytes")
+            journal.remove()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""Suite of benchmarks of big kanban boards, writing the results as JSON, so runs can be compared
+between versions and machines.
+
+The headless part measures the GUI-free work: parsing, updating after an edit, sorting, filtering,
+counting tags and the transformations of lines made when a card is moved or its priority changed.
+Run it from the repository root:
+
+    python benchmarks/bench_suite.py --lines 1000 10000 100000 1000000 --output results.json
+
+With --gui, drawing the board, reloading it after an edit and moving cards between columns the way
+dropping them does are measured too. They need a display, if there is none, Xvfb is started when
+it's installed, otherwise they're skipped:
+
+    python benchmarks/bench_suite.py --gui --gui-lines 1000 10000 --output results.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import KanbanTxt
+import KanbanTxtModel
+import KanbanTxtQuery
+from bench_cards import create_viewer
+from bench_filter import FILTERS, QUERIES, measure
+from bench_parse import SORT_SPECS, bench_parse, bench_sort, bench_update_one_line
+from todo_generator import generate_lines
+
+
+# number of lines changed by each measured transformation
+TRANSFORMED_LINES = 10000
+
+XVFB_DISPLAY = ':99'
+XVFB_START_DELAY = 1.0
+
+
+class Results:
+    """Measured times by benchmark names and numbers of lines"""
+
+    def __init__(self, args):
+        self.metadata = {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'lines': args.lines,
+            'gui_lines': args.gui_lines if args.gui else [],
+        }
+        self.benchmarks = []
+
+    def add(self, name, line_count, elapsed, **details):
+        """Add the time of the benchmark in seconds, along with its details, e.g. the number of results"""
+        self.benchmarks.append({'name': name, 'lines': line_count, 'time_ms': elapsed * 1000, **details})
+        details_text = ', '.join(f"{key} {value}" for key, value in details.items())
+        print(f"{name:>52} {line_count:>8} lines: {elapsed * 1000:10.2f} ms  {details_text}", file=sys.stderr)
+
+    def to_dict(self):
+        return {'metadata': self.metadata, 'benchmarks': self.benchmarks}
+
+
+def bench_headless(results, lines, repeat):
+    line_count = len(lines)
+    text = '\n'.join(lines)
+
+    results.add('parse', line_count, bench_parse(text, repeat))
+    elapsed, reparsed_lines = bench_update_one_line(text, repeat)
+    results.add('update after editing a line', line_count, elapsed, reparsed_lines=reparsed_lines)
+
+    orders = [KanbanTxtModel.SortMethod(key_name) for key_name in KanbanTxtModel.SORT_KEY_FUNCTIONS]
+    orders += [KanbanTxtModel.SortSpec(spec) for spec in SORT_SPECS]
+    for order in orders:
+        name = order.text if isinstance(order, KanbanTxtModel.SortSpec) else order.key_name
+        first_time, full_time, incremental_time = bench_sort(text, repeat, order)
+        results.add(f"sort by {name}", line_count, first_time)
+        results.add(f"sort again by {name}", line_count, full_time)
+        results.add(f"sort after editing a line by {name}", line_count, incremental_time)
+
+    elapsed, filter_index = measure(lambda: KanbanTxtModel.FilterIndex(text), repeat)
+    results.add('index lines for filter', line_count, elapsed)
+    for pattern, use_regex in FILTERS:
+        elapsed, matching_lines = measure(lambda: filter_index.search(pattern, use_regex), repeat)
+        results.add(f"filter {pattern}", line_count, elapsed, matches=len(matching_lines))
+
+    model = KanbanTxtModel.TaskModel(text)
+    elapsed, task_index = measure(lambda: KanbanTxtModel.TaskIndex(model.tasks), repeat)
+    results.add('index tasks', line_count, elapsed)
+    model.index
+    for query in QUERIES:
+        node = KanbanTxtQuery.compile_query(query)
+        elapsed, tasks = measure(lambda: KanbanTxtQuery.find_tasks(node, model), repeat)
+        results.add(f"query {query}", line_count, elapsed, matches=len(tasks))
+
+    for index_name in ('by_project', 'by_context'):
+        elapsed, tag_usage = measure(
+            lambda: KanbanTxtModel.sort_tag_usage(task_index.get_tag_usage(index_name),
+                                                  KanbanTxtModel.TAG_ORDER_FREQUENCY),
+            repeat)
+        results.add(f"count tags {index_name}", line_count, elapsed, tags=len(tag_usage))
+
+    bench_transforms(results, lines, repeat)
+
+
+def bench_transforms(results, lines, repeat):
+    """Measure the transformations of lines made by moving cards and changing priorities"""
+    # set_state and set_priority only use class constants of the viewer, so they run without its window
+    viewer = KanbanTxt.KanbanTxtViewer.__new__(KanbanTxt.KanbanTxtViewer)
+    transformed = lines[:TRANSFORMED_LINES]
+    states = [
+        ('todo', ''),
+        ('in_progress', f' {viewer.KANBAN_KEY}:{viewer.KANBAN_VAL_IN_PROGRESS}'),
+        ('validation', f' {viewer.KANBAN_KEY}:{viewer.KANBAN_VAL_VALIDATION}'),
+        ('done', 'x'),
+    ]
+    for state_name, new_state in states:
+        elapsed, _ = measure(lambda: [viewer.set_state(line, new_state) for line in transformed], repeat)
+        results.add(f"set state {state_name}", len(lines), elapsed, transformed_lines=len(transformed))
+    for new_priority in ('(A) ', ''):
+        elapsed, _ = measure(lambda: [viewer.set_priority(line, new_priority) for line in transformed], repeat)
+        results.add(f"set priority {new_priority.strip() or 'none'}", len(lines), elapsed,
+                    transformed_lines=len(transformed))
+
+
+def start_xvfb():
+    """Start Xvfb if there is no display, return its process, None if it isn't needed or available"""
+    if os.environ.get('DISPLAY') or shutil.which('Xvfb') is None:
+        return None
+    process = subprocess.Popen(['Xvfb', XVFB_DISPLAY, '-screen', '0', '1920x1080x24'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(XVFB_START_DELAY)
+    os.environ['DISPLAY'] = XVFB_DISPLAY
+    return process
+
+
+def bench_gui(results, lines, renderer, moves):
+    """Measure the board drawn with the renderer, return False if the viewer can't be created"""
+    viewer = create_viewer()
+    if viewer is None:
+        return False
+    viewer.card_renderer = renderer
+    viewer.virtualized_columns = False
+    line_count = len(lines)
+
+    begin = time.perf_counter()
+    viewer.reload_ui_from_text('\n'.join(lines))
+    viewer.main_window.update()
+    results.add(f"draw board {renderer}", line_count, time.perf_counter() - begin)
+
+    edited_lines = list(lines)
+    edited_lines[line_count // 2] = "x " + edited_lines[line_count // 2]
+    begin = time.perf_counter()
+    viewer.reload_ui_from_text('\n'.join(edited_lines))
+    viewer.main_window.update()
+    results.add(f"reload after editing a line {renderer}", line_count, time.perf_counter() - begin)
+
+    # dropping a card on a column calls the move functor with the card line selected in the editor
+    move_functors = [viewer.move_to_in_progress, viewer.move_to_validation, viewer.move_to_done,
+                     viewer.move_to_todo]
+    begin = time.perf_counter()
+    for i in range(moves):
+        viewer.text_editor.mark_set('insert', f"{(i * 7919) % line_count + 1}.0")
+        move_functors[i % len(move_functors)]()
+        viewer.main_window.update()
+    results.add(f"move card {renderer}", line_count, (time.perf_counter() - begin) / moves, moves=moves)
+
+    viewer.main_window.destroy()
+    return True
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Run the benchmarks of big kanban boards')
+    arg_parser.add_argument('--lines', help='Numbers of lines in generated todo.txt', nargs='+', type=int,
+                            default=[1000, 10000, 100000])
+    arg_parser.add_argument('--repeat', help='Number of runs, the best one is reported', type=int, default=3)
+    arg_parser.add_argument('--seed', help='Seed of the todo.txt generator', type=int, default=0)
+    arg_parser.add_argument('--gui', help='Measure the kanban board too, needs a display or Xvfb',
+                            action='store_true')
+    arg_parser.add_argument('--gui-lines', help='Numbers of lines of the measured kanban board', nargs='+',
+                            type=int, default=[1000, 10000])
+    arg_parser.add_argument('--renderers', help='Renderers of task cards measured with --gui', nargs='+',
+                            default=[KanbanTxt.KanbanTxtViewer.CARD_RENDERER_WIDGETS,
+                                     KanbanTxt.KanbanTxtViewer.CARD_RENDERER_CANVAS])
+    arg_parser.add_argument('--moves', help='Number of cards moved between columns with --gui', type=int,
+                            default=20)
+    arg_parser.add_argument('--output', help='Path of the JSON results, printed if omitted')
+    args = arg_parser.parse_args()
+
+    results = Results(args)
+    for line_count in args.lines:
+        bench_headless(results, generate_lines(line_count, args.seed), args.repeat)
+
+    if args.gui:
+        xvfb = start_xvfb()
+        try:
+            for line_count in args.gui_lines:
+                lines = generate_lines(line_count, args.seed)
+                if not all(bench_gui(results, lines, renderer, args.moves) for renderer in args.renderers):
+                    results.metadata['gui_lines'] = []
+                    print("Kanban board benchmarks skipped, there is no display", file=sys.stderr)
+                    break
+        finally:
+            if xvfb is not None:
+                xvfb.terminate()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results.to_dict(), f, indent=4)
+    else:
+        print(json.dumps(results.to_dict(), indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Throughput benchmark of the todo.txt tokenizer.
+
+The tokenizer of KanbanTxtModel walks each line once. This script reports its throughput in lines/s,
+compared with the reference implementation based on the regexes previously used by KanbanTxt. Their
+results are checked to be the same by tests/test_parse_task.py.
+
+    python benchmarks/bench_tokenizer.py --lines 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+import KanbanTxtModel
+from test_parse_task import reference_parse
+from todo_generator import generate_lines
+
+
+def measure(parse, lines, repeat):
+    best = None
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        for line in lines:
+            parse(line)
+        elapsed = time.perf_counter() - begin
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark the todo.txt tokenizer')
+    arg_parser.add_argument('--lines', help='Number of generated lines', type=int, default=100000)
+    arg_parser.add_argument('--repeat', help='Number of runs, the best one is reported', type=int, default=3)
+    arg_parser.add_argument('--seed', help='Seed of the todo.txt generator', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    lines = generate_lines(args.lines, args.seed)
+
+    reference_time = measure(reference_parse, lines, args.repeat)
+    tokenizer_time = measure(lambda line: KanbanTxtModel.parse_task(line, 0), lines, args.repeat)
+    print(f"regex cascade: {len(lines) / reference_time:12.0f} lines/s")
+    print(f"tokenizer:     {len(lines) / tokenizer_time:12.0f} lines/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Deterministic generator of synthetic todo.txt content for benchmarks."""
+
+import random
+from datetime import date
+
+WORDS = [
+    "fix", "write", "review", "deploy", "refactor", "call", "plan", "update", "check", "prepare",
+    "meeting", "report", "release", "parser", "board", "invoice", "server", "docs", "backup", "budget",
+]
+
+
+def generate_lines(count, seed=0):
+    """Return a list of `count` todo.txt lines, the same for the same seed"""
+    rng = random.Random(seed)
+    first_day = date(2020, 1, 1).toordinal()
+    lines = []
+    for i in range(count):
+        parts = []
+        is_done = rng.random() < 0.3
+        if is_done:
+            parts.append("x")
+        if rng.random() < 0.5:
+            parts.append(f"({rng.choice('ABCDEFZ')})")
+        if rng.random() < 0.6:
+            start = first_day + rng.randrange(1500)
+            if is_done:
+                parts.append(str(date.fromordinal(start + rng.randrange(60))))
+            parts.append(str(date.fromordinal(start)))
+        parts.extend(rng.choice(WORDS) for _ in range(rng.randint(2, 8)))
+        for _ in range(rng.choice((0, 1, 1, 2, 3))):
+            parts.append(f"+project{rng.randrange(200)}")
+        for _ in range(rng.choice((0, 1, 2))):
+            parts.append(f"@context{rng.randrange(30)}")
+        if not is_done:
+            state = rng.random()
+            if state < 0.2:
+                parts.append("knbn:in_progress")
+            elif state < 0.3:
+                parts.append("knbn:validation")
+        if rng.random() < 0.3:
+            parts.append(f"due:{date.fromordinal(first_day + rng.randrange(1500))}")
+        if rng.random() < 0.1:
+            parts.append(f"id:{i}")
+        lines.append(" ".join(parts))
+    return lines
+
+
+def generate_text(count, seed=0):
+    return "\n".join(generate_lines(count, seed))
+
+
+def generate_tags(count, seed=0):
+    """Return a list of `count` distinct project tags, the same for the same seed"""
+    rng = random.Random(seed)
+    tags = set()
+    while len(tags) < count:
+        words = "-".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        tags.add(f"+{words}{rng.randrange(1000)}")
+    return sorted(tags)
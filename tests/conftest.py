@@ -0,0 +1,8 @@
+import os
+import sys
+
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules of KanbanTxt and the todo.txt generator of the benchmarks are imported by tests
+sys.path.insert(0, REPOSITORY_DIRECTORY)
+sys.path.insert(0, os.path.join(REPOSITORY_DIRECTORY, 'benchmarks'))
@@ -0,0 +1,52 @@
+"""Finding task cards drawn on the canvas of a column, at positions of the mouse cursor.
+
+The canvas is replaced with a stub, holding rectangles of items and their tags, so the tests don't need a display."""
+
+import KanbanTxt
+import KanbanTxtModel
+
+
+class StubCanvas:
+    def __init__(self, items):
+        # item: (x1, y1, x2, y2, tags)
+        self.items = items
+
+    def find_overlapping(self, x1, y1, x2, y2):
+        return tuple(item for item, (left, top, right, bottom, tags) in self.items.items()
+                     if left <= x2 and x1 <= right and top <= y2 and y1 <= bottom)
+
+    def gettags(self, item):
+        return self.items[item][4]
+
+
+def create_card_column():
+    """Return a column with two cards, 50 pixels high and separated by a gap, on a canvas 200 pixels wide"""
+    first_task = KanbanTxtModel.parse_task("first task", 0)
+    second_task = KanbanTxtModel.parse_task("second task", 1)
+    card_column = KanbanTxt.CanvasCardColumn.__new__(KanbanTxt.CanvasCardColumn)
+    card_column.canvas = StubCanvas({
+        1: (0, 0, 200, 50, ('card', 'card0')),
+        2: (10, 10, 100, 20, ('card', 'card0')),
+        3: (0, 60, 200, 110, ('card', 'card1')),
+        4: (0, 200, 200, 210, ('placeholder',)),
+    })
+    card_column.card_tasks = {'card0': first_task, 'card1': second_task}
+    return card_column, first_task, second_task
+
+
+def test_task_of_card_at_position():
+    card_column, first_task, second_task = create_card_column()
+    assert card_column.get_task_at(15, 15) is first_task
+    assert card_column.get_task_at(150, 100) is second_task
+
+
+def test_no_task_in_gap_between_cards():
+    card_column, first_task, second_task = create_card_column()
+    assert card_column.get_task_at(100, 55) is None
+
+
+def test_no_task_below_cards():
+    card_column, first_task, second_task = create_card_column()
+    assert card_column.get_task_at(100, 150) is None
+    # items, which aren't parts of cards, aren't tasks
+    assert card_column.get_task_at(100, 205) is None
@@ -0,0 +1,55 @@
+"""Searches of the FilterIndex compared with checking every line."""
+
+import re
+
+import pytest
+
+import KanbanTxtModel
+from todo_generator import generate_lines
+
+
+LINES = generate_lines(500) + [
+    "",
+    "Mixed CASE +Project @Home",
+    "task with  two spaces",
+    "ünïcödé line +ĞÜŞ",
+]
+
+
+def scan_lines(pattern, use_regex):
+    if use_regex:
+        return [index for index, line in enumerate(LINES) if re.search(pattern, line)]
+    return [index for index, line in enumerate(LINES) if pattern.casefold() in line.casefold()]
+
+
+@pytest.mark.parametrize('pattern', [
+    "", "fix", "FIX", "+project1", "+project17", "@context3", "knbn:in_progress", "x ", "fix parser",
+    "two  spaces", "case +pro", "ğüş", "re", "nothing matches this",
+])
+def test_substring_search_is_same_as_scan(pattern):
+    index = KanbanTxtModel.FilterIndex('\n'.join(LINES))
+    assert index.search(pattern) == scan_lines(pattern, False)
+
+
+@pytest.mark.parametrize('pattern', [r"\(A\).*\+project1\b", r"^x ", r"due:2021-\d\d"])
+def test_regex_search_is_same_as_scan(pattern):
+    index = KanbanTxtModel.FilterIndex('\n'.join(LINES))
+    assert index.search(pattern, use_regex=True) == scan_lines(pattern, True)
+
+
+def test_narrowed_search_is_same_as_scan():
+    index = KanbanTxtModel.FilterIndex('\n'.join(LINES))
+    pattern = ""
+    for character in "+project1":
+        pattern += character
+        assert index.search(pattern) == scan_lines(pattern, False)
+    # widening the pattern again doesn't reuse the last result
+    assert index.search("+pro") == scan_lines("+pro", False)
+
+
+def test_update_replaces_indexed_lines():
+    index = KanbanTxtModel.FilterIndex("first task\nsecond task")
+    index.search("first")
+    index.update("second task\nthird task")
+    assert index.search("first") == []
+    assert index.search("third") == [1]
@@ -0,0 +1,102 @@
+"""Three-way merge of changes of a todo.txt file made in KanbanTxt and by another program."""
+
+import random
+
+import pytest
+
+import KanbanTxtStorage
+
+
+BASE = "first\nsecond\nthird\nfourth\nfifth"
+
+
+def merge(base, local, remote):
+    return KanbanTxtStorage.ThreeWayMerge(base, local, remote)
+
+
+def test_change_of_one_side_is_taken():
+    local = "first\nx second\nthird\nfourth\nfifth"
+    assert merge(BASE, local, BASE).get_text() == local
+    assert merge(BASE, BASE, local).get_text() == local
+    assert merge(BASE, local, local).get_text() == local
+
+
+def test_changes_of_separate_lines_are_merged():
+    local = "x first\nsecond\nthird\nfourth\nfifth"
+    remote = "first\nsecond\nthird\nfourth\nfifth\nsixth"
+    result = merge(BASE, local, remote)
+    assert result.conflicts == []
+    assert result.get_text() == "x first\nsecond\nthird\nfourth\nfifth\nsixth"
+
+
+def test_inserted_and_removed_lines_are_merged():
+    local = "first\nnew local\nsecond\nthird\nfourth\nfifth"
+    remote = "first\nsecond\nthird\nfifth"
+    result = merge(BASE, local, remote)
+    assert result.conflicts == []
+    assert result.get_text() == "first\nnew local\nsecond\nthird\nfifth"
+
+
+def test_same_change_of_both_sides_isnt_conflict():
+    changed = "first\nsecond\nx third\nfourth\nfifth"
+    result = merge(BASE, changed + "\nlocal", changed)
+    assert result.conflicts == []
+    assert result.get_text() == changed + "\nlocal"
+
+
+def test_different_changes_of_same_line_are_conflict():
+    local = "first\nsecond\n(A) third\nfourth\nfifth"
+    remote = "first\nsecond\nx third\nfourth\nfifth"
+    result = merge(BASE, local, remote)
+    assert result.conflicts == [KanbanTxtStorage.MergeConflict(3, ["(A) third"], ["x third"])]
+    assert result.get_text(prefer_local=True) == local
+    assert result.get_text(prefer_local=False) == remote
+
+
+def test_lines_inserted_by_both_sides_at_same_place_are_conflict():
+    local = "first\nlocal\nsecond\nthird\nfourth\nfifth"
+    remote = "first\nremote\nsecond\nthird\nfourth\nfifth"
+    result = merge(BASE, local, remote)
+    assert result.conflicts == [KanbanTxtStorage.MergeConflict(2, ["local"], ["remote"])]
+
+
+def mutate(lines, rng, begin, end):
+    """Return the lines with random changes between begin and end"""
+    changed = lines[begin:end]
+    for _ in range(3):
+        position = rng.randrange(len(changed) + 1)
+        operation = rng.randrange(3)
+        if operation == 0:
+            changed.insert(position, f"new {rng.random():.6f}")
+        elif position < len(changed):
+            if operation == 1:
+                del changed[position]
+            else:
+                changed[position] = "x " + changed[position]
+    return lines[:begin] + changed + lines[end:]
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_changes_of_separate_halves_are_merged(seed):
+    rng = random.Random(seed)
+    base = [f"task {i}" for i in range(rng.randrange(6, 30))]
+    middle = len(base) // 2
+    # a line between the halves stays unchanged, so changes of both sides don't touch
+    local = mutate(base, rng, 0, middle - 1)
+    remote = mutate(base, rng, middle + 1, len(base))
+    result = merge('\n'.join(base), '\n'.join(local), '\n'.join(remote))
+    local_head = local[:len(local) - (len(base) - middle + 1)]
+    assert result.conflicts == []
+    assert result.get_text() == '\n'.join(local_head + base[middle - 1:middle + 1] + remote[middle + 1:])
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_conflict_lines_are_numbered_in_merged_text(seed):
+    rng = random.Random(seed)
+    base = [f"task {i}" for i in range(rng.randrange(1, 20))]
+    local = mutate(base, rng, 0, len(base))
+    remote = mutate(base, rng, 0, len(base))
+    result = merge('\n'.join(base), '\n'.join(local), '\n'.join(remote))
+    merged_lines = result.get_text().split('\n')
+    for conflict in result.conflicts:
+        assert merged_lines[conflict.line - 1:conflict.line - 1 + len(conflict.local_lines)] == conflict.local_lines
@@ -0,0 +1,109 @@
+"""Equivalence of the single-pass tokenizer of todo.txt lines with the regexes previously used by KanbanTxt.
+
+Run it from the repository root:
+
+    python -m pytest tests
+"""
+
+import re
+
+import pytest
+
+import KanbanTxtModel
+from todo_generator import generate_lines
+
+TASK_R = re.compile(
+    r'^(?P<isDone>x )? '
+    r'?(?P<priority>\([A-Z]\))? '
+    r'?(?P<dates>\d\d\d\d-\d\d-\d\d( \d\d\d\d-\d\d-\d\d)?)? '
+    r'?(?P<subject>.+)')
+SPECIAL_KV_R = re.compile(r'(?P<key>[^:\s]+):(?P<val>[^:\s]+)')
+PROJECT_R = re.compile(r' (?P<project>\+\S+)')
+CONTEXT_R = re.compile(r' (?P<context>@\S+)')
+
+CORPUS = [
+    "simple task",
+    "x done task",
+    "x (A) done task with priority",
+    "(B) 2022-01-01 task with priority and start date",
+    "x 2022-02-02 2022-01-01 done task with both dates",
+    "(A)glued subject",
+    "(A)+glued project",
+    "2022-01-01+glued date",
+    "x (A)",
+    "x ",
+    "x",
+    " ",
+    "   leading spaces",
+    "x    many spaces after done mark",
+    "(A)  two spaces +proj",
+    "trailing spaces   ",
+    "task +project @context key:val",
+    "+project at the beginning",
+    "@context at the beginning",
+    "task +a+b @c@d +",
+    "task + @ +x @y",
+    "task\t+tab_separated\t@context",
+    "task \t+space_then_tab",
+    "task\t +tab_then_space",
+    "task\xa0+nbsp @ctx",
+    "url http://example.com/path?a=b",
+    "a:b:c:d:e",
+    "a::b:c",
+    ":a:b",
+    "a:b:",
+    "x::a:b::y",
+    "+p::a:b some text",
+    "+a:b project with kv",
+    "@c:d:e context with kv",
+    "a:b+c a:b:+c a:b:c:+d",
+    "task knbn:in_progress",
+    "task knbn:validation",
+    "x task knbn:in_progress",
+    "task knbn:unknown knbn:validation",
+    "task knbn:in_progress knbn:validation",
+    "task due:2022-12-24 rec:+1w",
+    "(Z) 2022-13-45 invalid date",
+    "(a) lowercase priority",
+    "((A)) double parenthesis",
+    "x x (A) double done mark",
+    "task ending with colon:",
+    "task : lonely colon",
+    "unicode ✅ zażółć +gęś @jaźń klucz:wartość",
+    "task\rwith carriage return",
+    "task\x0bwith vertical tab +proj",
+]
+
+
+def reference_parse(task_txt):
+    """Parse a line the way KanbanTxt did before the single-pass tokenizer"""
+    task_data = TASK_R.match(task_txt)
+    special_kv_data = tuple((m['key'], m['val']) for m in SPECIAL_KV_R.finditer(task_txt))
+    projects = tuple(m['project'] for m in PROJECT_R.finditer(task_txt))
+    contexts = tuple(m['context'] for m in CONTEXT_R.finditer(task_txt))
+    subject = task_data['subject']
+    subject = SPECIAL_KV_R.sub("", subject)
+    subject = PROJECT_R.sub("", subject)
+    subject = CONTEXT_R.sub("", subject)
+    return task_data['isDone'] is not None, task_data['priority'], task_data['dates'], subject, projects, contexts, special_kv_data
+
+
+def tokenizer_parse(task_txt):
+    task = KanbanTxtModel.parse_task(task_txt, 0)
+    priority = f"({task.priority})" if task.priority is not None else None
+    dates = KanbanTxtModel.TASK_HEAD_R.match(task_txt)['dates']
+    return task.is_done, priority, dates, task.subject, task.projects, task.contexts, task.special_kv_data
+
+
+@pytest.mark.parametrize('line', CORPUS)
+def test_corpus_line_parsed_as_by_regexes(line):
+    assert tokenizer_parse(line) == reference_parse(line)
+
+
+def test_generated_lines_parsed_as_by_regexes():
+    mismatches = [line for line in generate_lines(5000, seed=1) if tokenizer_parse(line) != reference_parse(line)]
+    assert mismatches == []
+
+
+def test_empty_line_has_no_task():
+    assert KanbanTxtModel.parse_task('', 0) is None
@@ -0,0 +1,55 @@
+"""Queries compiled by KanbanTxtQuery compared with checking every task."""
+
+import pytest
+
+import KanbanTxtModel
+import KanbanTxtQuery
+from todo_generator import generate_lines
+
+
+MODEL = KanbanTxtModel.TaskModel('\n'.join(generate_lines(1000) + [
+    "(C) 2023-01-10 write \"quoted\" docs +Release-1 @Office due:2023-01-31",
+    "x 2023-02-01 2023-01-15 review +release-2 knbn:validation",
+]))
+
+
+@pytest.mark.parametrize('query, predicate', [
+    ("prio:A", lambda task: task.priority == 'A'),
+    ("prio:b-d", lambda task: task.priority is not None and 'B' <= task.priority <= 'D'),
+    ("prio:none", lambda task: task.priority is None),
+    ("+project17", lambda task: '+project17' in task.projects),
+    ("project:project1*", lambda task: any(tag.startswith('+project1') for tag in task.projects)),
+    ("+release*", lambda task: any(tag.casefold().startswith('+release') for tag in task.projects)),
+    ("@context3", lambda task: '@context3' in task.contexts),
+    ("state:in_progress", lambda task: task.column == KanbanTxtModel.COLUMN_IN_PROGRESS),
+    ("state:done", lambda task: task.column == KanbanTxtModel.COLUMN_DONE),
+    ("not state:done", lambda task: task.column != KanbanTxtModel.COLUMN_DONE),
+    ("(prio:A or prio:B) +project12 not state:done",
+     lambda task: task.priority in ('A', 'B') and '+project12' in task.projects
+     and task.column != KanbanTxtModel.COLUMN_DONE),
+    ("fix and review", lambda task: 'fix' in task.raw_txt.casefold() and 'review' in task.raw_txt.casefold()),
+    ("fix or review", lambda task: 'fix' in task.raw_txt.casefold() or 'review' in task.raw_txt.casefold()),
+    ('"fix parser"', lambda task: 'fix parser' in task.raw_txt.casefold()),
+    ("due:*", lambda task: any(key == 'due' for key, val in task.special_kv_data)),
+    ("due:2021-01-01..2021-06-30",
+     lambda task: any(key == 'due' and '2021-01-01' <= val <= '2021-06-30' for key, val in task.special_kv_data)),
+    ("created:2021-01-01..", lambda task: task.start_date is not None and str(task.start_date) >= '2021-01-01'),
+    ("completed:..2020-06-30", lambda task: task.end_date is not None and str(task.end_date) <= '2020-06-30'),
+])
+def test_query_is_same_as_predicate(query, predicate):
+    expected = [task for task in MODEL.tasks if predicate(task)]
+    assert KanbanTxtQuery.find_tasks(query, MODEL) == expected
+
+
+@pytest.mark.parametrize('query', [
+    "", "(prio:A", "prio:A)", "or prio:A", "prio:A and", "prio:1", "state:unknown",
+    "created:2023-13-01", '"', '""', '"unterminated', 'fix "',
+])
+def test_invalid_query_is_rejected(query):
+    with pytest.raises(KanbanTxtQuery.QuerySyntaxError):
+        KanbanTxtQuery.compile_query(query)
+
+
+def test_compiled_query_is_reused():
+    node = KanbanTxtQuery.compile_query("+project17 or @context3")
+    assert KanbanTxtQuery.find_tasks(node, MODEL) == KanbanTxtQuery.find_tasks("+project17 or @context3", MODEL)
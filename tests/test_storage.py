@@ -0,0 +1,166 @@
+"""Reading and writing of todo.txt files and their sidecar files."""
+
+import os
+import stat
+
+import pytest
+
+import KanbanTxtStorage
+
+
+def get_mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_write_atomically_replaces_content(tmp_path):
+    path = str(tmp_path / 'todo.txt')
+    KanbanTxtStorage.write_atomically(path, "first")
+    KanbanTxtStorage.write_atomically(path, "second\nline")
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == "second\nline"
+    assert os.listdir(tmp_path) == ['todo.txt']
+
+
+def test_write_atomically_keeps_symlink(tmp_path):
+    target_directory = tmp_path / 'synced'
+    target_directory.mkdir()
+    target = target_directory / 'todo.txt'
+    target.write_text("old", encoding='utf-8')
+    link = tmp_path / 'todo.txt'
+    link.symlink_to(target)
+    KanbanTxtStorage.write_atomically(str(link), "new")
+    assert link.is_symlink()
+    assert target.read_text(encoding='utf-8') == "new"
+    assert sorted(os.listdir(tmp_path)) == ['synced', 'todo.txt']
+    assert os.listdir(target_directory) == ['todo.txt']
+
+
+def test_write_atomically_keeps_mode(tmp_path):
+    path = tmp_path / 'todo.txt'
+    path.write_text("old", encoding='utf-8')
+    os.chmod(path, 0o640)
+    KanbanTxtStorage.write_atomically(str(path), "new")
+    assert get_mode(path) == 0o640
+
+
+def test_write_atomically_creates_file_with_default_mode(tmp_path):
+    path = tmp_path / 'todo.txt'
+    KanbanTxtStorage.write_atomically(str(path), "new")
+    assert get_mode(path) == KanbanTxtStorage.NEW_FILE_MODE
+    with open(tmp_path / 'opened.txt', 'w') as f:
+        f.write("new")
+    assert get_mode(path) == get_mode(tmp_path / 'opened.txt')
+
+
+def write_journaled_changes(path, base_text, texts):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(base_text)
+    journal = KanbanTxtStorage.TodoJournal(path)
+    journal.start(base_text)
+    for text in texts:
+        journal.append(text)
+    return journal
+
+
+EDITS = [
+    "first\nsecond\nthird",
+    "x first\nsecond\nthird",
+    "x first\nsecond\nnew line\nthird",
+    "x first\nnew line\nthird",
+    "x first\nnew line\nthird\n",
+    "",
+    "only line",
+]
+
+
+def test_replay_journal_restores_last_content(tmp_path):
+    path = str(tmp_path / 'todo.txt')
+    base_text = "first\nsecond"
+    write_journaled_changes(path, base_text, EDITS)
+    assert KanbanTxtStorage.replay_journals(path, base_text) == (EDITS[-1], len(EDITS))
+
+
+def test_replay_journal_of_each_change(tmp_path):
+    base_text = "first\nsecond"
+    for count in range(1, len(EDITS) + 1):
+        path = str(tmp_path / f'todo{count}.txt')
+        write_journaled_changes(path, base_text, EDITS[:count])
+        assert KanbanTxtStorage.replay_journals(path, base_text)[0] == EDITS[count - 1]
+
+
+def test_replay_skips_torn_change(tmp_path):
+    path = str(tmp_path / 'todo.txt')
+    write_journaled_changes(path, "first", ["first\nsecond"])
+    with open(path + KanbanTxtStorage.JOURNAL_SUFFIX, 'a', encoding='utf-8') as f:
+        f.write('{"start": 0, "end": 1, "li')
+    assert KanbanTxtStorage.replay_journals(path, "first") == ("first\nsecond", 1)
+
+
+def test_replay_skips_journal_of_other_content(tmp_path):
+    path = str(tmp_path / 'todo.txt')
+    write_journaled_changes(path, "first", ["first\nsecond"])
+    assert KanbanTxtStorage.replay_journals(path, "already compacted") == ("already compacted", 0)
+
+
+def test_replay_of_unfinished_compaction(tmp_path):
+    path = str(tmp_path / 'todo.txt')
+    journal = write_journaled_changes(path, "first", ["first\nsecond"])
+    assert journal.begin_compaction() == "first\nsecond"
+    journal.append("first\nsecond\nthird")
+    # the compacted content wasn't written to the file, so both journals are replayed
+    assert KanbanTxtStorage.replay_journals(path, "first") == ("first\nsecond\nthird", 2)
+
+    KanbanTxtStorage.write_atomically(path, "first\nsecond")
+    journal.end_compaction()
+    assert KanbanTxtStorage.replay_journals(path, "first\nsecond") == ("first\nsecond\nthird", 1)
+    journal.remove()
+    assert KanbanTxtStorage.replay_journals(path, "first\nsecond") == ("first\nsecond", 0)
+
+
+def test_read_chunks_of_whole_lines(tmp_path):
+    path = tmp_path / 'todo.txt'
+    lines = [f"task {i} +project ✅" for i in range(1000)]
+    path.write_bytes('\r\n'.join(lines).encode('utf-8'))
+    chunks = list(KanbanTxtStorage.read_chunks(str(path), chunk_size=100))
+    assert len(chunks) > 1
+    assert all(text.endswith('\n') for text, bytes_read in chunks[:-1])
+    assert ''.join(text for text, bytes_read in chunks) == '\n'.join(lines)
+    assert chunks[-1][1] == path.stat().st_size
+
+
+def test_read_chunks_raises_for_invalid_encoding(tmp_path):
+    path = tmp_path / 'todo.txt'
+    path.write_bytes(b"first\n\xff invalid\n")
+    with pytest.raises(UnicodeDecodeError):
+        list(KanbanTxtStorage.read_chunks(str(path)))
+
+
+def test_change_during_chunked_read_is_found(tmp_path):
+    path = tmp_path / 'todo.txt'
+    path.write_text("first task\nsecond task\n", encoding='utf-8')
+    file_stat = os.stat(path)
+    chunks = KanbanTxtStorage.read_chunks(str(path), chunk_size=1)
+    text = next(chunks)[0]
+    # another program appends a line, after the first chunk is read
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("added task\n")
+    os.utime(path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 1_000_000_000))
+    text += ''.join(chunk for chunk, _ in chunks)
+    todo_file = KanbanTxtStorage.TodoFile()
+    todo_file.remember_read(str(path), text, file_stat)
+    assert todo_file.get_external_change(str(path)) == "first task\nsecond task\nadded task\n"
+
+
+def test_save_worker_updates_state_with_lock_held(tmp_path):
+    path = str(tmp_path / 'todo.txt')
+    todo_file = KanbanTxtStorage.TodoFile()
+    save_worker = KanbanTxtStorage.SaveWorker(todo_file, coalesce_delay=0)
+    with todo_file.lock:
+        save_worker.submit(path, "first")
+        save_worker.submit(path, "second")
+        # the state can't be changed, while the UI thread holds the lock
+        assert not save_worker.flush(timeout=0.2)
+        assert todo_file.state is None
+    assert save_worker.flush(timeout=5)
+    assert todo_file.is_saved(path, "second")
+    assert todo_file.last_save.is_written
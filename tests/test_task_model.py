@@ -0,0 +1,131 @@
+"""Incremental updates of the TaskModel compared with parsing the whole content again."""
+
+import random
+
+import pytest
+
+import KanbanTxtModel
+from todo_generator import generate_lines
+
+
+def get_state(model):
+    """Return the parsed tasks and the index of the model, comparable between models"""
+    tasks = [(task.index, task.raw_txt, task.is_done, task.priority, task.start_date, task.end_date, task.subject,
+              task.projects, task.contexts, task.special_kv_data, task.column) for task in model.tasks]
+    line_tasks = [None if task is None else task.index for task in model.line_tasks]
+    index = model.index
+    index_state = (
+        [sorted(task.index for task in tasks) for tasks in index.by_column],
+        {tag: sorted(task.index for task in tasks) for tag, tasks in index.by_project.items()},
+        {tag: sorted(task.index for task in tasks) for tag, tasks in index.by_context.items()},
+        {kv: sorted(task.index for task in tasks) for kv, tasks in index.by_special_kv.items()},
+    )
+    return model.lines, tasks, line_tasks, index_state
+
+
+def edit_lines(lines, rng):
+    """Return the lines with a random edit: a changed, inserted, removed, moved or duplicated line"""
+    lines = list(lines)
+    position = rng.randrange(len(lines))
+    edit = rng.randrange(5)
+    if edit == 0:
+        lines[position] = "x " + lines[position]
+    elif edit == 1:
+        lines.insert(position, "(A) inserted task +new @here")
+    elif edit == 2:
+        del lines[position]
+    elif edit == 3:
+        lines.insert(rng.randrange(len(lines)), lines.pop(position))
+    else:
+        lines.insert(position, lines[position])
+    return lines
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_update_is_same_as_parse(seed):
+    rng = random.Random(seed)
+    lines = generate_lines(200, seed)
+    model = KanbanTxtModel.TaskModel('\n'.join(lines))
+    # the index is updated along with the tasks once it's used
+    model.index
+    for _ in range(20):
+        lines = edit_lines(lines, rng)
+        model.update('\n'.join(lines))
+        assert get_state(model) == get_state(KanbanTxtModel.TaskModel('\n'.join(lines)))
+
+
+def test_update_parses_only_edited_line():
+    lines = generate_lines(100)
+    model = KanbanTxtModel.TaskModel('\n'.join(lines))
+    lines[50] = "x " + lines[50]
+    model.update('\n'.join(lines))
+    assert model.reparsed_lines == 1
+    assert [task.raw_txt for task in model.added_tasks] == [lines[50]]
+
+
+def test_update_reuses_moved_tasks():
+    lines = ["first", "second", "third"]
+    model = KanbanTxtModel.TaskModel('\n'.join(lines))
+    first_task = model.tasks[0]
+    model.update('\n'.join(["second", "third", "first"]))
+    assert model.reparsed_lines == 0
+    assert model.tasks[2] is first_task
+    assert first_task.index == 2
+
+
+def test_update_of_same_content_changes_nothing():
+    text = '\n'.join(generate_lines(50))
+    model = KanbanTxtModel.TaskModel(text)
+    version = model.version
+    model.update(text)
+    assert model.version == version
+    assert model.added_tasks == [] and model.removed_tasks == []
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 100, 5000])
+def test_extend_is_same_as_parse(chunk_size):
+    text = '\n'.join(generate_lines(300)) + '\n'
+    model = KanbanTxtModel.TaskModel()
+    model.index
+    # chunks split lines anywhere, the last line of the content is continued by the next chunk
+    for position in range(0, len(text), chunk_size):
+        model.extend(text[position:position + chunk_size])
+    assert get_state(model) == get_state(KanbanTxtModel.TaskModel(text))
+
+
+def test_find_tasks_completed_before():
+    model = KanbanTxtModel.TaskModel('\n'.join([
+        "x 2023-01-05 2023-01-01 old done",
+        "x 2023-03-01 recent done",
+        "x done without dates",
+        "2023-01-01 not done",
+        "x 2022-12-31 2022-12-01 older done",
+    ]))
+    tasks = KanbanTxtModel.find_tasks_completed_before(model.index.by_column[KanbanTxtModel.COLUMN_DONE],
+                                                       KanbanTxtModel.parse_date("2023-02-01"))
+    assert [task.index for task in tasks] == [0, 4]
+
+
+@pytest.mark.parametrize('line, new_state, expected', [
+    ("task +p knbn:in_progress", 'x', "x 2023-03-01 2023-03-01 task +p"),
+    ("(A) 2023-01-01 task", 'x', "x (A) 2023-03-01 2023-01-01 task"),
+    ("x 2023-02-01 2023-01-01 done", 'x', "x 2023-02-01 2023-01-01 done"),
+    ("x (B) 2023-02-01 2023-01-01 done", '', "(B) 2023-01-01 done"),
+    ("x 2023-02-01 2023-01-01 done", ' knbn:validation', "2023-01-01 done knbn:validation"),
+    ("task knbn:validation", ' knbn:in_progress', "task knbn:in_progress"),
+])
+def test_set_task_state(line, new_state, expected):
+    assert KanbanTxtModel.set_task_state(line, new_state, KanbanTxtModel.parse_date("2023-03-01")) == expected
+
+
+def test_task_completed_on_board_is_archived():
+    completion_day = KanbanTxtModel.parse_date("2023-03-01")
+    lines = ["2023-01-01 task moved to done", "task moved to done without creation date", "task left in todo"]
+    lines[0] = KanbanTxtModel.set_task_state(lines[0], 'x', completion_day)
+    lines[1] = KanbanTxtModel.set_task_state(lines[1], 'x', completion_day)
+    model = KanbanTxtModel.TaskModel('\n'.join(lines))
+    assert [task.end_date for task in model.tasks[:2]] == [completion_day, completion_day]
+    done_tasks = model.index.by_column[KanbanTxtModel.COLUMN_DONE]
+    assert KanbanTxtModel.find_tasks_completed_before(done_tasks, completion_day) == []
+    archived = KanbanTxtModel.find_tasks_completed_before(done_tasks, KanbanTxtModel.parse_date("2023-03-02"))
+    assert [task.index for task in archived] == [0, 1]